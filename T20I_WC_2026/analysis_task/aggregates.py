@@ -0,0 +1,296 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PHASES = ["PP", "Early_Middle", "Late_Middle", "Death"]
+
+# =====================================================
+# UTILITIES
+# =====================================================
+
+def stage(title):
+    print("\n" + "="*80)
+    print(title)
+    print("="*80)
+
+def phase(over):
+    if over <= 5:
+        return "PP"
+    elif over <= 9:
+        return "Early_Middle"
+    elif over <= 14:
+        return "Late_Middle"
+    else:
+        return "Death"
+
+def match_files(base_dir=BASE_DIR):
+    return sorted(
+        os.path.join(base_dir, f)
+        for f in os.listdir(base_dir)
+        if f.endswith(".json")
+    )
+
+# =====================================================
+# DELIVERY PARSING
+# =====================================================
+
+def read_match(file_path):
+    with open(file_path) as f:
+        data = json.load(f)
+
+    info = data.get("info", {})
+    teams = info.get("teams", [])
+    event = info.get("event", {})
+    outcome = info.get("outcome", {})
+    match = os.path.basename(file_path)
+
+    rows = []
+
+    for inn_idx, innings in enumerate(data.get("innings", [])):
+        if innings.get("super_over"):
+            continue
+
+        batting_team = innings.get("team")
+        bowling_team = [t for t in teams if t != batting_team]
+        bowling_team = bowling_team[0] if bowling_team else None
+        target = innings.get("target", {}).get("runs")
+
+        wickets_fallen = 0
+        legal_balls = 0
+        innings_runs = 0
+
+        for over_data in innings["overs"]:
+            over = over_data["over"]
+
+            for ball_idx, delivery in enumerate(over_data["deliveries"]):
+                extras = delivery.get("extras", {})
+                wickets = delivery.get("wickets", [])
+                is_wide = "wides" in extras
+                is_noball = "noballs" in extras
+                legal = not (is_wide or is_noball)
+
+                if wickets:
+                    wickets_fallen += 1
+                if legal:
+                    legal_balls += 1
+                innings_runs += delivery["runs"]["total"]
+
+                rows.append({
+                    "match": match,
+                    "date": info.get("dates", [None])[0],
+                    "venue": info.get("venue"),
+                    "group": event.get("group"),
+                    "innings": inn_idx + 1,
+                    "batting_team": batting_team,
+                    "bowling_team": bowling_team,
+                    "over": over,
+                    "ball": ball_idx + 1,
+                    "legal_ball": legal_balls,
+                    "phase": phase(over),
+                    "batter": delivery["batter"],
+                    "non_striker": delivery.get("non_striker"),
+                    "bowler": delivery["bowler"],
+                    "batter_runs": delivery["runs"]["batter"],
+                    "extras_runs": delivery["runs"].get("extras", 0),
+                    "total_runs": delivery["runs"]["total"],
+                    "byes": extras.get("byes", 0),
+                    "legbyes": extras.get("legbyes", 0),
+                    "is_wide": is_wide,
+                    "is_noball": is_noball,
+                    "legal": legal,
+                    "is_wicket": len(wickets) > 0,
+                    "dismissal_kind": wickets[0].get("kind") if wickets else None,
+                    "player_out": wickets[0].get("player_out") if wickets else None,
+                    "wickets_at_ball": wickets_fallen,
+                    "innings_runs": innings_runs,
+                    "target": target,
+                    # a tie is settled by the super over ("eliminator");
+                    # a no-result has neither
+                    "match_winner": outcome.get("winner", outcome.get("eliminator"))
+                })
+
+    return rows
+
+def load_deliveries(base_dir=BASE_DIR):
+    rows = []
+    for file_path in match_files(base_dir):
+        rows.extend(read_match(file_path))
+
+    return deliveries_frame(rows)
+
+def deliveries_frame(rows):
+    df = pd.DataFrame(rows)
+
+    df["is_dot"] = df["batter_runs"] == 0
+    df["is_boundary"] = df["batter_runs"].isin([4,6])
+    df["is_rotation"] = df["batter_runs"].isin([1,2,3])
+
+    # final_task pressure proxy: match run rate so far above 9
+    match_ball = df.groupby("match").cumcount() + 1
+    match_total = df.groupby("match")["total_runs"].cumsum()
+    df["high_pressure"] = match_total / (match_ball / 6) > 9
+
+    return df
+
+# =====================================================
+# PER-(PLAYER, MATCH) AGGREGATES
+# =====================================================
+
+class PlayerMatchTable:
+    # One row per (player, match) with additive stat columns, so any
+    # subset or reweighting of matches is a weighted sum over rows.
+
+    def __init__(self, players, matches, player_idx, match_idx, values, columns):
+        self.players = np.asarray(players)
+        self.matches = np.asarray(matches)
+        self.player_idx = np.asarray(player_idx)
+        self.match_idx = np.asarray(match_idx)
+        self.values = np.asarray(values, dtype=float)
+        self.columns = list(columns)
+
+        order = np.argsort(self.match_idx, kind="stable")
+        bounds = np.searchsorted(
+            self.match_idx[order], np.arange(len(self.matches) + 1)
+        )
+        self._match_rows = [
+            order[bounds[m]:bounds[m + 1]] for m in range(len(self.matches))
+        ]
+
+    def match_rows(self, m):
+        return self._match_rows[m]
+
+    def totals(self, match_weights=None):
+        w = np.ones(len(self.player_idx))
+        if match_weights is not None:
+            w = np.asarray(match_weights, dtype=float)[self.match_idx]
+
+        out = np.zeros((len(self.players), len(self.columns)))
+        np.add.at(out, self.player_idx, self.values * w[:, None])
+        return out
+
+    def without_match(self, totals, m):
+        rows = self.match_rows(m)
+        out = totals.copy()
+        np.subtract.at(out, self.player_idx[rows], self.values[rows])
+        return out
+
+    def frame(self, totals):
+        return pd.DataFrame(totals, index=self.players, columns=self.columns)
+
+def build_table(grouped, player_col):
+    grouped = grouped.reset_index()
+    players, player_idx = np.unique(grouped[player_col], return_inverse=True)
+    matches, match_idx = np.unique(grouped["match"], return_inverse=True)
+    columns = [c for c in grouped.columns if c not in (player_col, "match")]
+
+    return PlayerMatchTable(
+        players, matches, player_idx, match_idx,
+        grouped[columns].to_numpy(dtype=float), columns
+    )
+
+def _phase_columns(df, keys, stats):
+    # stats: {name: series aligned with df}; summed per key and per phase
+    frame = df[keys + ["phase"]].copy()
+    for name, values in stats.items():
+        frame[name] = values.astype(float)
+
+    total = frame.groupby(keys)[list(stats)].sum()
+
+    by_phase = frame.groupby(keys + ["phase"])[list(stats)].sum().unstack("phase")
+    by_phase = by_phase.reindex(
+        columns=pd.MultiIndex.from_product([list(stats), PHASES]), fill_value=0
+    )
+    by_phase.columns = [f"{m}_{p}" for m,p in by_phase.columns]
+
+    return total.join(by_phase).fillna(0)
+
+def batting_table(df):
+    legal = df["legal"]
+
+    agg = _phase_columns(df, ["batter", "match"], {
+        "balls": legal,
+        "runs": df["batter_runs"].where(legal, 0),
+        "runs_sq": df["batter_runs"].where(legal, 0)**2,
+        "dots": df["is_dot"] & legal,
+        "boundaries": df["is_boundary"] & legal,
+        "rotation": df["is_rotation"] & legal,
+        "wickets": df["is_wicket"] & legal,
+        "pressure_runs": df["batter_runs"].where(legal & df["high_pressure"], 0),
+        "pressure_balls": legal & df["high_pressure"],
+        "runs_in_wins": df["batter_runs"].where(
+            legal & (df["batting_team"] == df["match_winner"]), 0
+        ),
+        # win probability / run value added (winprob.add_win_probability,
+        # runvalue.add_run_value); wides are the bowler's
+        **{c: df[c].where(~df["is_wide"], 0) for c in ("wpa", "rva") if c in df},
+    })
+
+    # all-delivery innings totals (consistency) and collapse (>= 2 down)
+    innings = df.groupby(["batter", "match"]).agg(
+        inn_runs=("batter_runs","sum"),
+        inn_balls=("legal","sum")
+    )
+    collapse_df = df[df["wickets_at_ball"] >= 2]
+    collapse = collapse_df.groupby(["batter", "match"]).agg(
+        collapse_runs=("batter_runs","sum"),
+        collapse_balls=("legal","sum")
+    )
+
+    agg = agg.join(innings, how="outer").join(collapse).fillna(0)
+
+    inn_sr = agg["inn_runs"] / agg["inn_balls"] * 100
+    valid = np.isfinite(inn_sr)
+    agg["inn_count"] = valid.astype(float)
+    agg["inn_sr"] = inn_sr.where(valid, 0)
+    agg["inn_sr_sq"] = agg["inn_sr"]**2
+    agg["played"] = (agg["balls"] > 0).astype(float)
+
+    # share of the team's legal batter runs in that innings
+    team_runs = df[legal].groupby(["match", "batting_team"])["batter_runs"].sum()
+    team_runs = (
+        df[["batter", "match", "batting_team"]]
+        .drop_duplicates(["batter", "match"])
+        .join(team_runs.rename("team_runs"), on=["match", "batting_team"])
+        .set_index(["batter", "match"])["team_runs"]
+        .reindex(agg.index)
+    )
+    agg["run_share"] = (agg["runs"] / team_runs).where(team_runs > 0, 0)
+
+    # order of first appearance at the crease, counted when >= 5 balls faced
+    first = df.drop_duplicates(["match", "innings", "batter"])
+    position = pd.Series(
+        (first.groupby(["match", "innings"]).cumcount() + 1).to_numpy(),
+        index=pd.MultiIndex.from_frame(first[["batter", "match"]])
+    ).reindex(agg.index)
+    counted = (agg["inn_balls"] >= 5) & position.notna()
+    agg["pos_count"] = counted.astype(float)
+    agg["pos_sum"] = position.where(counted, 0)
+
+    return build_table(agg, "batter")
+
+def bowling_table(df):
+    legal = df["legal"]
+
+    agg = _phase_columns(df, ["bowler", "match"], {
+        "balls": legal,
+        "runs": df["total_runs"],
+        "runs_sq": df["total_runs"]**2,
+        "wickets": df["is_wicket"],
+        "dots": df["is_dot"],
+        "legal_runs": df["total_runs"].where(legal, 0),
+        "legal_runs_sq": df["total_runs"].where(legal, 0)**2,
+        "legal_wickets": df["is_wicket"] & legal,
+        "legal_dots": df["is_dot"] & legal,
+        **{c: -df[c] for c in ("wpa", "rva") if c in df},
+    })
+
+    agg["played"] = (agg["balls"] > 0).astype(float)
+
+    return build_table(agg, "bowler")
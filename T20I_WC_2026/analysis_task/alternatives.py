@@ -0,0 +1,78 @@
+import os
+import time
+import pandas as pd
+
+from aggregates import stage, load_deliveries
+from registry import REGISTRY, top_xis
+from run_all import load_features
+from optimizer import TOP_K
+
+# =====================================================
+# CLOSE ALTERNATIVES TO EACH MODEL'S XI
+# =====================================================
+
+def alternatives(results):
+    # one row per lineup: score gap to the best and the swaps that get there
+    records = []
+    for model, lineups in results.items():
+        best_xi, _, best = lineups[0]
+        for rank, (xi, role_map, objective) in enumerate(lineups, start=1):
+            records.append({
+                "model": model,
+                "rank": rank,
+                "objective": objective,
+                "gap": best - objective,
+                "out": ", ".join(p for p in best_xi if p not in xi),
+                "in": ", ".join(f"{p} ({role_map[p]})" for p in xi if p not in best_xi),
+                "xi": ", ".join(xi),
+            })
+    return pd.DataFrame(records)
+
+def swap_counts(table):
+    # how often each player comes in across the alternatives
+    swaps = table[table["in"] != ""].assign(player=table["in"].str.split(", ")).explode("player")
+    swaps["player"] = swaps["player"].str.replace(r" \(.*\)$", "", regex=True)
+    return (
+        swaps.groupby(["model", "player"])
+        .agg(lineups=("rank", "size"), smallest_gap=("gap", "min"))
+        .reset_index()
+        .sort_values(["model", "lineups"], ascending=[True, False])
+    )
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+
+    stage(f"STAGE 2: TOP {TOP_K} XIs PER MODEL")
+
+    results = {}
+    for name, spec in REGISTRY.items():
+        start = time.perf_counter()
+        results[name] = top_xis(spec, bat_all, bowl_all)
+        print(f"  {name:<15} lineups: {len(results[name])}  "
+              f"time: {time.perf_counter() - start:.2f}s")
+    print("Workers:", os.cpu_count())
+
+    table = alternatives(results)
+
+    stage("STAGE 3: CLOSEST ALTERNATIVES")
+
+    with pd.option_context("display.width", 250, "display.max_colwidth", 70):
+        for name in results:
+            print(f"\n{name}:")
+            print(
+                table[table["model"]==name][["rank", "objective", "gap", "out", "in"]]
+                .head(10)
+                .round(4)
+                .to_string(index=False)
+            )
+
+    stage("STAGE 4: MOST FREQUENT SWAPS")
+
+    counts = swap_counts(table)
+    print(counts.groupby("model").head(5).round(4).to_string(index=False))
+
+    table.to_csv("alternative_xis.csv", index=False)
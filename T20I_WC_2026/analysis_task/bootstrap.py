@@ -0,0 +1,168 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+
+from aggregates import stage, load_deliveries, batting_table, bowling_table
+from registry import MODELS
+from loo_stability import score_ranks, run_models
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+N_RESAMPLES = 500
+CHUNK_SIZE = 25      # resamples per pool task
+SEED = 2026
+CI_LEVEL = 0.95
+TOP_N = 5
+
+# =====================================================
+# MATCH-LEVEL RESAMPLING AS WEIGHTS
+# =====================================================
+
+def resample_seeds(n, seed=SEED):
+    # one independent stream per resample, so results do not depend on
+    # how resamples are split across workers
+    return np.random.SeedSequence(seed).spawn(n)
+
+def match_weights(n_matches, seed_seq):
+    # a bootstrap resample of matches is a multinomial count per match
+    rng = np.random.default_rng(seed_seq)
+    return rng.multinomial(n_matches, np.full(n_matches, 1 / n_matches))
+
+_STATE = {}
+
+def _init_worker(bat_tab, bowl_tab, model_names):
+    matches = np.union1d(bat_tab.matches, bowl_tab.matches)
+    _STATE.update(
+        bat_tab=bat_tab,
+        bowl_tab=bowl_tab,
+        matches=matches,
+        bat_idx=np.searchsorted(matches, bat_tab.matches),
+        bowl_idx=np.searchsorted(matches, bowl_tab.matches),
+        models={name: MODELS[name] for name in model_names},
+    )
+
+def _resample_chunk(jobs):
+    s = _STATE
+    ranks = {}
+    xis = {}
+    for i, seed_seq in jobs:
+        w = match_weights(len(s["matches"]), seed_seq)
+        results = run_models(
+            s["bat_tab"], s["bowl_tab"],
+            s["bat_tab"].totals(w[s["bat_idx"]]),
+            s["bowl_tab"].totals(w[s["bowl_idx"]]),
+            s["models"]
+        )
+        for model, result in results.items():
+            for score, rank in score_ranks(result).items():
+                ranks.setdefault((model, score), {})[i] = rank
+            xis.setdefault(model, {})[i] = result["xi"]
+    return ranks, xis
+
+def bootstrap(df, n=N_RESAMPLES, seed=SEED, workers=None, chunk_size=CHUNK_SIZE, models=MODELS):
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+    names = list(models)
+
+    seeds = resample_seeds(n, seed)
+    jobs = [list(enumerate(seeds))[i:i + chunk_size] for i in range(0, n, chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs)), _init_worker, (bat_tab, bowl_tab, names)) as pool:
+            parts = pool.map(_resample_chunk, jobs)
+    else:
+        _init_worker(bat_tab, bowl_tab, names)
+        parts = [_resample_chunk(job) for job in jobs]
+
+    ranks = {}
+    xis = {}
+    for part_ranks, part_xis in parts:
+        for key, samples in part_ranks.items():
+            ranks.setdefault(key, {}).update(samples)
+        for model, samples in part_xis.items():
+            xis.setdefault(model, {}).update(samples)
+
+    # (model, score) -> players x resamples, NaN where ineligible
+    ranks = {key: pd.DataFrame(samples).sort_index(axis=1) for key, samples in ranks.items()}
+
+    base = run_models(bat_tab, bowl_tab, bat_tab.totals(), bowl_tab.totals(), models)
+    return base, ranks, xis
+
+# =====================================================
+# REPORTING
+# =====================================================
+
+def rank_intervals(base, ranks, n, level=CI_LEVEL, top_n=TOP_N):
+    lo_q, hi_q = (1 - level) / 2, 1 - (1 - level) / 2
+    records = []
+    for (model, score), samples in ranks.items():
+        base_rank = score_ranks(base[model]).get(score, pd.Series(dtype=float))
+        values = samples.to_numpy()
+        with np.errstate(invalid="ignore"):
+            records.append(pd.DataFrame({
+                "model": model,
+                "score": score,
+                "player": samples.index,
+                "base_rank": base_rank.reindex(samples.index).values,
+                "eligible_rate": np.isfinite(values).sum(axis=1) / n,
+                "median_rank": np.nanmedian(values, axis=1),
+                "ci_low": np.nanquantile(values, lo_q, axis=1),
+                "ci_high": np.nanquantile(values, hi_q, axis=1),
+                f"top{top_n}_rate": (values <= top_n).sum(axis=1) / n,
+            }))
+    return pd.concat(records, ignore_index=True)
+
+def xi_rates(base, xis, n):
+    records = []
+    for model, samples in xis.items():
+        counts = pd.Series([p for xi in samples.values() for p in xi]).value_counts()
+        for player in sorted(set(counts.index) | set(base[model]["xi"])):
+            records.append({
+                "model": model,
+                "player": player,
+                "base_role": base[model]["roles"].get(player) if player in base[model]["xi"] else None,
+                "xi_rate": counts.get(player, 0) / n,
+            })
+    return pd.DataFrame(records)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    print("Matches:", df["match"].nunique())
+
+    stage("STAGE 2: BOOTSTRAP RESAMPLES")
+
+    start = time.perf_counter()
+    base, ranks, xis = bootstrap(df)
+    print(f"Resamples: {N_RESAMPLES}  workers: {os.cpu_count()}  "
+          f"time: {time.perf_counter() - start:.1f}s")
+
+    stage(f"STAGE 3: {CI_LEVEL:.0%} RANK INTERVALS")
+
+    intervals = rank_intervals(base, ranks, N_RESAMPLES)
+    for score in ["bat.Opener_Score", "bat.Finisher_Score", "bowl.Impact_Index", "bat.composite"]:
+        view = intervals[(intervals["score"] == score) & (intervals["base_rank"] <= 5)]
+        print(f"\n{score}:")
+        print(view.sort_values(["model", "base_rank"]).round(2).to_string(index=False))
+
+    stage("STAGE 4: XI SELECTION RATES")
+
+    rates = xi_rates(base, xis, N_RESAMPLES)
+    for model in base:
+        print(f"\n{model}:")
+        print(
+            rates[rates["model"]==model]
+            .sort_values("xi_rate", ascending=False)
+            .head(13)
+            .to_string(index=False)
+        )
+
+    intervals.to_csv("bootstrap_rank_intervals.csv", index=False)
+    rates.to_csv("bootstrap_xi_rates.csv", index=False)
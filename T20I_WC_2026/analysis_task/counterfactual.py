@@ -0,0 +1,182 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, load_deliveries
+from winprob import BALLS, WICKETS, RUNS, WICKET, EXTRA, outcome_codes, win_tables, win_probability
+from runvalue import run_expectancy
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+DRAWS = 2_000              # resampled outcome sequences per counterfactual
+CF_SEED = 0
+PLAYER_PRIOR_BALLS = 30    # balls of the league phase mix added to every player
+MIN_PHASE_BALLS = 18       # legal balls in the phase to be swapped out or in
+
+OUTCOME_RUNS = np.array(RUNS + [0, 1])   # a wide / no-ball is one run
+OUTCOME_LEGAL = np.arange(EXTRA + 1) != EXTRA
+OUTCOME_WICKET = np.arange(EXTRA + 1) == WICKET
+
+# =====================================================
+# OUTCOME RATES AND VALUES
+# =====================================================
+
+def player_rates(df, column):
+    # per (player, phase) outcome rates for a "batter" or "bowler" column,
+    # shrunk to the league mix of the phase; the last row is the league
+    k = EXTRA + 1
+    players = pd.Index(sorted(df[column].unique()))
+    i = players.get_indexer(df[column])
+    p = pd.Index(PHASES).get_indexer(df["phase"])
+
+    counts = np.bincount((i * len(PHASES) + p) * k + outcome_codes(df),
+                         minlength=len(players) * len(PHASES) * k)
+    counts = counts.reshape(len(players), len(PHASES), k).astype(float)
+    league = counts.sum(axis=0)
+    league /= league.sum(axis=1, keepdims=True)
+    rates = (counts + PLAYER_PRIOR_BALLS * league) / (counts.sum(axis=2, keepdims=True) + PLAYER_PRIOR_BALLS)
+    return players, np.concatenate([rates, league[None]])
+
+def outcome_values(df, tables, er):
+    # (deliveries, outcomes): run value and win probability added for the
+    # batting side had each delivery gone each possible way, all from the
+    # same state before the ball
+    balls = BALLS - (df["legal_ball"] - df["legal"]).to_numpy()
+    wkts = WICKETS - np.minimum(df["wickets_at_ball"] - df["is_wicket"], WICKETS).to_numpy()
+    score = (df["innings_runs"] - df["total_runs"]).to_numpy()
+    innings = df["innings"].to_numpy()
+    target = df["target"].to_numpy(dtype=float)
+    b0 = np.clip(balls, 0, BALLS)
+
+    after_b = np.clip(b0[:, None] - OUTCOME_LEGAL, 0, BALLS)
+    after_w = np.maximum(wkts[:, None] - OUTCOME_WICKET, 0)
+    after_s = score[:, None] + OUTCOME_RUNS
+
+    i = innings - 1
+    chased = (innings[:, None] == 2) & (after_s >= target[:, None])
+    er_after = np.where(chased, 0.0, er[i[:, None], after_b, after_w])
+    rv = OUTCOME_RUNS + er_after - er[i, b0, wkts][:, None]
+    wp_before = win_probability(tables, innings, b0, wkts, score, target)
+    wp = win_probability(tables, innings[:, None], after_b, after_w, after_s, target[:, None])
+    return {"run_value": rv, "wpa": wp - wp_before[:, None], "code": outcome_codes(df)}
+
+# =====================================================
+# COUNTERFACTUALS
+# =====================================================
+
+def counterfactual(df, values, rates, column, replaced, replacement, phases=PHASES,
+                   draws=DRAWS, seed=CF_SEED):
+    # `replaced`'s deliveries in `phases` take outcomes from `replacement`'s
+    # rates instead. Every match is re-scored at once: the exact expected
+    # change per match from the rates, and the spread over `draws`
+    # resampled outcome sequences. Deltas are for the replaced player's
+    # side: runs added (batting) or conceded (bowling), and wins.
+    players, probs = rates
+    hit = np.flatnonzero((df[column] == replaced).to_numpy() & df["phase"].isin(phases).to_numpy())
+    row = players.get_indexer([replacement])[0]
+    p = probs[row if row >= 0 else -1, pd.Index(PHASES).get_indexer(df["phase"].to_numpy()[hit])]
+
+    sign = 1.0 if column == "batter" else -1.0
+    rv, wpa, code = values["run_value"][hit], values["wpa"][hit], values["code"][hit]
+    actual_rv = rv[np.arange(len(hit)), code]
+    actual_wpa = wpa[np.arange(len(hit)), code]
+
+    matches, m = np.unique(df["match"].to_numpy()[hit], return_inverse=True)
+    per_match = lambda x: np.bincount(m, weights=x, minlength=len(matches))
+
+    exp_runs = per_match((p * rv).sum(axis=1) - actual_rv)
+    exp_wins = sign * per_match((p * wpa).sum(axis=1) - actual_wpa)
+
+    # resampled outcome sequences: one row per draw
+    rng = np.random.default_rng(seed)
+    cum = np.cumsum(p, axis=1)
+    drawn = (rng.random((draws, len(hit), 1)) > cum[None]).sum(axis=2).clip(max=EXTRA)
+    cols = np.arange(len(hit))
+    runs_draws = (rv[cols, drawn] - actual_rv).sum(axis=1)
+    wins_draws = sign * (wpa[cols, drawn] - actual_wpa).sum(axis=1)
+
+    table = pd.DataFrame({
+        "balls": np.bincount(m, minlength=len(matches)),
+        "runs_delta": exp_runs,
+        "win_delta": exp_wins,
+    }, index=pd.Index(matches, name="match"))
+    summary = {
+        "replaced": replaced,
+        "replacement": replacement,
+        "phases": "/".join(phases),
+        "matches": len(matches),
+        "balls": len(hit),
+        "runs_delta": exp_runs.sum(),
+        "runs_p10": np.percentile(runs_draws, 10) if len(hit) else 0.0,
+        "runs_p90": np.percentile(runs_draws, 90) if len(hit) else 0.0,
+        "win_delta": exp_wins.sum(),
+        "win_p10": np.percentile(wins_draws, 10) if len(hit) else 0.0,
+        "win_p90": np.percentile(wins_draws, 90) if len(hit) else 0.0,
+    }
+    return summary, table
+
+def phase_swaps(df, column, team_column, phase_name, cost):
+    # per team: the player with the worst `cost` in the phase against the
+    # team's best, both with MIN_PHASE_BALLS legal balls there
+    d = df[df["phase"] == phase_name]
+    stats = d.groupby([team_column, column]).agg(
+        balls=("legal","sum"),
+        runs=("total_runs","sum"),
+        wickets=("is_wicket","sum")
+    ).reset_index()
+    stats = stats[stats["balls"] >= MIN_PHASE_BALLS]
+    stats["cost"] = cost(stats)
+    swaps = []
+    for team, group in stats.groupby(team_column):
+        if len(group) > 1:
+            ranked = group.sort_values("cost")
+            swaps.append((team, ranked[column].iloc[-1], ranked[column].iloc[0]))
+    return swaps
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: OUTCOME VALUES FOR EVERY DELIVERY")
+
+    df = load_deliveries()
+    start = time.perf_counter()
+    tables = win_tables(df)
+    er = run_expectancy(df)
+    print(f"Tables: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    values = outcome_values(df, tables, er)
+    bowlers = player_rates(df, "bowler")
+    batters = player_rates(df, "batter")
+    print(f"Deliveries: {len(df)} x {EXTRA + 1} outcomes  time: {time.perf_counter() - start:.3f}s")
+
+    stage("STAGE 2: EACH TEAM'S BEST DEATH BOWLER IN FOR ITS MOST EXPENSIVE")
+
+    start = time.perf_counter()
+    records = []
+    for team, out, into in phase_swaps(df, "bowler", "bowling_team", "Death",
+                                       lambda s: s["runs"] / s["balls"]):
+        summary, _ = counterfactual(df, values, bowlers, "bowler", out, into, ["Death"])
+        records.append({"team": team, **summary})
+    print(f"Counterfactuals: {len(records)}  time: {time.perf_counter() - start:.3f}s")
+    table = pd.DataFrame(records).drop(columns="phases").set_index("team")
+    print(table.sort_values("win_delta", ascending=False).round(3).to_string())
+
+    stage("STAGE 3: EACH TEAM'S FASTEST POWERPLAY BATTER IN FOR ITS SLOWEST")
+
+    records = []
+    for team, out, into in phase_swaps(df, "batter", "batting_team", "PP",
+                                       lambda s: -s["runs"] / s["balls"]):
+        summary, _ = counterfactual(df, values, batters, "batter", out, into, ["PP"])
+        records.append({"team": team, **summary})
+    table = pd.DataFrame(records).drop(columns="phases").set_index("team")
+    print(table.sort_values("win_delta", ascending=False).round(3).to_string())
+
+    stage("STAGE 4: MATCH BY MATCH")
+
+    best = table["win_delta"].idxmax()
+    summary, by_match = counterfactual(df, values, batters, "batter", table.loc[best, "replaced"],
+                                       table.loc[best, "replacement"], ["PP"])
+    print(f"{best}: {summary['replacement']} for {summary['replaced']} in the powerplay")
+    print(by_match.round(3).to_string())
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES
+
+# =====================================================
+# RATE HELPERS
+# =====================================================
+
+def ratio(num, den, scale=1.0):
+    num = np.asarray(num, dtype=float)
+    den = np.asarray(den, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1) * scale, 0.0)
+
+# =====================================================
+# BATTING FEATURES
+# =====================================================
+
+def batting_features(tot):
+    # tot: PlayerMatchTable.frame() of batting_table() totals
+    bat = pd.DataFrame(index=tot.index)
+
+    bat["matches"] = tot["played"]
+    bat["runs"] = tot["runs"]
+    bat["balls"] = tot["balls"]
+    bat["wickets"] = tot["wickets"]
+
+    bat["SR"] = ratio(tot["runs"], tot["balls"], 100)
+    bat["dismissal_rate"] = ratio(tot["wickets"], tot["balls"])
+
+    for p in PHASES:
+        balls = tot[f"balls_{p}"]
+        bat[f"balls_{p}"] = balls
+        bat[f"runs_{p}"] = tot[f"runs_{p}"]
+        bat[f"SR_{p}"] = ratio(tot[f"runs_{p}"], balls, 100)
+        bat[f"dot_pct_{p}"] = ratio(tot[f"dots_{p}"], balls)
+        bat[f"boundary_pct_{p}"] = ratio(tot[f"boundaries_{p}"], balls)
+        bat[f"rotation_pct_{p}"] = ratio(tot[f"rotation_{p}"], balls)
+
+    bat["collapse_SR"] = ratio(tot["collapse_runs"], tot["collapse_balls"], 100)
+
+    dots = sum(tot[f"dots_{p}"] for p in PHASES)
+    boundaries = sum(tot[f"boundaries_{p}"] for p in PHASES)
+    bat["runs_per_match"] = ratio(tot["runs"], tot["played"])
+    bat["dot_pct"] = ratio(dots, tot["balls"])
+    bat["boundary_pct"] = ratio(boundaries, tot["balls"])
+    bat["pp_share"] = ratio(tot["balls_PP"], tot["balls"])
+    bat["death_share"] = ratio(tot["balls_Death"], tot["balls"])
+
+    bat["pressure_runs"] = tot["pressure_runs"]
+    bat["pressure_SR"] = ratio(tot["pressure_runs"], tot["pressure_balls"], 100)
+    bat["clutch_runs"] = tot["runs_Death"]
+    bat["run_share"] = ratio(tot["run_share"], tot["played"])
+    bat["win_ratio"] = ratio(tot["runs_in_wins"], tot["runs"])
+    bat["batting_position"] = ratio(tot["pos_sum"], tot["pos_count"])
+    for c in ("wpa", "rva"):
+        if c in tot:
+            bat[c] = tot[c]
+            bat[f"{c}_per_match"] = ratio(tot[c], tot["played"])
+
+    # sample std of per-innings SR from additive sums
+    n = tot["inn_count"].to_numpy()
+    s1 = tot["inn_sr"].to_numpy()
+    s2 = tot["inn_sr_sq"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (s2 - s1**2 / n) / (n - 1)
+    std_dev = np.sqrt(np.clip(var, 0, None))
+
+    bat["consistency"] = np.where(n >= 2, 1/(1 + std_dev), 0.0)
+
+    return bat
+
+# =====================================================
+# BOWLING FEATURES
+# =====================================================
+
+def bowling_features(tot):
+    bowl = pd.DataFrame(index=tot.index)
+
+    bowl["matches"] = tot["played"]
+    bowl["runs"] = tot["runs"]
+    bowl["balls"] = tot["balls"]
+    bowl["wickets"] = tot["wickets"]
+    bowl["dots"] = tot["dots"]
+
+    bowl["overs"] = tot["balls"] / 6
+    bowl["economy"] = ratio(tot["runs"], bowl["overs"])
+    bowl["wkt_rate"] = ratio(tot["wickets"], bowl["overs"])
+    bowl["wpm"] = ratio(tot["wickets"], tot["played"])
+    bowl["dot_pct"] = ratio(tot["dots"], tot["balls"])
+    bowl["inv_economy"] = ratio(1, bowl["economy"])
+
+    legal_dots = sum(tot[f"legal_dots_{p}"] for p in PHASES)
+    legal_wickets = sum(tot[f"legal_wickets_{p}"] for p in PHASES)
+    bowl["legal_dot_pct"] = ratio(legal_dots, tot["balls"])
+    bowl["wicket_rate"] = ratio(legal_wickets, tot["balls"])
+    bowl["death_wickets"] = tot["wickets_Death"]
+    for c in ("wpa", "rva"):
+        if c in tot:
+            bowl[c] = tot[c]
+            bowl[f"{c}_per_match"] = ratio(tot[c], tot["played"])
+
+    for p in PHASES:
+        overs = tot[f"balls_{p}"] / 6
+        bowl[f"balls_{p}"] = tot[f"balls_{p}"]
+        bowl[f"legal_runs_{p}"] = tot[f"legal_runs_{p}"]
+        bowl[f"overs_{p}"] = overs
+        bowl[f"econ_{p}"] = ratio(tot[f"legal_runs_{p}"], overs)
+        bowl[f"wkt_rate_{p}"] = ratio(tot[f"legal_wickets_{p}"], overs)
+        bowl[f"dot_pct_{p}"] = ratio(tot[f"legal_dots_{p}"], tot[f"balls_{p}"])
+        bowl[f"share_{p}"] = ratio(tot[f"balls_{p}"], tot["balls"])
+
+    middle_balls = tot["balls_Early_Middle"] + tot["balls_Late_Middle"]
+    bowl["overs_Middle"] = middle_balls / 6
+    bowl["econ_Middle"] = ratio(
+        tot["legal_runs_Early_Middle"] + tot["legal_runs_Late_Middle"],
+        bowl["overs_Middle"]
+    )
+    bowl["wkt_rate_Middle"] = ratio(
+        tot["legal_wickets_Early_Middle"] + tot["legal_wickets_Late_Middle"],
+        bowl["overs_Middle"]
+    )
+    bowl["dot_pct_Middle"] = ratio(
+        tot["legal_dots_Early_Middle"] + tot["legal_dots_Late_Middle"],
+        middle_balls
+    )
+    bowl["share_Middle"] = ratio(middle_balls, tot["balls"])
+
+    return bowl
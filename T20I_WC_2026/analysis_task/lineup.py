@@ -0,0 +1,178 @@
+import time
+import numpy as np
+import pandas as pd
+from itertools import permutations, islice
+from math import factorial
+
+from aggregates import stage, load_deliveries
+from run_all import load_features, run_all
+from simulator import batting_order
+from markov import transition_rates, player_classes, order_rates, expected_innings
+from winprob import RUNS
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+ORDER_MODEL = "Advanced_Elite"
+
+TIME_BUDGET = 2.0        # seconds per XI
+EXHAUSTIVE_LIMIT = 720   # core orders enumerated outright (6!)
+BATCH = 256              # orders scored per pass of the chain
+RESTART_SWAPS = 3        # random swaps that kick the search off a local optimum
+ORDER_SEED = 0
+EPS = 1e-9
+
+# =====================================================
+# PRUNING AND SCORING
+# =====================================================
+
+def split_core(order, rates, classes):
+    # the tail (class "Tail", or never batted) always bats last, best run
+    # rate first; only the core's order is searched
+    tail = set(classes.reindex(order).fillna("Tail").loc[lambda c: c == "Tail"].index)
+    P = order_rates(order, rates)[:len(order)]
+    run_rate = (P[:, :, :len(RUNS)] @ np.array(RUNS, dtype=float)).mean(axis=1)
+    rate = dict(zip(order, run_rate))
+    core = [p for p in order if p not in tail]
+    return core, sorted(tail, key=lambda p: -rate[p])
+
+def score_orders(cores, P, tail, cache):
+    # expected totals of core orders (tuples of core positions) with the
+    # tail behind them; orders already in the cache are not scored again
+    new = [c for c in dict.fromkeys(cores) if c not in cache]
+    for i in range(0, len(new), BATCH):
+        chunk = new[i:i + BATCH]
+        rows = np.hstack([np.array(chunk), np.broadcast_to(tail, (len(chunk), len(tail)))]).astype(int)
+        full = np.concatenate([P[rows], np.broadcast_to(P[len(P) - 1:][None],
+                               (len(chunk), len(P) - rows.shape[1]) + P.shape[1:])], axis=1)
+        cache.update(zip(chunk, expected_innings(full)["expected_total"]))
+    return np.array([cache[c] for c in cores])
+
+def neighbours(order):
+    # every swap of two core positions, and every move of one batter to
+    # another slot that is not a swap
+    n = len(order)
+    out = []
+    for i in range(n):
+        for j in range(i + 1, n):
+            swapped = list(order)
+            swapped[i], swapped[j] = swapped[j], swapped[i]
+            out.append(tuple(swapped))
+    for i in range(n):
+        rest = order[:i] + order[i + 1:]
+        for j in range(n):
+            if abs(i - j) > 1:
+                out.append(rest[:j] + (order[i],) + rest[j:])
+    return out
+
+# =====================================================
+# ANYTIME SEARCH
+# =====================================================
+
+def optimize_order(order, rates, classes, budget=TIME_BUDGET, exhaustive=True, seed=ORDER_SEED):
+    # The batting order with the highest expected total found within
+    # `budget` seconds. Small cores are enumerated outright, larger ones
+    # by best-improvement local search with random restarts. `history`
+    # holds (seconds, orders scored, best total) at every improvement, so
+    # the answer under any shorter budget can be read off it.
+    start = time.perf_counter()
+    deadline = start + budget
+    core, tail = split_core(order, rates, classes)
+    P = order_rates(core + tail, rates)
+    tail_rows = np.arange(len(core), len(core) + len(tail))
+    cache = {}
+    best = {"order": tuple(range(len(core))), "total": -np.inf}
+    history = []
+
+    def offer(cores):
+        totals = score_orders(cores, P, tail_rows, cache)
+        i = int(np.argmax(totals))
+        if totals[i] > best["total"] + EPS:
+            best.update(order=cores[i], total=totals[i])
+            history.append((time.perf_counter() - start, len(cache), totals[i]))
+        return totals
+
+    offer([best["order"]])
+    complete = exhaustive and factorial(len(core)) <= EXHAUSTIVE_LIMIT
+
+    if complete:
+        orders = permutations(range(len(core)))
+        while True:
+            chunk = list(islice(orders, BATCH))
+            if not chunk:
+                break
+            offer(chunk)
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+    else:
+        rng = np.random.default_rng(seed)
+        current, current_total = best["order"], best["total"]
+        while time.perf_counter() < deadline and len(core) > 1:
+            moves = neighbours(current)
+            totals = offer(moves)
+            i = int(np.argmax(totals))
+            if totals[i] > current_total + EPS:
+                current, current_total = moves[i], totals[i]
+                continue
+            # local optimum: restart from the best order, shaken up
+            kicked = list(best["order"])
+            for _ in range(RESTART_SWAPS):
+                a, b = rng.choice(len(core), 2, replace=False)
+                kicked[a], kicked[b] = kicked[b], kicked[a]
+            current = tuple(kicked)
+            current_total = offer([current])[0]
+
+    players = core + tail
+    return {
+        "order": [players[i] for i in best["order"]] + tail,
+        "expected_total": best["total"],
+        "start_total": expected_innings(order_rates(order, rates)[None])["expected_total"][0],
+        "scored": len(cache),
+        "complete": complete,
+        "seconds": time.perf_counter() - start,
+        "history": pd.DataFrame(history, columns=["seconds", "scored", "expected_total"]),
+    }
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: TRANSITION RATES")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    classes = player_classes(bat_all)
+    rates = transition_rates(df, classes)
+    results = run_all(bat_all, bowl_all)
+    print(f"Batters: {len(rates['batters'])}  XIs: {len(results)}")
+
+    stage(f"STAGE 2: BEST ORDER FOR EVERY MODEL'S XI ({TIME_BUDGET:.0f}s EACH)")
+
+    records = {}
+    best_orders = {}
+    for name, result in results.items():
+        found = optimize_order(batting_order(result["xi"], bat_all), rates, classes)
+        best_orders[name] = found["order"]
+        records[name] = {
+            "as_picked": found["start_total"],
+            "optimized": found["expected_total"],
+            "gain": found["expected_total"] - found["start_total"],
+            "scored": found["scored"],
+            "complete": found["complete"],
+            "seconds": found["seconds"],
+        }
+    print(pd.DataFrame(records).T.to_string())
+
+    stage(f"STAGE 3: {ORDER_MODEL} - LOCAL SEARCH AGAINST FULL ENUMERATION")
+
+    order = batting_order(results[ORDER_MODEL]["xi"], bat_all)
+    full = optimize_order(order, rates, classes, budget=60.0)
+    local = optimize_order(order, rates, classes, exhaustive=False)
+    print(f"Enumerated: {full['expected_total']:.3f} ({full['scored']} orders, complete: {full['complete']})")
+    print(f"Local search: {local['expected_total']:.3f} ({local['scored']} orders)")
+    print("\nAnytime best:")
+    print(local["history"].round(4).to_string(index=False))
+    print("\nAs picked:  " + ", ".join(order))
+    print("Optimized:  " + ", ".join(local["order"]))
+
+    pd.DataFrame({name: pd.Series(o) for name, o in best_orders.items()}).to_csv("batting_orders.csv", index=False)
@@ -0,0 +1,396 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, phase, match_files, load_deliveries
+from features import batting_features, bowling_features
+from registry import REGISTRY, run_model
+from run_all import load_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+LIVE_FEED = "live_feed.jsonl"
+LIVE_MODEL = "Advanced_Elite"
+REPLAY_MATCHES = 1     # matches streamed ball by ball at the end of the replay
+POLL_SECONDS = 0.5
+IDLE_SECONDS = 60      # follow() stops after this long without a new line
+RANK_TOP = 5
+
+PRESSURE_RATE = 9      # final_task pressure proxy: match run rate so far above 9
+POSITION_BALLS = 5     # balls faced before a batting position counts
+COLLAPSE_WICKETS = 2   # wickets down for the collapse columns
+
+# the additive columns of batting_table / bowling_table, in their order
+BAT_STATS = ["balls", "runs", "runs_sq", "dots", "boundaries", "rotation", "wickets",
+             "pressure_runs", "pressure_balls", "runs_in_wins"]
+BAT_EXTRA = ["inn_runs", "inn_balls", "collapse_runs", "collapse_balls", "inn_count", "inn_sr",
+             "inn_sr_sq", "played", "run_share", "pos_count", "pos_sum"]
+BOWL_STATS = ["balls", "runs", "runs_sq", "wickets", "dots", "legal_runs", "legal_runs_sq",
+              "legal_wickets", "legal_dots"]
+BOWL_EXTRA = ["played"]
+
+def table_columns(stats, extra):
+    return stats + [f"{s}_{p}" for s in stats for p in PHASES] + extra
+
+# =====================================================
+# FEED
+# =====================================================
+#
+# One JSON object per line: a match's Cricsheet "info" block, then one
+# record per delivery (the Cricsheet delivery with its match, innings,
+# batting team, target and over), then the match "outcome".
+
+def feed_records(file_path):
+    # a Cricsheet match file as feed records, for replays
+    with open(file_path) as f:
+        data = json.load(f)
+    match = os.path.basename(file_path)
+    info = data.get("info", {})
+    yield {"match": match, "info": {k: v for k, v in info.items() if k != "outcome"}}
+    for inn_idx, innings in enumerate(data.get("innings", [])):
+        if innings.get("super_over"):
+            continue
+        for over_data in innings["overs"]:
+            for delivery in over_data["deliveries"]:
+                yield {
+                    "match": match,
+                    "innings": inn_idx + 1,
+                    "team": innings.get("team"),
+                    "target": innings.get("target", {}).get("runs"),
+                    "over": over_data["over"],
+                    "delivery": delivery,
+                }
+    yield {"match": match, "outcome": info.get("outcome", {})}
+
+class FeedReader:
+    # complete lines appended to a JSON-lines file since the last read; a
+    # partly written last line waits for the next read
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        self.offset += end
+        return [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+
+# =====================================================
+# INCREMENTAL AGGREGATES
+# =====================================================
+
+class RunningTotals:
+    # players x columns sums; rows are added as players appear, the array
+    # doubling when full
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.col = {c: i for i, c in enumerate(self.columns)}
+        self.index = {}
+        self.players = []
+        self.values = np.zeros((64, len(self.columns)))
+
+    def row(self, player):
+        r = self.index.get(player)
+        if r is None:
+            r = self.index[player] = len(self.players)
+            self.players.append(player)
+            if r == len(self.values):
+                self.values = np.vstack([self.values, np.zeros_like(self.values)])
+        return r
+
+    def add(self, r, column, value):
+        self.values[r, self.col[column]] += value
+
+    def frame(self):
+        # the PlayerMatchTable.frame() of the totals so far
+        n = len(self.players)
+        return pd.DataFrame(self.values[:n].copy(), index=self.players, columns=self.columns).sort_index()
+
+class LiveAggregates:
+    # The batting_table / bowling_table totals kept up to date one delivery
+    # at a time: each delivery touches a fixed number of cells (the run
+    # shares of the at most eleven batters of its innings included), so
+    # features and selections can be rebuilt at any point without
+    # re-reading a match.
+
+    def __init__(self):
+        self.bat = RunningTotals(table_columns(BAT_STATS, BAT_EXTRA))
+        self.bowl = RunningTotals(table_columns(BOWL_STATS, BOWL_EXTRA))
+        self.matches = {}      # match -> runs, deliveries, batter states, result
+        self.innings = {}      # (match, innings) -> ball state
+        self.bat_rows = {}     # (batter, match) -> per-match batting state
+        self.bowl_played = set()
+        # league runs, legal balls, wickets per phase
+        self.phase_counts = np.zeros((len(PHASES), 3))
+        self.deliveries = 0
+
+    def add(self, record):
+        # True when the record completes an over or a match
+        if "delivery" in record:
+            return self.add_delivery(record)
+        if "outcome" in record:
+            self.add_outcome(record)
+            return True
+        if "info" in record:
+            self._match(record["match"])["info"] = record["info"]
+        return False
+
+    def _match(self, match):
+        if match not in self.matches:
+            self.matches[match] = {"info": {}, "runs": 0, "deliveries": 0, "batters": [], "winner": None}
+        return self.matches[match]
+
+    def add_delivery(self, record):
+        d = record["delivery"]
+        m = self._match(record["match"])
+        key = (record["match"], record["innings"])
+        if key not in self.innings:
+            self.innings[key] = {"team": record["team"], "target": record.get("target"), "runs": 0,
+                                 "bat_runs": 0, "wickets": 0, "legal": 0, "over": 0, "batters": []}
+        inn = self.innings[key]
+
+        extras = d.get("extras", {})
+        legal = not ("wides" in extras or "noballs" in extras)
+        wicket = bool(d.get("wickets"))
+        bat_runs = d["runs"]["batter"]
+        total = d["runs"]["total"]
+        p = phase(record["over"])
+
+        # ball state
+        inn["runs"] += total
+        inn["wickets"] += wicket
+        inn["legal"] += legal
+        inn["over"] = record["over"]
+        m["runs"] += total
+        m["deliveries"] += 1
+        pressure = m["runs"] / (m["deliveries"] / 6) > PRESSURE_RATE
+        self.phase_counts[PHASES.index(p)] += (total, legal, wicket)
+        self.deliveries += 1
+
+        self._add_batting(record, m, inn, p, legal, wicket, bat_runs, pressure)
+        self._add_bowling(record, p, legal, wicket, bat_runs, total)
+        return legal and inn["legal"] % 6 == 0
+
+    def _add_batting(self, record, m, inn, p, legal, wicket, bat_runs, pressure):
+        tab = self.bat
+        batter = record["delivery"]["batter"]
+        r = tab.row(batter)
+        state = self.bat_rows.get((batter, record["match"]))
+        if state is None:
+            # first time on strike: the next batting position of the innings
+            inn["batters"].append(batter)
+            state = self.bat_rows[(batter, record["match"])] = {
+                "row": r, "team": inn["team"], "position": len(inn["batters"]), "runs": 0,
+                "runs_by_phase": dict.fromkeys(PHASES, 0), "inn_runs": 0, "inn_balls": 0,
+                "sr": None, "share": 0.0,
+            }
+            m["batters"].append(state)
+
+        if legal:
+            stats = {
+                "balls": 1, "runs": bat_runs, "runs_sq": bat_runs**2, "dots": bat_runs == 0,
+                "boundaries": bat_runs in (4, 6), "rotation": bat_runs in (1, 2, 3), "wickets": wicket,
+                "pressure_runs": bat_runs if pressure else 0, "pressure_balls": pressure,
+            }
+            for name, value in stats.items():
+                if value:
+                    tab.add(r, name, value)
+                    tab.add(r, f"{name}_{p}", value)
+            state["runs"] += bat_runs
+            state["runs_by_phase"][p] += bat_runs
+            inn["bat_runs"] += bat_runs
+
+        state["inn_runs"] += bat_runs
+        state["inn_balls"] += legal
+        tab.add(r, "inn_runs", bat_runs)
+        tab.add(r, "inn_balls", legal)
+        if inn["wickets"] >= COLLAPSE_WICKETS:
+            tab.add(r, "collapse_runs", bat_runs)
+            tab.add(r, "collapse_balls", legal)
+
+        if legal and state["inn_balls"] == 1:
+            tab.add(r, "played", 1)
+        if legal and state["inn_balls"] == POSITION_BALLS:
+            tab.add(r, "pos_count", 1)
+            tab.add(r, "pos_sum", state["position"])
+
+        # innings strike rate: swap this match's old contribution for the new
+        if state["inn_balls"]:
+            sr = state["inn_runs"] / state["inn_balls"] * 100
+            old = state["sr"]
+            tab.add(r, "inn_count", old is None)
+            tab.add(r, "inn_sr", sr - (old or 0))
+            tab.add(r, "inn_sr_sq", sr**2 - (old or 0)**2)
+            state["sr"] = sr
+
+        # share of the team's legal batter runs, for every batter of the innings
+        if legal and bat_runs:
+            for name in inn["batters"]:
+                other = self.bat_rows[(name, record["match"])]
+                share = other["runs"] / inn["bat_runs"]
+                tab.add(other["row"], "run_share", share - other["share"])
+                other["share"] = share
+
+    def _add_bowling(self, record, p, legal, wicket, bat_runs, total):
+        tab = self.bowl
+        bowler = record["delivery"]["bowler"]
+        r = tab.row(bowler)
+        stats = {
+            "balls": legal, "runs": total, "runs_sq": total**2, "wickets": wicket, "dots": bat_runs == 0,
+            "legal_runs": total if legal else 0, "legal_runs_sq": total**2 if legal else 0,
+            "legal_wickets": wicket and legal, "legal_dots": bat_runs == 0 and legal,
+        }
+        for name, value in stats.items():
+            if value:
+                tab.add(r, name, value)
+                tab.add(r, f"{name}_{p}", value)
+        if legal and (bowler, record["match"]) not in self.bowl_played:
+            self.bowl_played.add((bowler, record["match"]))
+            tab.add(r, "played", 1)
+
+    def add_outcome(self, record):
+        # runs in wins are only known at the result
+        m = self._match(record["match"])
+        m["winner"] = record["outcome"].get("winner")
+        for state in m["batters"]:
+            if state["team"] == m["winner"] and state["runs"]:
+                self.bat.add(state["row"], "runs_in_wins", state["runs"])
+                for p, runs in state["runs_by_phase"].items():
+                    self.bat.add(state["row"], f"runs_in_wins_{p}", runs)
+
+    def scoreboard(self):
+        # ball state of every innings seen
+        records = []
+        for (match, innings), inn in self.innings.items():
+            balls_left = 120 - inn["legal"]
+            need = inn["target"] - inn["runs"] if inn["target"] else None
+            records.append({
+                "match": match, "innings": innings, "team": inn["team"],
+                "score": f"{inn['runs']}/{inn['wickets']}",
+                "overs": f"{inn['legal'] // 6}.{inn['legal'] % 6}",
+                "phase": phase(inn["over"]),
+                "run_rate": inn["runs"] / inn["legal"] * 6 if inn["legal"] else 0.0,
+                "required_rate": need / balls_left * 6 if need and balls_left > 0 else None,
+                "result": self.matches[match]["winner"],
+            })
+        return pd.DataFrame(records)
+
+    def phases(self):
+        table = pd.DataFrame(self.phase_counts, index=PHASES, columns=["runs", "balls", "wickets"])
+        table["run_rate"] = table["runs"] / table["balls"] * 6
+        return table
+
+    def features(self):
+        return batting_features(self.bat.frame()), bowling_features(self.bowl.frame())
+
+    def select(self, model=LIVE_MODEL):
+        bat_all, bowl_all = self.features()
+        return run_model(REGISTRY[model], bat_all, bowl_all)
+
+def rankings(result, top=RANK_TOP):
+    # the model's top players by each of its scores
+    return {
+        f"{side}.{score}": list(result[side][score].sort_values(ascending=False).head(top).index)
+        for side in ("bat", "bowl") for score in result["scores"][side]
+    }
+
+def follow(path, live, model=LIVE_MODEL, poll=POLL_SECONDS, idle=IDLE_SECONDS, on_refresh=print):
+    # tail the feed, folding in new deliveries and refreshing the XI after
+    # each batch of them, until nothing new arrives for `idle` seconds
+    reader = FeedReader(path)
+    last = time.monotonic()
+    while time.monotonic() - last < idle:
+        records = reader.read()
+        if not records:
+            time.sleep(poll)
+            continue
+        for record in records:
+            live.add(record)
+        last = time.monotonic()
+        on_refresh(live.select(model)["xi"])
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: FEED OF THE COMPLETED MATCHES")
+
+    files = match_files()
+    if os.path.exists(LIVE_FEED):
+        os.remove(LIVE_FEED)
+    with open(LIVE_FEED, "w") as f:
+        for file_path in files[:-REPLAY_MATCHES]:
+            for record in feed_records(file_path):
+                f.write(json.dumps(record) + "\n")
+
+    live = LiveAggregates()
+    reader = FeedReader(LIVE_FEED)
+    start = time.perf_counter()
+    records = reader.read()
+    parsed = time.perf_counter()
+    for record in records:
+        live.add(record)
+    done = time.perf_counter()
+    print(f"Records: {len(records)}  deliveries: {live.deliveries}  "
+          f"parse: {parsed - start:.3f}s  update: {(done - parsed) / live.deliveries * 1e6:.1f} us/delivery")
+
+    start = time.perf_counter()
+    result = live.select()
+    print(f"XI refresh: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    print(", ".join(result["xi"]))
+
+    stage(f"STAGE 2: {REPLAY_MATCHES} MATCH(ES) ARRIVING BALL BY BALL")
+
+    updates, refreshes = [], []
+    xi = result["xi"]
+    for file_path in files[-REPLAY_MATCHES:]:
+        for record in feed_records(file_path):
+            with open(LIVE_FEED, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            start = time.perf_counter()
+            refresh = any([live.add(new) for new in reader.read()])
+            updates.append(time.perf_counter() - start)
+
+            # refresh at the end of every over and at the result
+            if refresh:
+                start = time.perf_counter()
+                result = live.select()
+                refreshes.append(time.perf_counter() - start)
+                if result["xi"] != xi:
+                    out = [p for p in xi if p not in result["xi"]]
+                    into = [p for p in result["xi"] if p not in xi]
+                    board = live.scoreboard().iloc[-1]
+                    print(f"  {board['team']} {board['score']} ({board['overs']}): "
+                          f"out {', '.join(out) or '-'}  in {', '.join(into) or '-'}")
+                    xi = result["xi"]
+
+    print(f"Tail + update: {np.median(updates) * 1e3:.2f} ms/record (median)  "
+          f"XI refresh: {np.median(refreshes) * 1e3:.1f} ms (median of {len(refreshes)})")
+    print(live.scoreboard().tail(2 * REPLAY_MATCHES).round(2).to_string(index=False))
+    print("\nPhase counters:")
+    print(live.phases().round(2).to_string())
+    print("\nRankings:")
+    for score, players in rankings(result).items():
+        print(f"  {score:<28} {', '.join(players)}")
+
+    stage("STAGE 3: AGAINST THE BATCH PIPELINE")
+
+    start = time.perf_counter()
+    bat_all, bowl_all = load_features(load_deliveries())
+    print(f"Re-parse + features: {time.perf_counter() - start:.3f}s")
+    live_bat, live_bowl = live.features()
+    for name, batch, inc in (("bat", bat_all, live_bat), ("bowl", bowl_all, live_bowl)):
+        diff = (batch - inc.reindex(index=batch.index, columns=batch.columns)).abs().max().max()
+        print(f"  {name}: {len(inc)} players  max abs difference {diff:.2e}")
+    same = run_model(REGISTRY[LIVE_MODEL], bat_all, bowl_all)["xi"] == result["xi"]
+    print(f"  {LIVE_MODEL} XI identical: {same}")
+
+    os.remove(LIVE_FEED)
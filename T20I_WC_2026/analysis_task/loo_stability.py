@@ -0,0 +1,143 @@
+import pandas as pd
+
+from aggregates import stage, load_deliveries, batting_table, bowling_table
+from features import batting_features, bowling_features
+from registry import MODELS
+
+# =====================================================
+# LEAVE-ONE-MATCH-OUT
+# =====================================================
+
+def score_ranks(result):
+    ranks = {}
+    for side in ("bat", "bowl"):
+        for score in result["scores"][side]:
+            ranks[f"{side}.{score}"] = result[side][score].rank(ascending=False, method="min")
+    return ranks
+
+def run_models(bat_tab, bowl_tab, bat_tot, bowl_tot, models):
+    bat_all = batting_features(bat_tab.frame(bat_tot))
+    bowl_all = bowling_features(bowl_tab.frame(bowl_tot))
+    return {name: fn(bat_all, bowl_all) for name, fn in models.items()}
+
+def leave_one_out(df, models=MODELS):
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+
+    bat_tot = bat_tab.totals()
+    bowl_tot = bowl_tab.totals()
+
+    base = run_models(bat_tab, bowl_tab, bat_tot, bowl_tot, models)
+
+    bowl_match = {m: i for i, m in enumerate(bowl_tab.matches)}
+    runs = {}
+
+    for m, match in enumerate(bat_tab.matches):
+        bat_m = bat_tab.without_match(bat_tot, m)
+        bowl_m = bowl_tab.without_match(bowl_tot, bowl_match[match]) \
+            if match in bowl_match else bowl_tot
+        runs[match] = run_models(bat_tab, bowl_tab, bat_m, bowl_m, models)
+
+    return base, runs
+
+# =====================================================
+# REPORTING
+# =====================================================
+
+def rank_volatility(base, runs):
+    records = []
+    for model in base:
+        base_ranks = score_ranks(base[model])
+        loo_ranks = [score_ranks(r[model]) for r in runs.values()]
+
+        for score, base_rank in base_ranks.items():
+            samples = pd.concat([r[score] for r in loo_ranks], axis=1)
+            records.append(pd.DataFrame({
+                "model": model,
+                "score": score,
+                "player": base_rank.index,
+                "base_rank": base_rank.values,
+                "mean_rank": samples.reindex(base_rank.index).mean(axis=1).values,
+                "rank_std": samples.reindex(base_rank.index).std(axis=1).values,
+                "best_rank": samples.reindex(base_rank.index).min(axis=1).values,
+                "worst_rank": samples.reindex(base_rank.index).max(axis=1).values,
+                "runs_eligible": samples.reindex(base_rank.index).notna().sum(axis=1).values,
+            }))
+
+    return pd.concat(records, ignore_index=True)
+
+def xi_frequency(base, runs):
+    records = []
+    n = len(runs)
+    for model in base:
+        counts = {}
+        for r in runs.values():
+            for player in r[model]["xi"]:
+                counts[player] = counts.get(player, 0) + 1
+
+        players = sorted(set(counts) | set(base[model]["xi"]))
+        for player in players:
+            records.append({
+                "model": model,
+                "player": player,
+                "base_role": base[model]["roles"].get(player) if player in base[model]["xi"] else None,
+                "xi_rate": counts.get(player, 0) / n,
+            })
+
+    return pd.DataFrame(records)
+
+def pivotal_matches(base, runs):
+    records = []
+    for match, r in runs.items():
+        for model in base:
+            dropped = [p for p in base[model]["xi"] if p not in r[model]["xi"]]
+            added = [p for p in r[model]["xi"] if p not in base[model]["xi"]]
+            if dropped or added:
+                records.append({
+                    "match": match,
+                    "model": model,
+                    "dropped": ", ".join(dropped),
+                    "added": ", ".join(added),
+                })
+    return pd.DataFrame(records, columns=["match","model","dropped","added"])
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    print("Matches:", df["match"].nunique())
+
+    stage("STAGE 2: LEAVE-ONE-MATCH-OUT RUNS")
+
+    base, runs = leave_one_out(df)
+    print("Models:", list(base))
+    print("Runs:", len(runs))
+
+    stage("STAGE 3: RANK VOLATILITY")
+
+    volatility = rank_volatility(base, runs)
+    print(
+        volatility[volatility["base_rank"] <= 10]
+        .sort_values("rank_std", ascending=False)
+        .head(20)
+    )
+
+    stage("STAGE 4: XI RETENTION")
+
+    frequency = xi_frequency(base, runs)
+    for model in base:
+        print(f"\n{model}:")
+        print(
+            frequency[frequency["model"]==model]
+            .sort_values("xi_rate", ascending=False)
+            .head(15)
+            .to_string(index=False)
+        )
+
+    pivotal = pivotal_matches(base, runs)
+    print("\nMatches whose removal changes an XI:")
+    print(pivotal.to_string(index=False))
+
+    volatility.to_csv("loo_rank_volatility.csv", index=False)
+    frequency.to_csv("loo_xi_frequency.csv", index=False)
@@ -0,0 +1,246 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, phase, load_deliveries
+from registry import final_task_bat_roles
+from run_all import load_features, run_all
+from simulator import outcome_tables, spin_share, batting_order, compare_xis
+from winprob import BALLS, WICKETS, MAX_RUNS, RUNS, WICKET, EXTRA, outcome_codes
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+MARKOV_MODEL = "Advanced_Elite"
+
+TAIL_BALLS = 20        # batters with fewer balls faced form the "Tail" class
+CLASS_PRIOR_BALLS = 30 # balls of the class rates added to every batter
+EXTRA_TERMS = 4        # wides / no-balls per ball carried exactly (the rest merge into the last)
+
+BALL_PHASE = np.array([PHASES.index(phase(b // 6)) for b in range(BALLS)])
+
+# =====================================================
+# OUTCOME RATES BY PLAYER CLASS AND PHASE
+# =====================================================
+
+def player_classes(bat_all):
+    # final_task/2.py roles; thin samples bat as "Tail"
+    roles = final_task_bat_roles(bat_all.copy())["role"]
+    return roles.where(bat_all["balls"] >= TAIL_BALLS, "Tail")
+
+def transition_rates(df, classes):
+    # per (batter, phase) outcome rates: the batter's own counts shrunk to
+    # their class; the "Tail" class row serves unknown batters
+    k = EXTRA + 1
+    batters = pd.Index(sorted(df["batter"].unique()))
+    b = batters.get_indexer(df["batter"])
+    p = pd.Index(PHASES).get_indexer(df["phase"])
+
+    counts = np.bincount((b * len(PHASES) + p) * k + outcome_codes(df),
+                         minlength=len(batters) * len(PHASES) * k)
+    counts = counts.reshape(len(batters), len(PHASES), k).astype(float)
+
+    labels = classes.reindex(batters).fillna("Tail").to_numpy()
+    names = sorted(set(labels) | {"Tail"})
+    member = pd.Index(names).get_indexer(labels)
+    by_class = np.zeros((len(names), len(PHASES), k))
+    np.add.at(by_class, member, counts)
+    by_class /= by_class.sum(axis=2, keepdims=True)
+
+    rates = (counts + CLASS_PRIOR_BALLS * by_class[member]) / (counts.sum(axis=2, keepdims=True) + CLASS_PRIOR_BALLS)
+    return {"batters": batters, "rates": rates, "classes": names, "tail": by_class[names.index("Tail")]}
+
+# =====================================================
+# ABSORBING CHAIN OVER (BALL, STRIKER, NON-STRIKER)
+# =====================================================
+#
+# Transient states are a ball of the innings and the ordered pair of batting
+# positions at the crease; the pair fixes the wickets down. A ball moves
+# every pair to a pair on the next ball (runs off the bat, end of over) or
+# to the next batter in, and the tenth wicket or the last ball absorbs.
+# Carrying the score as a second axis, one pass of mass through the chain
+# gives the exact distribution of the total.
+
+PAIRS = [(s, n) for s in range(WICKETS + 1) for n in range(WICKETS + 1) if s != n]
+_INDEX = {pair: i for i, pair in enumerate(PAIRS)}
+STRIKER = np.array([s for s, _ in PAIRS])
+SWAP = np.array([_INDEX[(n, s)] for s, n in PAIRS])
+# striker out: the next batter comes in at the striker's end; -1 all out
+OUT = np.array([_INDEX.get((max(s, n) + 1, n), -1) for s, n in PAIRS])
+OUT_SWAP = np.array([_INDEX.get((n, max(s, n) + 1), -1) for s, n in PAIRS])
+START = _INDEX[(0, 1)]
+ON_STRIKE = np.eye(WICKETS + 1)[STRIKER]   # (pairs, positions)
+
+def order_rates(order, rates):
+    # (positions, phases, outcomes) for a batting order; short orders are
+    # padded with tail-enders
+    rows = rates["batters"].get_indexer(order)
+    out = np.broadcast_to(rates["tail"], (WICKETS + 1,) + rates["tail"].shape).copy()
+    for i, row in enumerate(rows[:WICKETS + 1]):
+        if row >= 0:
+            out[i] = rates["rates"][row]
+    return out
+
+def _ball(P, b):
+    # (..., pairs, outcomes) rates of the striker in each pair on ball b,
+    # the legal outcomes conditioned on the ball being legal
+    p = P[..., STRIKER, BALL_PHASE[b], :]
+    extra = p[..., EXTRA]
+    return extra, p[..., :EXTRA] / (1 - extra)[..., None]
+
+def _phase_terms(P):
+    # per phase: runs per ball, then the chance a legal ball keeps the pair,
+    # swaps ends, or takes a wicket, for every (order, pair)
+    terms = []
+    run_values = np.array(RUNS, dtype=float)
+    for ph in range(len(PHASES)):
+        extra, legal = _ball(P, np.flatnonzero(BALL_PHASE == ph)[0])
+        odd = legal[..., 1] + legal[..., 3]
+        bat = legal[..., :len(RUNS)] @ run_values
+        terms.append((bat, bat + extra / (1 - extra), legal[..., :len(RUNS)].sum(axis=-1) - odd, odd,
+                      legal[..., WICKET]))
+    return terms
+
+OUT_MATRIX = np.zeros((2, len(PAIRS), len(PAIRS)))
+OUT_MATRIX[0, OUT >= 0, OUT[OUT >= 0]] = 1
+OUT_MATRIX[1, OUT_SWAP >= 0, OUT_SWAP[OUT_SWAP >= 0]] = 1
+
+def expected_innings(P):
+    # P: (orders, positions, phases, outcomes). Expected total, chance of
+    # being bowled out, balls faced and runs per position for every order
+    # at once: only the pair distribution is carried, runs by linearity.
+    m = len(P)
+    mass = np.zeros((m, len(PAIRS)))
+    mass[:, START] = 1.0
+    total = np.zeros(m)
+    all_out = np.zeros(m)
+    balls = np.zeros((m, WICKETS + 1))
+    runs = np.zeros((m, WICKETS + 1))
+    terms = _phase_terms(P)
+
+    for b in range(BALLS):
+        bat, per_ball, even, odd, wicket = terms[BALL_PHASE[b]]
+        total += (mass * per_ball).sum(axis=1)
+        balls += mass @ ON_STRIKE
+        runs += (mass * bat) @ ON_STRIKE
+
+        over_end = b % 6 == 5
+        stay, swap = (odd, even) if over_end else (even, odd)
+        out = wicket * mass
+        nxt = stay * mass
+        nxt[:, SWAP] += swap * mass
+        next_in = out @ OUT_MATRIX[int(over_end)]
+        nxt += next_in
+        all_out += out.sum(axis=1) - next_in.sum(axis=1)
+        mass = nxt
+
+    return {"expected_total": total, "all_out": all_out, "balls": balls, "runs": runs}
+
+def _shift(mass, runs):
+    # move mass `runs` along the score axis; the top bin keeps the overflow
+    if not runs:
+        return mass
+    out = np.zeros_like(mass)
+    out[:, runs:] = mass[:, :-runs]
+    out[:, -1] += mass[:, -runs:].sum(axis=1)
+    return out
+
+def score_distribution(P):
+    # P: (positions, phases, outcomes). Exact distribution of the total,
+    # carrying the score as a second axis of the pair distribution
+    total = np.zeros(MAX_RUNS + 1)
+    mass = np.zeros((len(PAIRS), MAX_RUNS + 1))
+    mass[START, 0] = 1.0
+
+    for b in range(BALLS):
+        extra, legal = _ball(P, b)
+
+        # wides / no-balls before the legal ball: geometric in count
+        weights = (1 - extra)[:, None] * extra[:, None] ** np.arange(EXTRA_TERMS)
+        weights[:, -1] += extra ** EXTRA_TERMS
+        mass = sum(weights[:, k, None] * _shift(mass, k) for k in range(EXTRA_TERMS))
+
+        over_end = b % 6 == 5
+        nxt = np.zeros_like(mass)
+        for o, r in enumerate(RUNS):
+            dest = SWAP if (r % 2 == 1) != over_end else np.arange(len(PAIRS))
+            nxt[dest] += legal[:, o, None] * _shift(mass, r)
+
+        out = legal[:, WICKET, None] * mass
+        dest = OUT_SWAP if over_end else OUT
+        np.add.at(nxt, dest[dest >= 0], out[dest >= 0])
+        total += out[dest < 0].sum(axis=0)
+        mass = nxt
+
+    return total + mass.sum(axis=0)
+
+def distribution_summary(dist):
+    scores = np.arange(len(dist))
+    mean = dist @ scores
+    cdf = np.cumsum(dist)
+    return {
+        "mean": mean,
+        "sd": np.sqrt(dist @ (scores - mean)**2),
+        "p10": int(np.searchsorted(cdf, 0.10)),
+        "p90": int(np.searchsorted(cdf, 0.90)),
+    }
+
+def compare_orders(orders, rates):
+    # every order in one pass of the chain
+    P = np.stack([order_rates(order, rates) for order in orders.values()])
+    projected = expected_innings(P)
+    return pd.DataFrame(
+        {"expected_total": projected["expected_total"], "all_out": projected["all_out"]},
+        index=list(orders)
+    ).sort_values("expected_total", ascending=False)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: TRANSITION RATES")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    start = time.perf_counter()
+    rates = transition_rates(df, player_classes(bat_all))
+    print(f"Batters: {len(rates['batters'])}  classes: {rates['classes']}  "
+          f"time: {time.perf_counter() - start:.4f}s")
+
+    stage(f"STAGE 2: PROJECTED INNINGS OF THE {MARKOV_MODEL} XI")
+
+    results = run_all(bat_all, bowl_all)
+    order = batting_order(results[MARKOV_MODEL]["xi"], bat_all)
+    P = order_rates(order, rates)
+    start = time.perf_counter()
+    projected = expected_innings(P[None])
+    print(f"Expected innings: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    start = time.perf_counter()
+    dist = score_distribution(P)
+    print(f"Score distribution: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    print(f"Expected total: {projected['expected_total'][0]:.2f}  "
+          f"bowled out: {projected['all_out'][0]:.3f}")
+    print(pd.Series(distribution_summary(dist)).round(2).to_string())
+    print(pd.DataFrame({"balls": projected["balls"][0, :len(order)], "runs": projected["runs"][0, :len(order)]},
+                       index=order).round(2).to_string())
+
+    stage("STAGE 3: EVERY MODEL'S XI AGAINST THE SIMULATOR")
+
+    orders = {name: batting_order(result["xi"], bat_all) for name, result in results.items()}
+    start = time.perf_counter()
+    table = compare_orders(orders, rates)
+    print(f"XIs: {len(table)}  time: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    simulated = compare_xis(results, bat_all, outcome_tables(df), spin_share(df))
+    table["simulated"] = simulated["expected_total"]
+    print(table.round(3).to_string())
+
+    stage(f"STAGE 4: ADJACENT SWAPS IN THE {MARKOV_MODEL} ORDER")
+
+    swaps = {"as picked": order}
+    for i in range(len(order) - 1):
+        swapped = list(order)
+        swapped[i], swapped[i + 1] = swapped[i + 1], swapped[i]
+        swaps[f"{order[i]} <-> {order[i + 1]}"] = swapped
+    start = time.perf_counter()
+    table = compare_orders(swaps, rates)
+    print(f"Orders: {len(table)}  time: {(time.perf_counter() - start) * 1e3:.1f} ms")
+    print(table.round(3).to_string())
@@ -0,0 +1,107 @@
+import os
+import time
+import pandas as pd
+from multiprocessing import Pool
+
+from aggregates import stage, load_deliveries
+from registry import REGISTRY, model_pools, exact_select
+from run_all import load_features
+from opponents import player_teams
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+NATION_MODEL = "Advanced_Elite"
+
+# squads are 13-15 players in this data, so the volume floors go and
+# role slots may be filled out of role
+NATION_FILTERS = {
+    "bat": [("balls", ">=", 1)],
+    "bowl": [("balls", ">=", 6)],
+}
+OUT_OF_ROLE = 1.0   # sds of slot score given up to play out of role
+
+def nation_spec(spec):
+    return {
+        **spec,
+        "bat_filter": NATION_FILTERS["bat"],
+        "bowl_filter": NATION_FILTERS["bowl"],
+        "bowl_shortlist": None,
+        "out_of_role": OUT_OF_ROLE,
+    }
+
+# =====================================================
+# ONE SELECTION PER NATION
+# =====================================================
+
+_STATE = {}
+
+def _init_worker(spec, pools, options, teams):
+    _STATE.update(spec=spec, pools=pools, options=options, teams=teams)
+
+def _select_nation(team):
+    # scores were normalized once over the whole tournament; each nation
+    # selects from its own slice of the shared pools
+    s = _STATE
+    squad = s["teams"].index[s["teams"] == team]
+    pools = {name: frame[frame.index.isin(squad)] for name, frame in s["pools"].items()}
+    options = s["options"][s["options"].isin(squad)]
+    selected = exact_select(s["spec"], pools, options)
+    if selected is None:
+        return team, [], {}, float("nan")
+    return (team, *selected)
+
+def nation_xis(df, bat_all, bowl_all, model=NATION_MODEL, workers=None):
+    spec = nation_spec(REGISTRY[model])
+    pools, options = model_pools(spec, bat_all, bowl_all)
+    teams = player_teams(df)
+    nations = sorted(teams.unique())
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with Pool(min(workers, len(nations)), _init_worker, (spec, pools, options, teams)) as pool:
+            results = pool.map(_select_nation, nations)
+    else:
+        _init_worker(spec, pools, options, teams)
+        results = [_select_nation(team) for team in nations]
+
+    xis = {}
+    records = []
+    for team, xi, role_map, objective in results:
+        xis[team] = pd.Series([f"{p} ({role_map[p]})" for p in xi], index=range(1, len(xi) + 1))
+        records.append({
+            "team": team,
+            "squad": int((teams == team).sum()),
+            "xi_size": len(xi),
+            "objective": objective,
+            "bowling_options": int(pd.Index(xi).isin(options).sum()),
+        })
+
+    table = pd.DataFrame(xis).rename_axis("slot").fillna("")
+    return table, pd.DataFrame(records)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+
+    stage(f"STAGE 2: XI PER NATION ({NATION_MODEL})")
+
+    start = time.perf_counter()
+    xis, summary = nation_xis(df, bat_all, bowl_all)
+    print(f"Nations: {len(summary)}  workers: {os.cpu_count()}  "
+          f"time: {time.perf_counter() - start:.3f}s")
+    print(summary.round(3).to_string(index=False))
+
+    stage("STAGE 3: NATION XIs (* = out of role)")
+
+    with pd.option_context("display.width", 250, "display.max_columns", None,
+                           "display.max_colwidth", 32):
+        for start in range(0, xis.shape[1], 5):
+            print(xis.iloc[:, start:start + 5])
+            print()
+
+    xis.to_csv("nation_xis.csv")
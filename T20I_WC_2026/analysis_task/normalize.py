@@ -0,0 +1,279 @@
+import bisect
+import math
+import warnings
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# BATCHED NORMALIZATION
+# =====================================================
+#
+# Every method works column-wise on a player x metric matrix in one call.
+# NaN policy (same for every method and every model):
+#   - NaN cells are ignored when computing a column's statistics
+#   - NaN cells come out as `nan_fill` (0.0 by default)
+#   - a column with no spread (or fewer than two values) comes out as 0.0
+
+METHODS = ["z", "minmax", "robust", "percentile"]
+
+def _zscore(X):
+    n = np.sum(~np.isnan(X), axis=0)
+    mean = np.nanmean(X, axis=0)
+    # ddof=1 to match pandas Series.std() used by the scripts' z_score()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.nansum((X - mean)**2, axis=0) / (n - 1))
+    return X - mean, std
+
+def _minmax(X):
+    lo = np.nanmin(X, axis=0)
+    hi = np.nanmax(X, axis=0)
+    return X - lo, hi - lo
+
+def _robust(X):
+    q1, med, q3 = np.nanpercentile(X, [25, 50, 75], axis=0)
+    return X - med, q3 - q1
+
+def _percentile(X):
+    n, k = X.shape
+    order = np.argsort(X, axis=0, kind="stable")
+    S = np.take_along_axis(X, order, axis=0)
+
+    idx = np.broadcast_to(np.arange(n)[:, None], (n, k))
+    same_prev = np.zeros((n, k), dtype=bool)
+    same_prev[1:] = S[1:] == S[:-1]
+    same_next = np.zeros((n, k), dtype=bool)
+    same_next[:-1] = same_prev[1:]
+
+    # average rank of each tie block, as pandas rank(method="average")
+    start = np.maximum.accumulate(np.where(same_prev, 0, idx), axis=0)
+    end = np.minimum.accumulate(np.where(same_next, n, idx)[::-1], axis=0)[::-1]
+    avg = (start + end) / 2 + 1
+
+    ranks = np.empty((n, k))
+    np.put_along_axis(ranks, order, avg, axis=0)
+
+    count = np.sum(~np.isnan(X), axis=0)
+    return ranks, count.astype(float)
+
+_CENTERS = {
+    "z": _zscore,
+    "minmax": _minmax,
+    "robust": _robust,
+    "percentile": _percentile,
+}
+
+def normalize(X, method="z", nan_fill=0.0):
+    if method not in _CENTERS:
+        raise ValueError(f"Unknown normalization method: {method}")
+
+    frame = X if isinstance(X, pd.DataFrame) else None
+    A = np.asarray(X, dtype=float)
+    squeeze = A.ndim == 1
+    if squeeze:
+        A = A[:, None]
+
+    missing = np.isnan(A)
+    out = np.zeros_like(A)
+
+    if A.shape[0] and (~missing).any():
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            # all-NaN columns are expected; they fall through to nan_fill
+            warnings.simplefilter("ignore", RuntimeWarning)
+            num, den = _CENTERS[method](A)
+            valid = np.isfinite(den) & (den > 0)
+            if method == "percentile":
+                valid &= np.nanmax(A, axis=0) > np.nanmin(A, axis=0)
+            out[:, valid] = num[:, valid] / den[valid]
+
+    out[missing] = nan_fill
+
+    if squeeze:
+        out = out[:, 0]
+    if frame is not None:
+        return pd.DataFrame(out, index=frame.index, columns=frame.columns)
+    if isinstance(X, pd.Series):
+        return pd.Series(out, index=X.index, name=X.name)
+    return out
+
+# =====================================================
+# INCREMENTAL NORMALIZATION
+# =====================================================
+#
+# After a match only the players in it change, so the z / min-max
+# constants and the ranks are kept up to date from the changed rows:
+# per column a count with sums and sums of squares (shifted by the first
+# mean, to keep the variance exact), and the values in sorted order,
+# whose ends are the min and max and where a descending rank is one
+# bisect. Every player's normalized value still moves when the constants
+# do, but that is one affine map, and it never changes a rank.
+
+INCREMENTAL_METHODS = ["z", "minmax"]
+SORTED_BLOCK = 512   # items per block of a SortedBlocks (split at twice that)
+
+class SortedBlocks:
+    # a sorted list kept in blocks, so an insert or delete shifts one block
+    # rather than the whole list
+
+    def __init__(self, items, block=SORTED_BLOCK):
+        items = sorted(items)
+        self.block = block
+        self.blocks = [items[i:i + block] for i in range(0, len(items), block)]
+        self.maxes = [b[-1] for b in self.blocks]
+        self.n = len(items)
+
+    def __len__(self):
+        return self.n
+
+    def add(self, item):
+        if not self.blocks:
+            self.blocks, self.maxes = [[item]], [item]
+        else:
+            i = min(bisect.bisect_left(self.maxes, item), len(self.blocks) - 1)
+            b = self.blocks[i]
+            bisect.insort(b, item)
+            self.maxes[i] = b[-1]
+            if len(b) > 2 * self.block:
+                self.blocks[i:i + 1] = [b[:self.block], b[self.block:]]
+                self.maxes[i:i + 1] = [b[self.block - 1], b[-1]]
+        self.n += 1
+
+    def remove(self, item):
+        i = bisect.bisect_left(self.maxes, item)
+        b = self.blocks[i]
+        del b[bisect.bisect_left(b, item)]
+        if b:
+            self.maxes[i] = b[-1]
+        else:
+            del self.blocks[i], self.maxes[i]
+        self.n -= 1
+
+    def count_above(self, item):
+        # items strictly greater than `item`
+        i = bisect.bisect_right(self.maxes, item)
+        if i == len(self.blocks):
+            return 0
+        b = self.blocks[i]
+        return len(b) - bisect.bisect_right(b, item) + sum(map(len, self.blocks[i + 1:]))
+
+    def first(self):
+        return self.blocks[0][0]
+
+    def last(self):
+        return self.blocks[-1][-1]
+
+    def top(self, k):
+        # the k largest items, largest first
+        out = []
+        if k <= 0:
+            return out
+        for b in reversed(self.blocks):
+            out.extend(reversed(b[-(k - len(out)):]))
+            if len(out) == k:
+                break
+        return out
+
+class IncrementalNormalizer:
+
+    def __init__(self, frame, method="z", nan_fill=0.0):
+        if method not in INCREMENTAL_METHODS:
+            raise ValueError(f"Unknown incremental normalization method: {method}")
+        self.method = method
+        self.nan_fill = nan_fill
+        self.columns = list(frame.columns)
+        self.players = list(frame.index)
+        self.index = {p: r for r, p in enumerate(self.players)}
+        self.values = frame.to_numpy(dtype=float).copy()
+
+        present = ~np.isnan(self.values)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.shift = np.nan_to_num(np.nanmean(self.values, axis=0))
+        D = np.where(present, self.values - self.shift, 0.0)
+        # plain floats: per-cell updates on numpy scalars cost more than the sums
+        self.shift = self.shift.tolist()
+        self.count = present.sum(axis=0).astype(float).tolist()
+        self.s1 = D.sum(axis=0).tolist()
+        self.s2 = (D**2).sum(axis=0).tolist()
+        self.sorted = [
+            SortedBlocks((v, r) for r, v in enumerate(self.values[:, c].tolist()) if not math.isnan(v))
+            for c in range(len(self.columns))
+        ]
+
+    def _row(self, player):
+        r = self.index.get(player)
+        if r is None:
+            r = self.index[player] = len(self.players)
+            self.players.append(player)
+            if r == len(self.values):
+                grown = np.full((max(2 * len(self.values), 1), len(self.columns)), np.nan)
+                grown[:r] = self.values
+                self.values = grown
+            self.values[r] = np.nan
+        return r
+
+    def _set(self, r, c, new):
+        old = float(self.values[r, c])
+        if old == new or (math.isnan(old) and math.isnan(new)):
+            return
+        column = self.sorted[c]
+        if not math.isnan(old):
+            d = old - self.shift[c]
+            self.count[c] -= 1
+            self.s1[c] -= d
+            self.s2[c] -= d * d
+            column.remove((old, r))
+        if not math.isnan(new):
+            d = new - self.shift[c]
+            self.count[c] += 1
+            self.s1[c] += d
+            self.s2[c] += d * d
+            column.add((new, r))
+        self.values[r, c] = new
+
+    def update(self, changed):
+        # new metric values for the players in `changed` (new players are added)
+        for player, row in zip(changed.index, changed[self.columns].to_numpy(dtype=float).tolist()):
+            r = self._row(player)
+            for c, new in enumerate(row):
+                self._set(r, c, new)
+
+    def constants(self):
+        # (center, scale) per column, as _zscore / _minmax
+        if self.method == "z":
+            count, s1, s2 = np.array(self.count), np.array(self.s1), np.array(self.s2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = s1 / count
+                var = (s2 - s1 * mean) / (count - 1)
+            return np.array(self.shift) + mean, np.sqrt(np.clip(var, 0, None))
+        lo = np.array([s.first()[0] if len(s) else np.nan for s in self.sorted])
+        hi = np.array([s.last()[0] if len(s) else np.nan for s in self.sorted])
+        return lo, hi - lo
+
+    def transform(self, players=None):
+        # normalize() of the current values, for all or some players
+        rows = np.arange(len(self.players)) if players is None else np.array([self.index[p] for p in players])
+        X = self.values[rows]
+        center, scale = self.constants()
+        valid = np.isfinite(scale) & (scale > 0)
+        out = np.zeros_like(X)
+        with np.errstate(invalid="ignore"):
+            out[:, valid] = (X[:, valid] - center[valid]) / scale[valid]
+        out[np.isnan(X)] = self.nan_fill
+        index = self.players if players is None else list(players)
+        return pd.DataFrame(out, index=index, columns=self.columns)
+
+    def rank(self, column, players=None):
+        # descending rank, ties sharing the best (pandas method="min"); NaN
+        # for missing values
+        c = self.columns.index(column)
+        column = self.sorted[c]
+        players = self.players if players is None else list(players)
+        ranks = []
+        for p in players:
+            v = float(self.values[self.index[p], c])
+            ranks.append(math.nan if math.isnan(v) else column.count_above((v, math.inf)) + 1)
+        return pd.Series(ranks, index=players, dtype=float)
+
+    def top(self, column, k):
+        # the k highest players of a column, best first
+        return [self.players[r] for _, r in self.sorted[self.columns.index(column)].top(k)]
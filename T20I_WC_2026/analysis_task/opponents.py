@@ -0,0 +1,167 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, load_deliveries
+from normalize import normalize
+from registry import REGISTRY, SELECTOR, SPINNER_LIST
+from run_all import load_features
+from weight_sweep import RuleSelection
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+OPPONENT_MODEL = "Advanced_Elite"
+OPPONENT_SCORE = "composite"   # the score each side's matchup term adds to
+
+MATCHUP_WEIGHT = 0.25   # weight of the normalized matchup term
+PRIOR_BALLS = 30        # balls at the player's own overall rate mixed in
+
+# =====================================================
+# TEAM PROFILES BY PHASE
+# =====================================================
+
+def team_profiles(df):
+    legal = df[df["legal"]].assign(spin=lambda d: d["bowler"].isin(SPINNER_LIST))
+
+    bat = legal.groupby(["batting_team", "phase"]).agg(
+        runs=("total_runs","sum"),
+        balls=("legal","sum"),
+        boundaries=("is_boundary","sum"),
+        dots=("is_dot","sum")
+    ).unstack("phase", fill_value=0)
+
+    bowl = legal.groupby(["bowling_team", "phase"]).agg(
+        runs=("total_runs","sum"),
+        balls=("legal","sum"),
+        wickets=("is_wicket","sum"),
+        spin=("spin","sum")
+    ).unstack("phase", fill_value=0)
+
+    batting = pd.DataFrame(index=bat.index.rename("team"))
+    bowling = pd.DataFrame(index=bowl.index.rename("team"))
+    for p in PHASES:
+        batting[f"rr_{p}"] = bat["runs", p] / (bat["balls", p] / 6)
+        batting[f"boundary_pct_{p}"] = bat["boundaries", p] / bat["balls", p]
+        batting[f"dot_pct_{p}"] = bat["dots", p] / bat["balls", p]
+        bowling[f"econ_{p}"] = bowl["runs", p] / (bowl["balls", p] / 6)
+        bowling[f"wkt_rate_{p}"] = bowl["wickets", p] / (bowl["balls", p] / 6)
+    bowling["spin_share"] = bowl["spin"].sum(axis=1) / bowl["balls"].sum(axis=1)
+
+    return batting, bowling
+
+def similarity(profile):
+    # gaussian kernel over z-scored profiles, median squared distance as
+    # the bandwidth; 1 on the diagonal
+    Z = normalize(profile, "z").to_numpy()
+    d2 = ((Z[:, None, :] - Z[None, :, :])**2).sum(axis=2)
+    h2 = np.median(d2[d2 > 0]) if np.any(d2 > 0) else 1.0
+    return pd.DataFrame(np.exp(-d2 / h2), index=profile.index, columns=profile.index)
+
+# =====================================================
+# PLAYER x OPPONENT MATCHUPS
+# =====================================================
+
+def matchup_rates(df, player_col, team_col, runs_col, kernel):
+    # per ball rate against every opponent, pooled over teams with a
+    # similar profile and shrunk to the player's own overall rate;
+    # returned relative to that overall rate
+    legal = df[df["legal"]]
+    grouped = legal.groupby([player_col, team_col]).agg(
+        runs=(runs_col,"sum"),
+        balls=("legal","sum")
+    )
+    runs = grouped["runs"].unstack(fill_value=0).reindex(columns=kernel.index, fill_value=0)
+    balls = grouped["balls"].unstack(fill_value=0).reindex(columns=kernel.index, fill_value=0)
+
+    overall = (runs.sum(axis=1) / balls.sum(axis=1)).to_numpy()[:, None]
+    S = kernel.to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (runs.to_numpy() @ S + PRIOR_BALLS * overall) / (balls.to_numpy() @ S + PRIOR_BALLS)
+        relative = np.where(overall > 0, rate / overall, 1.0)
+    return pd.DataFrame(relative, index=runs.index, columns=kernel.columns)
+
+def player_teams(df):
+    seen = pd.concat([
+        df[["batter", "batting_team"]].set_axis(["player", "team"], axis=1),
+        df[["bowler", "bowling_team"]].set_axis(["player", "team"], axis=1),
+    ])
+    return seen.groupby("player")["team"].agg(lambda t: t.value_counts().index[0])
+
+def opponent_scores(frame, matchup, opponents, norm, sign, score=OPPONENT_SCORE):
+    # base score plus the matchup term: (players, opponents); sign=-1
+    # when a lower rate is better (bowlers)
+    rel = matchup.reindex(index=frame.index, columns=opponents).fillna(1.0)
+    N = normalize(sign * rel, norm).to_numpy()
+    return frame[score].to_numpy(dtype=float)[:, None] + MATCHUP_WEIGHT * N
+
+def opponent_xis(df, bat_all, bowl_all, model=OPPONENT_MODEL):
+    spec = REGISTRY[model]
+    selection = RuleSelection(spec, bat_all, bowl_all)
+
+    batting, bowling = team_profiles(df)
+    opponents = batting.index.intersection(bowling.index)
+
+    # batters against attacks like the opponent's, bowlers against
+    # batting line-ups like the opponent's
+    bat_matchup = matchup_rates(df, "batter", "bowling_team", "batter_runs", similarity(bowling.loc[opponents]))
+    bowl_matchup = matchup_rates(df, "bowler", "batting_team", "total_runs", similarity(batting.loc[opponents]))
+
+    columns = {
+        ("bat", OPPONENT_SCORE): opponent_scores(
+            selection.frames["bat"], bat_matchup, opponents, spec["norm"], 1
+        ),
+        ("bowl", OPPONENT_SCORE): opponent_scores(
+            selection.frames["bowl"], bowl_matchup, opponents, spec["norm"], -1
+        ),
+    }
+
+    # nobody is picked against their own team
+    teams = player_teams(df).reindex(selection.players).to_numpy()
+    exclude = teams[:, None] == opponents.to_numpy()[None, :]
+
+    if SELECTOR == "exact":
+        rule = selection.exact_columns(columns, len(opponents), exclude)
+    else:
+        rule = selection.assign_columns(columns, len(opponents), exclude)
+    xis = selection.lineups(rule, columns, opponents)
+    return {"batting": batting, "bowling": bowling, "bat_matchup": bat_matchup,
+            "bowl_matchup": bowl_matchup, "xis": xis}
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+
+    stage("STAGE 2: OPPONENT XIs")
+
+    start = time.perf_counter()
+    result = opponent_xis(df, bat_all, bowl_all)
+    print(f"Opponents: {result['xis'].shape[1]}  time: {time.perf_counter() - start:.3f}s")
+
+    stage("STAGE 3: TEAM PROFILES")
+
+    with pd.option_context("display.width", 250, "display.max_columns", None):
+        print(result["batting"].round(2))
+        print(result["bowling"].round(2))
+
+    stage("STAGE 4: XI PER OPPONENT")
+
+    xis = result["xis"]
+    with pd.option_context("display.width", 250, "display.max_columns", None,
+                           "display.max_colwidth", 32):
+        for start in range(0, xis.shape[1], 5):
+            print(xis.iloc[:, start:start + 5])
+            print()
+
+    stage("STAGE 5: MOST OPPONENT-DEPENDENT PICKS")
+
+    counts = pd.Series(
+        [cell.rsplit(" (", 1)[0] for cell in xis.to_numpy().ravel() if cell]
+    ).value_counts()
+    print((counts / xis.shape[1]).rename("share_of_opponents").round(2).to_string())
+
+    xis.to_csv("opponent_xis.csv")
@@ -0,0 +1,533 @@
+import os
+import heapq
+import itertools
+import numpy as np
+from multiprocessing import Pool
+
+# =====================================================
+# EXACT ROLE-SLOT ASSIGNMENT (BRANCH AND BOUND)
+# =====================================================
+#
+# maximise   sum of values[role, player] over assigned (role, player)
+# subject to counts[role] players per role, each player at most once,
+#            minimum[a] <= #selected players with attrs[:, a] <= maximum[a]
+#
+# With total < sum(counts) the counts become upper limits and exactly
+# `total` players are picked.
+#
+# values uses -inf for players a role cannot take.
+
+EPS = 1e-9
+LAGRANGE_ITERS = 60
+TOP_K = 50
+
+def reduce_candidates(values, counts, attrs, k=1):
+    # Two players with the same attribute pattern are interchangeable for
+    # the constraints, so a player who is not among the top `slots` of
+    # their pattern for a role can always be swapped for an unused better
+    # one there. This keeps the search size independent of the pool.
+    # For the k best lineups, k - 1 more per pattern are needed.
+    slots = int(counts.sum()) + k - 1
+    _, pattern = np.unique(attrs, axis=0, return_inverse=True)
+    pattern = pattern.ravel()
+
+    keep = np.zeros(values.shape[1], dtype=bool)
+    for r in range(len(counts)):
+        eligible = np.isfinite(values[r])
+        for c in np.unique(pattern[eligible]):
+            members = np.flatnonzero(eligible & (pattern == c))
+            top = members[np.argsort(-values[r, members], kind="stable")[:slots]]
+            keep[top] = True
+    return np.flatnonzero(keep)
+
+def _relaxation(values, counts, attrs, minimum, maximum, lam, mu):
+    # best assignment of the slots on values + (lam - mu).attrs, the
+    # attribute limits priced out
+    adjusted = values + attrs @ (lam - mu)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    total, cols = assign(adjusted[rows])
+    if not np.isfinite(total):
+        return np.inf, np.zeros(attrs.shape[1])
+    return total - lam @ minimum + mu @ maximum, attrs[cols].sum(axis=0)
+
+def lagrange_multipliers(values, counts, attrs, minimum, maximum, scale=1.0, iters=LAGRANGE_ITERS):
+    # Price the attribute limits into the values (projected subgradient
+    # on the assignment relaxation); the prices tighten every node bound.
+    A = attrs.shape[1]
+    lam = np.zeros(A)
+    mu = np.zeros(A)
+    if not A:
+        return lam, mu
+
+    best, used = _relaxation(values, counts, attrs, minimum, maximum, lam, mu)
+    best_lam, best_mu = lam, mu
+    for k in range(iters):
+        if not np.isfinite(best):
+            break
+        if np.all(used >= minimum) and np.all(used <= maximum) \
+                and lam @ (used - minimum) == 0 and mu @ (maximum - used) == 0:
+            # the relaxed assignment meets the limits: prices are optimal
+            break
+        step = scale / (k + 1)
+        lam = np.maximum(0, lam - step * (used - minimum))
+        mu = np.maximum(0, mu - step * (maximum - used))
+        bound, used = _relaxation(values, counts, attrs, minimum, maximum, lam, mu)
+        if bound < best:
+            best, best_lam, best_mu = bound, lam, mu
+    return best_lam, best_mu
+
+class RoleSearch:
+    # Depth-first over roles, filling each role's slots in list order.
+    # Lists are sorted by the priced values v + (lam - mu).attrs, so
+    #   value so far + best priced values still available
+    #   - lam.(minimum - have)+ + mu.(maximum - have)
+    # bounds every completion and only falls further down a list.
+    # The inner loop works on plain lists; numpy calls dominate otherwise.
+
+    def __init__(self, values, counts, attrs, minimum, maximum, lam, mu):
+        attrs = np.asarray(attrs, dtype=int)
+        self.counts = [int(c) for c in counts]
+        self.attrs = [tuple(row) for row in attrs.tolist()]
+        self.A = attrs.shape[1]
+        self.minimum = [int(x) for x in minimum]
+        self.maximum = [int(x) for x in maximum]
+        self.lam = [float(x) for x in lam]
+        self.mu = [float(x) for x in mu]
+
+        adjusted = values + attrs @ (np.asarray(lam) - np.asarray(mu))
+
+        # per role: candidates in priced order, their real values, priced
+        # prefix sums and suffix attribute counts for reachability
+        self.lists = []
+        self.vals = []
+        self.prefix = []
+        self.attr_suffix = []
+        for r in range(len(self.counts)):
+            eligible = np.flatnonzero(np.isfinite(values[r]))
+            order = eligible[np.argsort(-adjusted[r, eligible], kind="stable")]
+            suffix = np.zeros((len(order) + 1, self.A), dtype=int)
+            if len(order):
+                suffix[:-1] = np.cumsum(attrs[order][::-1], axis=0)[::-1]
+            self.lists.append(order.tolist())
+            self.vals.append(values[r, order].tolist())
+            self.prefix.append(np.concatenate([[0.0], np.cumsum(adjusted[r, order])]).tolist())
+            self.attr_suffix.append([tuple(row) for row in suffix.tolist()])
+
+        R = len(self.counts)
+        self.rest_attr = [(0,) * self.A] * (R + 1)
+        for r in range(R - 1, -1, -1):
+            c = self.counts[r]
+            self.rest_attr[r] = tuple(
+                x + min(c, y) for x, y in zip(self.rest_attr[r + 1], self.attr_suffix[r][0])
+            )
+
+        # priced values by role and player, and each player's place in
+        # every role's list, for the assignment bound
+        self.adjusted = np.where(np.isfinite(values), adjusted, -np.inf)
+        self.position = np.full(self.adjusted.shape, len(attrs))
+        for r, order in enumerate(self.lists):
+            self.position[r, order] = np.arange(len(order))
+
+        self.best = -np.inf
+        self.best_assignment = None
+        self.nodes = 0
+
+    def rest_bound(self, r, used):
+        # best priced values of roles r.. skipping players already picked
+        total = 0.0
+        for q in range(r, len(self.counts)):
+            c = self.counts[q]
+            if not c:
+                continue
+            prefix = self.prefix[q]
+            if len(self.lists[q]) >= c and not used.intersection(self.lists[q][:c]):
+                total += prefix[c]
+                continue
+            taken = 0
+            for i, p in enumerate(self.lists[q]):
+                if p not in used:
+                    total += prefix[i + 1] - prefix[i]
+                    taken += 1
+                    if taken == c:
+                        break
+            if taken < c:
+                # role q can no longer be filled
+                return -np.inf
+        return total
+
+    def assignment_bound(self, r, need, start, used):
+        # the same priced bound, but with every remaining slot given a
+        # different player: stronger when players fit many roles
+        rows = [r] * need + [q for q in range(r + 1, len(self.counts)) for _ in range(self.counts[q])]
+        if not rows:
+            return 0.0
+        free = np.ones(self.adjusted.shape[1], dtype=bool)
+        free[list(used)] = False
+        W = self.adjusted[rows][:, free]
+        W[:need] = np.where(self.position[r, free] >= start, W[:need], -np.inf)
+        return max_assignment(W)
+
+    def penalty(self, have):
+        return sum(
+            l * max(0, m - h) - u * (x - h)
+            for l, u, m, x, h in zip(self.lam, self.mu, self.minimum, self.maximum, have)
+        )
+
+    def reachable(self, r, need, i, have):
+        suffix = self.attr_suffix[r][i]
+        rest = self.rest_attr[r + 1]
+        return all(
+            have[a] + min(need, suffix[a]) + rest[a] >= self.minimum[a]
+            for a in range(self.A)
+        )
+
+    def meets_minimum(self, have):
+        return all(h >= m for h, m in zip(have, self.minimum))
+
+    def fits(self, have, p):
+        new = tuple(h + x for h, x in zip(have, self.attrs[p]))
+        return new, all(n <= m for n, m in zip(new, self.maximum))
+
+    def root_bound(self):
+        return self.rest_bound(0, set()) - self.penalty((0,) * self.A)
+
+    def search(self, r, k, start, total, have, used, chosen):
+        self.nodes += 1
+        if r == len(self.counts):
+            if self.meets_minimum(have) and total > self.best + EPS:
+                self.best = total
+                self.best_assignment = list(chosen)
+            return
+        if k == self.counts[r]:
+            self.search(r + 1, 0, 0, total, have, used, chosen)
+            return
+
+        need = self.counts[r] - k
+        order = self.lists[r]
+        vals = self.vals[r]
+        prefix = self.prefix[r]
+        base = total + self.rest_bound(r + 1, used) - self.penalty(have)
+        if base + prefix[min(start + need, len(order))] - prefix[start] > self.best + EPS:
+            if total + self.assignment_bound(r, need, start, used) - self.penalty(have) <= self.best + EPS:
+                return
+        for i in range(start, len(order) - need + 1):
+            # both tests only get worse further down the list
+            if base + prefix[i + need] - prefix[i] <= self.best + EPS:
+                break
+            if not self.reachable(r, need, i, have):
+                break
+            p = order[i]
+            if p in used:
+                continue
+            new_have, ok = self.fits(have, p)
+            if not ok:
+                continue
+            used.add(p)
+            chosen.append((r, p))
+            self.search(r, k + 1, i + 1, total + vals[i], new_have, used, chosen)
+            chosen.pop()
+            used.discard(p)
+
+    def role_bound(self, r, need, start, used):
+        # best priced values left in role r's list from `start`
+        total = 0.0
+        prefix = self.prefix[r]
+        for i in range(start, len(self.lists[r])):
+            if not need:
+                break
+            if self.lists[r][i] not in used:
+                total += prefix[i + 1] - prefix[i]
+                need -= 1
+        return -np.inf if need else total
+
+    def best_first(self, k, root):
+        # Include / skip branching on each role's list, expanded highest
+        # bound first. A complete lineup is keyed by its exact value, so
+        # lineups come off the heap best first; the k-th best value seen
+        # so far bounds what is worth pushing.
+        R = len(self.counts)
+        heap = []
+        tie = itertools.count()
+        seen = set()
+        kth = []
+        found = []
+        emitted = set()
+
+        def push(r, j, i, total, have, used, chosen):
+            while r < R and j == self.counts[r]:
+                r, j, i = r + 1, 0, 0
+            if r == R:
+                if not self.meets_minimum(have):
+                    return
+                if len(kth) == k and total <= kth[0] + EPS:
+                    return
+                if used not in seen:
+                    # first value seen per player set: a lower bound on it
+                    seen.add(used)
+                    if len(kth) < k:
+                        heapq.heappush(kth, total)
+                    else:
+                        heapq.heappushpop(kth, total)
+                heapq.heappush(heap, (-total, next(tie), None, chosen))
+                return
+            if not self.reachable(r, self.counts[r] - j, i, have):
+                return
+            bound = (total + self.role_bound(r, self.counts[r] - j, i, used)
+                     + self.rest_bound(r + 1, used) - self.penalty(have))
+            if len(kth) == k and bound <= kth[0] + EPS:
+                return
+            heapq.heappush(heap, (-bound, next(tie), (r, j, i, total, have, used), chosen))
+
+        push(*root)
+        while heap and len(found) < k:
+            key, _, node, chosen = heapq.heappop(heap)
+            if node is None:
+                players = frozenset(p for _, p in chosen)
+                if players not in emitted:
+                    emitted.add(players)
+                    found.append((-key, list(chosen)))
+                continue
+
+            r, j, i, total, have, used = node
+            if i >= len(self.lists[r]):
+                continue
+            push(r, j, i + 1, total, have, used, chosen)
+            p = self.lists[r][i]
+            if p in used:
+                continue
+            new_have, ok = self.fits(have, p)
+            if ok:
+                push(r, j + 1, i + 1, total + self.vals[r][i], new_have, used | {p}, chosen + ((r, p),))
+        return found
+
+    def partitions(self):
+        # disjoint roots: which player is highest in role 0's list among
+        # its picks
+        root = (0, 0, 0, 0.0, (0,) * self.A, frozenset(), ())
+        if not self.counts or not self.counts[0]:
+            return [root]
+        roots = []
+        for i, p in enumerate(self.lists[0]):
+            have, ok = self.fits(root[4], p)
+            if ok:
+                roots.append((0, 1, i + 1, self.vals[0][i], have, frozenset([p]), ((0, p),)))
+        return roots
+
+    def greedy(self):
+        # pick() order over the priced lists, skipping any player that would
+        # leave the attribute limits unreachable: a first incumbent
+        used = set()
+        chosen = []
+        total = 0.0
+        have = (0,) * self.A
+        for r, c in enumerate(self.counts):
+            for k in range(c):
+                for i, p in enumerate(self.lists[r]):
+                    if p in used:
+                        continue
+                    new_have, ok = self.fits(have, p)
+                    if ok and self.reachable(r, c - k - 1, i + 1, new_have):
+                        break
+                else:
+                    return None
+                used.add(p)
+                chosen.append((r, p))
+                total += self.vals[r][i]
+                have = new_have
+        if not self.meets_minimum(have):
+            return None
+        return total, chosen
+
+def max_assignment(W):
+    return assign(W)[0]
+
+def assign(W):
+    # Largest sum picking one column per row, each column at most once
+    # (Hungarian method, shortest augmenting paths). Returns the sum and
+    # each row's column; -inf if impossible.
+    k, n = W.shape
+    if k > n:
+        return -np.inf, None
+    if not k:
+        return 0.0, np.zeros(0, dtype=int)
+    finite = np.isfinite(W)
+    if not finite.any(axis=1).all():
+        return -np.inf, None
+    big = 1.0 + 2 * np.abs(W[finite]).sum()
+    cost = np.where(finite, -W, big)
+
+    u = np.zeros(k + 1)
+    v = np.zeros(n + 1)
+    match = np.zeros(n + 1, dtype=int)     # row (1-based) holding column j
+    way = np.zeros(n + 1, dtype=int)
+    for i in range(1, k + 1):
+        match[0] = i
+        j0 = 0
+        minv = np.full(n + 1, np.inf)
+        done = np.zeros(n + 1, dtype=bool)
+        while True:
+            done[j0] = True
+            i0 = match[j0]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            open_ = ~done[1:]
+            better = open_ & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            j1 = np.flatnonzero(open_)[np.argmin(minv[1:][open_])] + 1
+            delta = minv[j1]
+            u[match[done]] += delta
+            v[done] -= delta
+            minv[~done] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(match[1:]) + 1
+    total = cost[match[cols] - 1, cols - 1].sum()
+    if total >= big / 2:
+        return -np.inf, None
+    row_col = np.empty(k, dtype=int)
+    row_col[match[cols] - 1] = cols - 1
+    return -total, row_col
+
+def max_matching(values, counts):
+    # most role slots that distinct players can fill (augmenting paths,
+    # each role repeated counts[r] times)
+    eligible = [np.flatnonzero(np.isfinite(row)).tolist() for row in values]
+    owner = {}
+
+    def augment(r, seen):
+        for p in eligible[r]:
+            if p in seen:
+                continue
+            seen.add(p)
+            if p not in owner or augment(owner[p], seen):
+                owner[p] = r
+                return True
+        return False
+
+    return sum(augment(r, set()) for r, c in enumerate(counts) for _ in range(c))
+
+def count_vectors(counts, empty):
+    # every way of leaving `empty` slots unfilled across the roles
+    if not empty:
+        yield tuple(counts)
+        return
+    if not len(counts):
+        return
+    for s in range(min(counts[0], empty), -1, -1):
+        for rest in count_vectors(counts[1:], empty - s):
+            yield (counts[0] - s,) + rest
+
+def _problem(values, counts, attrs, minimum, maximum, total, k=1):
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts, dtype=int)
+    n_players = values.shape[1]
+    if attrs is None:
+        attrs = np.zeros((n_players, 0), dtype=bool)
+    attrs = np.asarray(attrs, dtype=bool).reshape(n_players, -1)
+    A = attrs.shape[1]
+    minimum = np.zeros(A, dtype=int) if minimum is None else np.asarray(minimum, dtype=int)
+    maximum = np.full(A, counts.sum()) if maximum is None else np.asarray(maximum, dtype=int)
+
+    if np.any(attrs.sum(axis=0) < minimum):
+        return None
+
+    keep = reduce_candidates(values, counts, attrs, k)
+    empty = 0 if total is None else max(int(counts.sum()) - total, 0)
+    if max_matching(values[:, keep], counts) < counts.sum() - empty:
+        return None
+
+    # scarcest roles first, so clashes over the same players show early
+    roles = np.argsort([np.isfinite(values[r, keep]).sum() for r in range(len(counts))], kind="stable")
+    counts = counts[roles]
+    sub_values = values[roles][:, keep]
+    sub_attrs = attrs[keep].astype(float)
+
+    finite = sub_values[np.isfinite(sub_values)]
+    scale = finite.std() if len(finite) > 1 else 1.0
+
+    lam, mu = lagrange_multipliers(sub_values, counts, sub_attrs, minimum, maximum, scale)
+
+    # with surplus slots, one exact-count search per way of leaving them
+    # empty, most promising first
+    searches = [
+        RoleSearch(sub_values, c, sub_attrs, minimum, maximum, lam, mu)
+        for c in count_vectors(list(counts), empty)
+    ]
+    searches.sort(key=lambda s: -s.root_bound())
+    return keep, roles, searches
+
+def solve(values, counts, attrs=None, minimum=None, maximum=None, total=None):
+    # Returns (objective, [(role, player), ...]) or None if infeasible.
+    problem = _problem(values, counts, attrs, minimum, maximum, total)
+    if problem is None:
+        return None
+    keep, roles, searches = problem
+
+    best, best_assignment = -np.inf, None
+    for search in searches:
+        first = search.greedy()
+        if first is not None and first[0] > best + EPS:
+            best, best_assignment = first
+
+    # the searches share the incumbent
+    for search in searches:
+        if search.root_bound() <= best + EPS:
+            break
+        search.best, search.best_assignment = best, best_assignment
+        search.search(0, 0, 0, 0.0, (0,) * search.A, set(), [])
+        best, best_assignment = search.best, search.best_assignment
+
+    if best_assignment is None:
+        return None
+    return best, [(int(roles[r]), int(keep[p])) for r, p in best_assignment]
+
+# =====================================================
+# K BEST LINEUPS
+# =====================================================
+
+_STATE = {}
+
+def _init_worker(searches, k):
+    _STATE.update(searches=searches, k=k)
+
+def _best_first_part(job):
+    s, root = job
+    return _STATE["searches"][s].best_first(_STATE["k"], root)
+
+def top_k(values, counts, attrs=None, minimum=None, maximum=None, total=None, k=TOP_K, workers=None):
+    # The k best lineups with distinct player sets, best first, as
+    # [(objective, [(role, player), ...])]. Each search space is split by
+    # role 0's first pick; every part keeps its own k best, which always
+    # contain the overall k best, and the parts run in a process pool.
+    problem = _problem(values, counts, attrs, minimum, maximum, total, k)
+    if problem is None:
+        return []
+    keep, roles, searches = problem
+
+    jobs = [(s, root) for s, search in enumerate(searches) for root in search.partitions()]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs)), _init_worker, (searches, k)) as pool:
+            parts = pool.map(_best_first_part, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+    else:
+        _init_worker(searches, k)
+        parts = [_best_first_part(job) for job in jobs]
+
+    lineups = sorted((lineup for part in parts for lineup in part), key=lambda x: -x[0])
+    found = []
+    emitted = set()
+    for objective, assignment in lineups:
+        players = frozenset(p for _, p in assignment)
+        if players in emitted:
+            continue
+        emitted.add(players)
+        found.append((objective, [(int(roles[r]), int(keep[p])) for r, p in assignment]))
+        if len(found) == k:
+            break
+    return found
@@ -0,0 +1,238 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import stage, load_deliveries
+from registry import REGISTRY, MODELS, run_model, substitute_scores, uses_columns
+from run_all import load_features, run_all
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+FACTORS = ["batter", "bowler", "venue", "phase"]
+
+# ridge penalty per factor, in balls of pseudo-data at the league mean;
+# ~60 balls matches the SR prior strength estimated in shrinkage.py
+RIDGE_LAMBDA = {
+    "batter": 60.0,
+    "bowler": 60.0,
+    "venue": 300.0,
+    "phase": 1.0,
+}
+
+# the raw rates and the adjusted ratings that replace them
+ADJUSTED_SUBSTITUTES = {
+    "SR": "adj_SR",
+    "dismissal_rate": "adj_dismissal_rate",
+    "economy": "adj_economy",
+    "inv_economy": "adj_inv_economy",
+    "wkt_rate": "adj_wkt_rate",
+}
+
+CG_TOL = 1e-8
+CG_MAX_ITER = 500
+
+# =====================================================
+# SPARSE DESIGN (one-hot blocks as index arrays)
+# =====================================================
+
+class Design:
+    # Deliveries collapsed to unique (batter, bowler, venue, phase) cells.
+    # Each factor is one one-hot block, stored only as its level index per
+    # cell, so X @ b and X.T @ r are gathers and bincounts.
+
+    def __init__(self, df, factors=FACTORS):
+        self.factors = list(factors)
+
+        codes = []
+        self.levels = {}
+        for f in self.factors:
+            idx, levels = pd.factorize(df[f], sort=True)
+            self.levels[f] = np.asarray(levels)
+            codes.append(idx.astype(np.int64))
+
+        # pack the level codes into one int64 key per delivery
+        key = np.zeros(len(df), dtype=np.int64)
+        for f, idx in zip(self.factors, codes):
+            key = key * len(self.levels[f]) + idx
+        cell_keys, inverse = np.unique(key, return_inverse=True)
+
+        self.index = []
+        for f in reversed(self.factors):
+            size = len(self.levels[f])
+            self.index.insert(0, cell_keys % size)
+            cell_keys = cell_keys // size
+
+        self.weights = np.bincount(inverse, minlength=len(self.index[0])).astype(float)
+        self._inverse = inverse
+
+        self.sizes = [len(self.levels[f]) for f in self.factors]
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+
+    def cell_sums(self, y):
+        return np.bincount(self._inverse, weights=np.asarray(y, dtype=float),
+                           minlength=len(self.weights))
+
+    def dot(self, beta):
+        out = np.zeros(len(self.weights))
+        for j, idx in enumerate(self.index):
+            out += beta[self.offsets[j] + idx]
+        return out
+
+    def tdot(self, r):
+        return np.concatenate([
+            np.bincount(idx, weights=r, minlength=size)
+            for idx, size in zip(self.index, self.sizes)
+        ])
+
+    def penalty(self, lam):
+        return np.concatenate([
+            np.full(size, lam[f]) for f, size in zip(self.factors, self.sizes)
+        ])
+
+# =====================================================
+# RIDGE FIT (JACOBI-PRECONDITIONED CONJUGATE GRADIENT)
+# =====================================================
+
+def ridge_fit(design, y, lam=RIDGE_LAMBDA, tol=CG_TOL, max_iter=CG_MAX_ITER):
+    # minimise sum_d (y_d - mu - x_d.b)^2 + sum_j lam_j b_j^2
+    w = design.weights
+    ysum = design.cell_sums(y)
+    mu = ysum.sum() / w.sum()
+
+    penalty = design.penalty(lam)
+
+    def normal_matvec(beta):
+        return design.tdot(w * design.dot(beta)) + penalty * beta
+
+    rhs = design.tdot(ysum - w * mu)
+    precond = 1 / (design.tdot(w) + penalty)
+
+    beta = np.zeros(len(rhs))
+    r = rhs.copy()
+    z = precond * r
+    p = z.copy()
+    rz = r @ z
+    rhs_norm = np.linalg.norm(rhs) or 1.0
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        Ap = normal_matvec(p)
+        alpha = rz / (p @ Ap)
+        beta += alpha * p
+        r -= alpha * Ap
+        if np.linalg.norm(r) / rhs_norm < tol:
+            break
+        z = precond * r
+        rz_new = r @ z
+        p = z + (rz_new / rz) * p
+        rz = rz_new
+
+    effects = {
+        f: pd.Series(beta[design.offsets[j]:design.offsets[j + 1]],
+                     index=design.levels[f])
+        for j, f in enumerate(design.factors)
+    }
+    return mu, effects, iterations
+
+# =====================================================
+# OPPOSITION-ADJUSTED RATINGS
+# =====================================================
+
+def opposition_adjusted(df, lam=RIDGE_LAMBDA):
+    legal = df[df["legal"]]
+    design = Design(legal)
+
+    # batters are rated on their own runs (SR excludes byes and leg-byes),
+    # bowlers on every run conceded (economy includes them)
+    mu_bat, bat_runs, it_bat = ridge_fit(design, legal["batter_runs"], lam)
+    mu_runs, runs, it_runs = ridge_fit(design, legal["total_runs"], lam)
+    mu_wkts, wkts, it_wkts = ridge_fit(design, legal["is_wicket"], lam)
+
+    balls_faced = legal.groupby("batter").size()
+    balls_bowled = legal.groupby("bowler").size()
+
+    bat = pd.DataFrame({
+        "adj_balls": balls_faced,
+        "adj_runs_per_ball": bat_runs["batter"],
+        "adj_SR": 100 * (mu_bat + bat_runs["batter"]),
+        "adj_dismissal_rate": mu_wkts + wkts["batter"],
+    })
+
+    # bowler effects are runs / wickets *allowed*, so lower runs is better
+    bowl = pd.DataFrame({
+        "adj_balls": balls_bowled,
+        "adj_runs_saved_per_over": -6 * runs["bowler"],
+        "adj_economy": 6 * (mu_runs + runs["bowler"]),
+        "adj_wkt_rate": 6 * (mu_wkts + wkts["bowler"]),
+    })
+
+    context = {
+        "venue_runs_per_over": 6 * runs["venue"],
+        "phase_runs_per_over": 6 * runs["phase"],
+        "iterations": (it_bat, it_runs, it_wkts),
+        "cells": len(design.weights),
+    }
+    return bat, bowl, context
+
+def add_adjusted_ratings(bat_all, bowl_all, ratings):
+    # join the ratings onto the feature frames as extra model inputs
+    bat_ratings, bowl_ratings, _ = ratings
+    cols_bat = ["adj_runs_per_ball", "adj_SR", "adj_dismissal_rate"]
+    cols_bowl = ["adj_runs_saved_per_over", "adj_economy", "adj_wkt_rate"]
+    bat_all = bat_all.join(bat_ratings[cols_bat])
+    bowl_all = bowl_all.join(bowl_ratings[cols_bowl])
+    bowl_all["adj_inv_economy"] = 1 / bowl_all["adj_economy"]
+    return bat_all, bowl_all
+
+def adjusted_spec(spec):
+    # the spec with the opposition-adjusted ratings in place of the raw rates
+    return substitute_scores(spec, ADJUSTED_SUBSTITUTES)
+
+ADJUSTED_MODELS = {
+    name: (lambda bat_all, bowl_all, spec=spec: run_model(adjusted_spec(spec), bat_all, bowl_all))
+    for name, spec in REGISTRY.items()
+    if uses_columns(spec, ADJUSTED_SUBSTITUTES)
+}
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    print("Legal deliveries:", int(df["legal"].sum()))
+
+    stage("STAGE 2: RIDGE FIT")
+
+    start = time.perf_counter()
+    bat, bowl, context = opposition_adjusted(df)
+    print(f"Cells: {context['cells']}  CG iterations: {context['iterations']}  "
+          f"time: {time.perf_counter() - start:.3f}s")
+
+    print("\nPhase effects (runs / over):")
+    print(context["phase_runs_per_over"].round(2))
+    print("\nMost run-friendly venues (runs / over):")
+    print(context["venue_runs_per_over"].sort_values(ascending=False).head().round(2))
+
+    stage("STAGE 3: ADJUSTED BATTING")
+
+    raw_sr = df[df["legal"]].groupby("batter").agg(
+        runs=("batter_runs","sum"), balls=("legal","sum")
+    )
+    bat["raw_SR"] = raw_sr["runs"] / raw_sr["balls"] * 100
+    print(bat[bat["adj_balls"] >= 80].sort_values("adj_SR", ascending=False).head(15))
+
+    stage("STAGE 4: ADJUSTED BOWLING")
+
+    print(bowl[bowl["adj_balls"] >= 60].sort_values("adj_runs_saved_per_over", ascending=False).head(15))
+
+    stage("STAGE 5: MODELS WITH THE ADJUSTED RATINGS IN PLACE OF THE RAW RATES")
+
+    bat_all, bowl_all = add_adjusted_ratings(*load_features(df), (bat, bowl, context))
+    base = run_all(bat_all, bowl_all, {name: MODELS[name] for name in ADJUSTED_MODELS})
+    adjusted = run_all(bat_all, bowl_all, ADJUSTED_MODELS)
+    for name, result in adjusted.items():
+        xi = base[name]["xi"]
+        print(f"  {name:<15} out: {', '.join(p for p in xi if p not in result['xi']) or '-'}")
+        print(f"  {'':<15} in:  {', '.join(p for p in result['xi'] if p not in xi) or '-'}")
@@ -0,0 +1,673 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES
+from normalize import normalize
+from optimizer import TOP_K, solve, top_k
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+XI_SIZE = 11
+
+SELECTOR = "exact"      # "exact" (optimizer.solve) or "greedy" (pick() order)
+
+# lineup limits for the exact selector: (min, max) players in the XI who
+# are eligible bowlers of the model / spinners among them
+XI_CONSTRAINTS = {
+    "bowler": (5, None),
+    "spinner": (1, 3),
+}
+
+# out_of_role: the pools whose slot scores may fill a slot of each pool
+OUT_OF_ROLE_SOURCES = {
+    "bat": {"bat"},
+    "bowl": {"bowl"},
+    "ar": {"bat", "bowl", "ar"},
+}
+
+SPINNER_LIST = [
+    "Shadab Khan", "Abrar Ahmed", "Mohammad Nawaz",
+    "MRJ Watt", "MA Leask", "Harmeet Singh",
+    "CV Varun", "AR Patel"
+]
+
+# =====================================================
+# MODEL SPEC
+# =====================================================
+#
+# Each model is a dict of declarations over the shared feature frames
+# (features.batting_features / bowling_features):
+#
+#   norm            normalization for every score ("z" or "minmax")
+#   bat_roles       hook run on all batters before filtering (role labels)
+#   bat_filter      [(column, op, value)] eligibility, AND-ed
+#   bat_derive      hook run on the eligible pool (pool-relative features)
+#   bat_scores      {score: {feature: weight}}; a negative weight scores
+#                   the negated feature, i.e. "lower is better"
+#                   {score: {"weights": {...}, "pool": [(col, op, value)]}}
+#                   normalizes over that sub-pool of *all* players instead
+#   bat_multiplier  {score: hook} per-player factor applied to a score
+#   bowl_*          the same for bowlers, plus
+#   bowl_shortlist  (score, n) keep only the top n after scoring
+#   ar_scores       {score: {ref: weight}} over eligible batters who are
+#                   also eligible bowlers; "bat.col" / "bowl.col" are used
+#                   as-is, bare features are normalized within that pool
+#   selection       [(pool, score, n, role, where)] role slots, each
+#                   player at most once; n=None fills up to XI_SIZE
+#   role_weights    {role: weight} in the exact selector's objective
+#   out_of_role     exact selector only: a player may take a slot of their
+#                   own discipline outside their role, at their best slot
+#                   score in that discipline less this many sds of all slot
+#                   scores (nation XIs, where role pools run dry)
+#   constraints     {"bowler" | "spinner": (min, max)} for the exact selector
+#
+# The greedy selector fills the slots in order, as the scripts do. The
+# exact one maximises the role-weighted sum of slot scores under the
+# constraints.
+#
+# Normalized inputs are kept on the frames as "<feature>_n".
+
+OPS = {
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    "==": lambda a, b: a == b,
+}
+
+def mask(frame, conditions):
+    keep = pd.Series(True, index=frame.index)
+    for col, op, value in conditions or []:
+        keep &= OPS[op](frame[col], value)
+    return keep
+
+def weighted_score(frame, weights, method):
+    cols = list(weights)
+    signs = np.sign([weights[c] for c in cols])
+    N = normalize(frame[cols] * signs, method)
+    for c, sign in zip(cols, signs):
+        if sign > 0:
+            frame[f"{c}_n"] = N[c]
+    return N.to_numpy() @ np.abs([weights[c] for c in cols])
+
+def score_frame(frame, full, scores, method):
+    for name, spec in scores.items():
+        if "weights" in spec:
+            pool = full[mask(full, spec.get("pool"))].copy()
+            values = pd.Series(weighted_score(pool, spec["weights"], method), index=pool.index)
+            frame[name] = values.reindex(frame.index).fillna(0)
+        else:
+            frame[name] = weighted_score(frame, spec, method)
+    return frame
+
+def prepare(full, spec, side):
+    frame = full.copy()
+    if spec.get(f"{side}_roles"):
+        frame = spec[f"{side}_roles"](frame)
+    frame = frame[mask(frame, spec.get(f"{side}_filter"))].copy()
+    if spec.get(f"{side}_derive"):
+        frame = spec[f"{side}_derive"](frame)
+    frame = score_frame(frame, full, spec.get(f"{side}_scores", {}), spec["norm"])
+    for score, multiplier in spec.get(f"{side}_multiplier", {}).items():
+        frame[score] *= multiplier(frame)
+    if side == "bowl":
+        frame["bowling_type"] = np.where(frame.index.isin(SPINNER_LIST),"Spinner","Pace")
+    return frame
+
+def all_rounders(bat, bowl, spec):
+    pool = sorted(set(bat.index).intersection(set(bowl.index)))
+    ar = pd.DataFrame(index=pool)
+    for name, weights in spec.get("ar_scores", {}).items():
+        score = pd.Series(0.0, index=pool)
+        for ref, weight in weights.items():
+            side, _, col = ref.partition(".")
+            if side == "bat" and col:
+                score += weight * bat.loc[pool, col]
+            elif side == "bowl" and col:
+                score += weight * bowl.loc[pool, col]
+            else:
+                score += weight * normalize(bat.loc[pool, ref], spec["norm"])
+        ar[name] = score
+    return ar
+
+# =====================================================
+# GREEDY SELECTION
+# =====================================================
+
+class Picker:
+    # pick() from phase_task/Z_Score.py without the module-level globals
+
+    def __init__(self, size=XI_SIZE):
+        self.size = size
+        self.selected = []
+        self.role_map = {}
+
+    def pick(self, df, n, role_name):
+        count = 0
+        picked = []
+        for name in df.index:
+            if len(self.selected) == self.size:
+                break
+            if name not in self.role_map:
+                self.selected.append(name)
+                self.role_map[name] = role_name
+                picked.append(name)
+                count += 1
+            if count == n:
+                break
+        return picked
+
+def rule_frames(spec, pools):
+    for pool, score, n, role, where in spec["selection"]:
+        frame = pools[pool]
+        yield frame[mask(frame, where)], score, n, role, pool
+
+def greedy_select(spec, pools):
+    weights = spec.get("role_weights", {})
+    p = Picker()
+    objective = 0.0
+    for frame, score, n, role, _ in rule_frames(spec, pools):
+        picked = p.pick(frame.sort_values(score, ascending=False), n, role)
+        objective += weights.get(role, 1.0) * frame.loc[picked, score].sum()
+    return p.selected, p.role_map, objective
+
+def slot_problem(spec, pools):
+    # one value row per role slot group; the n=None rules share one group
+    # that fills the XI, valued by the best of those rules per player
+    players = pd.Index([])
+    for frame in pools.values():
+        players = players.union(frame.index)
+
+    weights = spec.get("role_weights", {})
+    rows, counts, roles, sides = [], [], [], []
+    fill_rows, fill_roles, fill_sides = [], [], set()
+    for frame, score, n, role, pool in rule_frames(spec, pools):
+        row = np.full(len(players), -np.inf)
+        row[players.get_indexer(frame.index)] = weights.get(role, 1.0) * frame[score].to_numpy(dtype=float)
+        row[np.isnan(row)] = -np.inf
+        if n is None:
+            fill_rows.append(row)
+            fill_roles.append(role)
+            fill_sides.add(pool)
+        else:
+            rows.append(row)
+            counts.append(n)
+            roles.append([role] * len(players))
+            sides.append({pool})
+
+    if fill_rows:
+        fill = np.vstack(fill_rows)
+        rows.append(fill.max(axis=0))
+        counts.append(max(XI_SIZE - sum(counts), 0))
+        roles.append([fill_roles[i] for i in fill.argmax(axis=0)])
+        sides.append(fill_sides)
+
+    values = np.vstack(rows)
+    if spec.get("out_of_role") is not None:
+        # out-of-role picks are marked "<role>*". A slot is filled out of
+        # role from its own discipline only, at the player's best score
+        # there: batting slots from the batting rows, bowling slots from
+        # the bowling rows, AR slots from any row.
+        finite = values[np.isfinite(values)]
+        penalty = spec["out_of_role"] * finite.std()
+        filled = values.copy()
+        for r, side in enumerate(sides):
+            allowed = set().union(*(OUT_OF_ROLE_SOURCES[s] for s in side))
+            source = [i for i, s in enumerate(sides) if s <= allowed]
+            best = values[source].max(axis=0) - penalty
+            filled[r] = np.where(np.isfinite(values[r]), values[r], best)
+        roles = [
+            [role if np.isfinite(v) else f"{role}*" for role, v in zip(labels, row)]
+            for labels, row in zip(roles, values)
+        ]
+        values = filled
+
+    return players, values, np.array(counts), roles
+
+def lineup_limits(spec, players, options, counts):
+    # options: the model's eligible bowlers, before any shortlist
+    limits = spec.get("constraints", {})
+    spinner = options[options.isin(SPINNER_LIST)]
+    attrs = np.column_stack([players.isin(options), players.isin(spinner)])
+    minimum = [(limits.get(a) or (0, None))[0] for a in ("bowler", "spinner")]
+    maximum = [(limits.get(a) or (0, None))[1] for a in ("bowler", "spinner")]
+    maximum = [counts.sum() if m is None else m for m in maximum]
+    # a pool short of spinners (say) still keeps the other limits
+    minimum = np.minimum(minimum, attrs.sum(axis=0))
+    return attrs, minimum, maximum
+
+def lineup(assignment, players, values, roles):
+    assignment = sorted(assignment, key=lambda rp: (rp[0], -values[rp]))
+    xi = [players[p] for _, p in assignment]
+    role_map = {players[p]: roles[r][p] for r, p in assignment}
+    return xi, role_map
+
+def exact_select(spec, pools, options):
+    players, values, counts, roles = slot_problem(spec, pools)
+    attrs, minimum, maximum = lineup_limits(spec, players, options, counts)
+
+    # more slots than XI_SIZE (Z_Score.py asks for 12): counts become limits
+    total = min(XI_SIZE, int(counts.sum()))
+    solution = solve(values, counts, attrs, minimum, maximum, total)
+    if solution is None:
+        # constraints unreachable in this pool; keep the role slots only
+        solution = solve(values, counts, total=total)
+    if solution is None:
+        return None
+
+    objective, assignment = solution
+    return (*lineup(assignment, players, values, roles), objective)
+
+def top_select(spec, pools, options, k=TOP_K, workers=None):
+    players, values, counts, roles = slot_problem(spec, pools)
+    attrs, minimum, maximum = lineup_limits(spec, players, options, counts)
+
+    total = min(XI_SIZE, int(counts.sum()))
+    found = top_k(values, counts, attrs, minimum, maximum, total, k, workers)
+    if not found:
+        found = top_k(values, counts, total=total, k=k, workers=workers)
+    return [(*lineup(assignment, players, values, roles), objective) for objective, assignment in found]
+
+def model_pools(spec, bat_all, bowl_all):
+    bat = prepare(bat_all, spec, "bat")
+    bowl = prepare(bowl_all, spec, "bowl")
+    options = bowl.index
+
+    if spec.get("bowl_shortlist"):
+        score, n = spec["bowl_shortlist"]
+        bowl = bowl.sort_values(score, ascending=False).head(n)
+
+    return {"bat": bat, "bowl": bowl, "ar": all_rounders(bat, bowl, spec)}, options
+
+def run_model(spec, bat_all, bowl_all, selector=None):
+    selector = selector or SELECTOR
+    pools, options = model_pools(spec, bat_all, bowl_all)
+
+    selected = exact_select(spec, pools, options) if selector == "exact" else None
+    if selected is None:
+        selector = "greedy"
+        selected = greedy_select(spec, pools)
+    xi, role_map, objective = selected
+
+    scores = {
+        "bat": list(spec.get("bat_scores", {})),
+        "bowl": list(spec.get("bowl_scores", {})),
+        "ar": list(spec.get("ar_scores", {})),
+    }
+    return {
+        "xi": xi, "roles": role_map, "objective": objective, "selector": selector,
+        "bat": pools["bat"], "bowl": pools["bowl"], "ar": pools["ar"], "scores": scores,
+    }
+
+def top_xis(spec, bat_all, bowl_all, k=TOP_K, workers=None):
+    # the k best XIs of the exact selector, best first
+    pools, options = model_pools(spec, bat_all, bowl_all)
+    return top_select(spec, pools, options, k, workers)
+
+def substitute_scores(spec, mapping):
+    # the spec with score inputs renamed per mapping; weights of inputs
+    # that land on the same column add up
+    out = dict(spec)
+    for key in ("bat_scores", "bowl_scores"):
+        if key not in spec:
+            continue
+        out[key] = {}
+        for name, score in spec[key].items():
+            swapped = {}
+            for col, weight in score.get("weights", score).items():
+                col = mapping.get(col, col)
+                swapped[col] = swapped.get(col, 0) + weight
+            out[key][name] = {**score, "weights": swapped} if "weights" in score else swapped
+    if "ar_scores" in spec:
+        # "bat.<feature>_n" refers to a substituted input's normalized column
+        def swap(ref):
+            side, dot, col = ref.rpartition(".")
+            if dot and col.endswith("_n") and col[:-2] in mapping:
+                return f"{side}.{mapping[col[:-2]]}_n"
+            return ref if dot else mapping.get(ref, ref)
+        out["ar_scores"] = {
+            name: {swap(ref): weight for ref, weight in weights.items()}
+            for name, weights in spec["ar_scores"].items()
+        }
+    return out
+
+def uses_columns(spec, columns):
+    return any(
+        col in columns
+        for key in ("bat_scores", "bowl_scores")
+        for score in spec.get(key, {}).values()
+        for col in score.get("weights", score)
+    )
+
+# =====================================================
+# SHARED HOOKS
+# =====================================================
+
+def phase_impact(bat):
+    # runs above the pool's own phase strike rate (phase_task/1.py, 2.py)
+    bat["phase_impact"] = 0.0
+    for p in PHASES:
+        base = bat[f"runs_{p}"].sum() / bat[f"balls_{p}"].sum() * 100
+        bat["phase_impact"] += (bat[f"SR_{p}"] - base) * bat[f"balls_{p}"]
+    return bat
+
+def econ_impact(bowl):
+    # runs saved against the pool's own phase economy (phase_task/2.py)
+    bowl["econ_impact"] = 0.0
+    for p in PHASES:
+        base = bowl[f"legal_runs_{p}"].sum() / (bowl[f"balls_{p}"].sum() / 6)
+        bowl["econ_impact"] += (base - bowl[f"econ_{p}"]) * bowl[f"balls_{p}"]
+    return bowl
+
+def share_roles(frame, rules, default, column="role"):
+    # first matching (share column, threshold, label) wins
+    frame[column] = np.select(
+        [frame[col] > threshold for col, threshold, _ in rules],
+        [label for _, _, label in rules],
+        default=default
+    )
+    return frame
+
+def final_task_bat_roles(bat):
+    bat = share_roles(bat, [("pp_share", 0.45, "Opener"), ("death_share", 0.35, "Finisher")], "Middle/Anchor")
+    anchor = (bat["SR"] < 125) & (bat["runs_per_match"] > 25)
+    bat["role"] = np.where(
+        bat["role"] == "Middle/Anchor", np.where(anchor, "Anchor", "Middle"), bat["role"]
+    )
+    min_balls = bat["role"].map({"Opener": 80, "Anchor": 80, "Middle": 60, "Finisher": 40})
+    bat["eligible"] = (bat["matches"] >= 3) & (bat["balls"] >= min_balls)
+    return bat
+
+def role_final_bat_roles(bat):
+    return share_roles(bat, [
+        ("pp_share", 0.45, "Opener"),
+        ("death_share", 0.35, "Finisher"),
+    ], None).assign(role=lambda b: np.select(
+        [
+            b["role"].notna(),
+            (b["SR_Early_Middle"] < 125) & (b["runs_per_match"] > 25),
+            b["SR_Late_Middle"] > 140,
+        ],
+        [b["role"], "Anchor", "MiddleHitter"],
+        default="Middle"
+    ))
+
+def z_score2_bowl_roles(bowl):
+    usage = bowl[["share_PP","share_Middle","share_Death"]]
+    usage.columns = ["Powerplay","Middle","Death"]
+    bowl["bowling_role"] = usage.idxmax(axis=1)
+    return bowl
+
+def structural_death_sr(bat):
+    bat["death_sr"] = np.where(bat["balls_Death"] >= 15, bat["SR_Death"], 0.0)
+    return phase_impact(bat)
+
+def stability(bat):
+    # phase_task/2.py: final = raw * (0.9 + 0.1 * balls / max balls)
+    return 0.9 + 0.1*bat["balls"]/bat["balls"].max()
+
+# =====================================================
+# MODEL DECLARATIONS
+# =====================================================
+
+Z_BAT_SCORES = {
+    "Opener_Score": {"SR_PP": 0.5, "SR": 0.3, "consistency": 0.2},
+    "Anchor_Score": {"rotation_pct_Early_Middle": 0.4, "dot_pct_Early_Middle": -0.3, "consistency": 0.3},
+    "Middle_Score": {"SR_Late_Middle": 0.5, "boundary_pct_Late_Middle": 0.3, "consistency": 0.2},
+    "Finisher_Score": {"SR_Death": 0.5, "boundary_pct_Death": 0.3, "SR": 0.2},
+}
+
+Z_BAT_SELECTION = [
+    ("bat", "Opener_Score", 2, "Opener", None),
+    ("bat", "Anchor_Score", 1, "Anchor", None),
+    ("bat", "Middle_Score", 2, "Middle Order", None),
+    ("bat", "Finisher_Score", 1, "Finisher", None),
+]
+
+IMPACT_Z = {"wkt_rate": 0.4, "economy": -0.3, "dot_pct": 0.3}
+
+FINAL_TASK_BOWL_ROLES = [("share_Death", 0.30, "Death"), ("share_PP", 0.35, "Powerplay")]
+
+FINAL_TASK_BAT_SELECTION = [
+    ("bat", "composite", 2, "Opener", [("role", "==", "Opener")]),
+    ("bat", "composite", 1, "Anchor", [("role", "==", "Anchor")]),
+    ("bat", "composite", 2, "Middle", [("role", "==", "Middle")]),
+    ("bat", "composite", 1, "Finisher", [("role", "==", "Finisher")]),
+]
+
+REGISTRY = {
+
+    "Phase_Impact": {
+        "source": "phase_task/1.py",
+        "norm": "z",
+        "bat_filter": [("matches", ">=", 3), ("balls", ">=", 45)],
+        "bat_derive": phase_impact,
+        "bat_scores": {
+            "final_score": {"phase_impact": 0.45, "run_share": 0.20, "SR_Death": 0.15, "win_ratio": 0.10},
+        },
+        "bowl_filter": [("matches", ">=", 3), ("overs", ">=", 8)],
+        "selection": [
+            ("bat", "final_score", 2, "Opener", [("pp_share", ">=", 0.4)]),
+            ("bat", "final_score", 4, "Batter", None),
+        ],
+    },
+
+    "Structural": {
+        "source": "phase_task/2.py",
+        "norm": "z",
+        "bat_filter": [("matches", ">=", 3), ("balls", ">=", 45)],
+        "bat_derive": structural_death_sr,
+        "bat_scores": {
+            "final_score": {"phase_impact": 0.60, "run_share": 0.25, "death_sr": 0.15},
+        },
+        "bat_multiplier": {"final_score": stability},
+        "bowl_filter": [("matches", ">=", 3), ("overs", ">=", 8)],
+        "bowl_derive": econ_impact,
+        "bowl_scores": {
+            "final_score": {"econ_impact": 0.65, "wicket_rate": 0.35},
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": [
+            ("bat", "final_score", 2, "Opener", [("batting_position", "<=", 2)]),
+            ("bat", "final_score", 2, "Middle", [("batting_position", ">", 2), ("batting_position", "<=", 5)]),
+            ("bat", "final_score", 1, "Finisher", [("batting_position", ">", 5)]),
+            ("bat", "final_score", 1, "Flex Batter", None),
+            ("bowl", "final_score", 2, "Powerplay", [("share_PP", ">=", 0.35)]),
+            ("bowl", "final_score", 1, "Death", [("share_Death", ">=", 0.30)]),
+            ("bowl", "final_score", 1, "Middle Overs", [("share_Middle", ">=", 0.40)]),
+            ("bowl", "final_score", 1, "Flex Bowler", None),
+        ],
+    },
+
+    "Z_Score": {
+        "source": "phase_task/Z_Score.py",
+        "norm": "z",
+        "bat_filter": [("balls", ">=", 80), ("matches", ">=", 3)],
+        "bat_scores": Z_BAT_SCORES,
+        "bowl_filter": [("overs", ">=", 10)],
+        "bowl_scores": {
+            "Impact_Index": IMPACT_Z,
+            "Death_Index": {
+                "weights": {"wkt_rate_Death": 0.5, "econ_Death": -0.5},
+                "pool": [("overs_Death", ">=", 4)],
+            },
+        },
+        "ar_scores": {"AR_Index": {"bat.SR_n": 0.65, "bowl.Impact_Index": 0.35}},
+        "constraints": XI_CONSTRAINTS,
+        "selection": Z_BAT_SELECTION + [
+            ("ar", "AR_Index", 2, "All-Rounder", None),
+            ("bowl", "Impact_Index", 1, "Spinner", [("bowling_type", "==", "Spinner")]),
+            ("bowl", "Impact_Index", 2, "Pacer", [("bowling_type", "==", "Pace")]),
+            ("bowl", "Death_Index", 1, "Death Specialist", None),
+        ],
+    },
+
+    # Z_score2.py isolates "Powerplay" / "EarlyMiddle" / "LateMiddle" overs,
+    # labels its phase() never emits, so PP_Index and Middle_Index are
+    # always 0 there. This declaration uses the labels the script intended.
+    "Z_score2": {
+        "source": "phase_task/Z_score2.py",
+        "norm": "z",
+        "bat_filter": [("balls", ">=", 80), ("matches", ">=", 3)],
+        "bat_scores": Z_BAT_SCORES,
+        "bowl_filter": [("overs", ">=", 10)],
+        "bowl_derive": z_score2_bowl_roles,
+        "bowl_scores": {
+            "Impact_Index": IMPACT_Z,
+            "PP_Index": {
+                "weights": {"wkt_rate_PP": 0.6, "econ_PP": -0.4},
+                "pool": [("overs_PP", ">=", 2)],
+            },
+            "Middle_Index": {
+                "weights": {"wkt_rate_Middle": 0.4, "econ_Middle": -0.3, "dot_pct_Middle": 0.3},
+                "pool": [("overs_Middle", ">=", 2)],
+            },
+            "Death_Index": {
+                "weights": {"wkt_rate_Death": 0.5, "econ_Death": -0.5},
+                "pool": [("overs_Death", ">=", 2)],
+            },
+        },
+        "ar_scores": {
+            "AR_Index": {"bat.SR_n": 0.4, "bowl.Impact_Index": 0.4, "consistency": 0.2},
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": Z_BAT_SELECTION + [
+            ("ar", "AR_Index", 2, "All-Rounder", None),
+            ("bowl", "PP_Index", 2, "Powerplay", [("bowling_role", "==", "Powerplay")]),
+            ("bowl", "Middle_Index", 1, "Middle Bowler", [("bowling_role", "==", "Middle")]),
+            ("bowl", "Death_Index", 1, "Death Specialist", [("bowling_role", "==", "Death")]),
+        ],
+    },
+
+    "Elite_T20I": {
+        "source": "phase_task/Elite_T20I.py",
+        "norm": "minmax",
+        "bat_filter": [("balls", ">=", 40)],
+        "bat_scores": {
+            "Opener_Score": {"SR_PP": 0.40, "SR": 0.30, "consistency": 0.20, "collapse_SR": 0.10},
+            "Anchor_Score": {
+                "rotation_pct_Early_Middle": 0.35, "dot_pct_Early_Middle": -0.30,
+                "consistency": 0.20, "SR": -0.15,
+            },
+            "Middle_Score": {
+                "SR_Late_Middle": 0.40, "boundary_pct_Late_Middle": 0.30,
+                "consistency": 0.20, "collapse_SR": 0.10,
+            },
+            "Finisher_Score": {
+                "SR_Death": 0.45, "boundary_pct_Death": 0.30, "SR": 0.15, "collapse_SR": 0.10,
+            },
+        },
+        "bowl_filter": [("overs", ">=", 8)],
+        "bowl_scores": {
+            "Impact_Index": {"wkt_rate": 0.40, "inv_economy": 0.35, "dot_pct": 0.25},
+        },
+        "bowl_shortlist": ("Impact_Index", 20),
+        "ar_scores": {
+            "Bat_AR_Index": {"bat.SR_n": 0.65, "bowl.Impact_Index": 0.35},
+            "Bowl_AR_Index": {"bat.SR_n": 0.35, "bowl.Impact_Index": 0.65},
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": Z_BAT_SELECTION + [
+            ("ar", "Bat_AR_Index", 1, "Batting All-Rounder", None),
+            ("ar", "Bowl_AR_Index", 1, "Bowling All-Rounder", None),
+            ("bowl", "Impact_Index", 1, "Spinner", [("bowling_type", "==", "Spinner")]),
+            ("bowl", "Impact_Index", 2, "Pacer", [("bowling_type", "==", "Pace")]),
+        ],
+    },
+
+    "Role_Final": {
+        "source": "phase_task/role_final.py",
+        "norm": "minmax",
+        "bat_roles": role_final_bat_roles,
+        "bat_filter": [("matches", ">=", 3)],
+        "bat_scores": {
+            "composite": {"SR": 0.35, "runs_per_match": 0.30, "boundary_pct": 0.20, "dot_pct": -0.15},
+        },
+        "bowl_roles": lambda b: share_roles(
+            b, [("share_Death", 0.30, "Death"), ("share_PP", 0.35, "NewBall")], "Spinner"
+        ),
+        "bowl_filter": [("matches", ">=", 3), ("overs", ">=", 8)],
+        "bowl_scores": {
+            "composite": {"wpm": 0.40, "inv_economy": 0.35, "legal_dot_pct": 0.25},
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": [
+            ("bat", "composite", 2, "Opener", [("role", "==", "Opener")]),
+            ("bat", "composite", 1, "Anchor", [("role", "==", "Anchor")]),
+            ("bat", "composite", 1, "MiddleHitter", [("role", "==", "MiddleHitter")]),
+            ("bat", "composite", 1, "Middle", [("role", "==", "Middle")]),
+            ("bat", "composite", 1, "Finisher", [("role", "==", "Finisher")]),
+            ("bowl", "composite", 2, "NewBall", [("role", "==", "NewBall")]),
+            ("bowl", "composite", 1, "Death", [("role", "==", "Death")]),
+            ("bowl", "composite", 1, "Spinner", [("role", "==", "Spinner")]),
+            ("bat", "composite", None, "Batter", None),
+            ("bowl", "composite", None, "Bowler", None),
+        ],
+    },
+
+    "Advanced_Elite": {
+        "source": "final_task/2.py",
+        "norm": "minmax",
+        "bat_roles": final_task_bat_roles,
+        "bat_filter": [("eligible", "==", True)],
+        "bat_scores": {
+            "composite": {
+                "SR": 0.25, "runs_per_match": 0.25, "dot_pct": -0.15, "boundary_pct": 0.15,
+                "death_share": 0.10, "pressure_SR": 0.05, "clutch_runs": 0.05,
+            },
+        },
+        "bowl_roles": lambda b: share_roles(b, FINAL_TASK_BOWL_ROLES, "Middle/Spinner"),
+        "bowl_filter": [("matches", ">=", 3), ("overs", ">=", 8)],
+        "bowl_scores": {
+            "composite": {
+                "wpm": 0.30, "inv_economy": 0.25, "legal_dot_pct": 0.20,
+                "death_wickets": 0.15, "wickets": 0.10,
+            },
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": FINAL_TASK_BAT_SELECTION + [
+            ("bowl", "composite", 2, "Powerplay", [("role", "==", "Powerplay")]),
+            ("bowl", "composite", 1, "Death", [("role", "==", "Death")]),
+            ("bowl", "composite", 1, "Middle/Spinner", [("role", "==", "Middle/Spinner")]),
+            ("bowl", "composite", 1, "Flex Bowler", None),
+        ],
+    },
+
+    "Venue_Base": {
+        "source": "final_task/3.py",
+        "norm": "minmax",
+        "bat_roles": final_task_bat_roles,
+        "bat_filter": [("eligible", "==", True)],
+        "bat_scores": {
+            "composite": {
+                "SR": 0.25, "runs_per_match": 0.25, "dot_pct": -0.15, "boundary_pct": 0.15,
+                "pressure_runs": 0.10, "clutch_runs": 0.10,
+            },
+        },
+        "bowl_roles": lambda b: share_roles(b, FINAL_TASK_BOWL_ROLES, "Middle"),
+        "bowl_filter": [("matches", ">=", 3), ("overs", ">=", 8)],
+        "bowl_scores": {
+            "composite": {"wpm": 0.35, "inv_economy": 0.30, "legal_dot_pct": 0.20, "wickets": 0.15},
+        },
+        "constraints": XI_CONSTRAINTS,
+        "selection": FINAL_TASK_BAT_SELECTION + [
+            ("bowl", "composite", 2, "Powerplay", [("role", "==", "Powerplay")]),
+            ("bowl", "composite", 1, "Death", [("role", "==", "Death")]),
+            ("bowl", "composite", 1, "Middle", [("role", "==", "Middle")]),
+            ("bowl", "composite", 1, "Flex Bowler", None),
+        ],
+    },
+}
+
+MODELS = {
+    name: (lambda bat_all, bowl_all, spec=spec: run_model(spec, bat_all, bowl_all))
+    for name, spec in REGISTRY.items()
+}
+
+# the scripts' own greedy selections
+GREEDY_MODELS = {
+    name: (lambda bat_all, bowl_all, spec=spec: run_model(spec, bat_all, bowl_all, "greedy"))
+    for name, spec in REGISTRY.items()
+}
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import stage, match_files
+from normalize import normalize, IncrementalNormalizer, INCREMENTAL_METHODS
+from live import LiveAggregates, feed_records
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+REPLAY_MATCHES = 5      # matches added one at a time after the rest
+# metric -> 1 if higher is better, -1 if lower is; ranks are best first
+RERANK_METRICS = {
+    "bat": {"SR": 1, "dot_pct": -1, "boundary_pct": 1, "runs_per_match": 1, "consistency": 1},
+    "bowl": {"economy": -1, "wkt_rate": 1, "dot_pct": 1, "wpm": 1},
+}
+RANK_TOP = 5
+
+SYNTHETIC_PLAYERS = 100_000
+SYNTHETIC_CHANGED = 22
+SYNTHETIC_MATCHES = 20
+SYNTHETIC_SEED = 0
+
+def rerank_frames(bat_all, bowl_all):
+    # the metrics signed so higher is always better
+    return {
+        side: features[list(RERANK_METRICS[side])] * pd.Series(RERANK_METRICS[side])
+        for side, features in (("bat", bat_all), ("bowl", bowl_all))
+    }
+
+def batch_ranks(frame):
+    return frame.rank(ascending=False, method="min")
+
+def check(normalizer, frame, method):
+    # largest difference from the batch normalize() and ranks
+    batch = normalize(frame, method)
+    inc = normalizer.transform().reindex(index=frame.index)
+    ranks = pd.concat({c: normalizer.rank(c) for c in frame.columns}, axis=1).reindex(frame.index)
+    rank_diff = (ranks - batch_ranks(frame)).abs().max().max()
+    return (batch - inc).abs().max().max(), 0.0 if np.isnan(rank_diff) else rank_diff
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: TOURNAMENT SO FAR")
+
+    files = match_files()
+    live = LiveAggregates()
+    for file_path in files[:-REPLAY_MATCHES]:
+        for record in feed_records(file_path):
+            live.add(record)
+    bat_all, bowl_all = live.features()
+    frames = rerank_frames(bat_all, bowl_all)
+    normalizers = {
+        (side, method): IncrementalNormalizer(frame, method)
+        for side, frame in frames.items() for method in INCREMENTAL_METHODS
+    }
+    print(f"Matches: {len(files) - REPLAY_MATCHES}  batters: {len(bat_all)}  bowlers: {len(bowl_all)}")
+
+    stage(f"STAGE 2: {REPLAY_MATCHES} NEW MATCHES, ONE AT A TIME")
+
+    records = []
+    for file_path in files[-REPLAY_MATCHES:]:
+        for record in feed_records(file_path):
+            live.add(record)
+        match = record["match"]
+        bat_all, bowl_all = live.features()
+        frames = rerank_frames(bat_all, bowl_all)
+        changed = {
+            "bat": sorted({b for b, m in live.bat_rows if m == match}),
+            "bowl": sorted({b for b, m in live.bowl_played if m == match}),
+        }
+        for (side, method), normalizer in normalizers.items():
+            frame = frames[side]
+            start = time.perf_counter()
+            normalizer.update(frame.loc[changed[side]])
+            for column in frame.columns:
+                normalizer.rank(column, changed[side])
+            incremental = time.perf_counter() - start
+
+            start = time.perf_counter()
+            normalize(frame, method)
+            batch_ranks(frame)
+            batch = time.perf_counter() - start
+
+            value_diff, rank_diff = check(normalizer, frame, method)
+            records.append({"match": match, "side": side, "method": method, "changed": len(changed[side]),
+                            "incremental_ms": incremental * 1e3, "batch_ms": batch * 1e3,
+                            "max_diff": value_diff, "max_rank_diff": rank_diff})
+    print(pd.DataFrame(records).to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+
+    print("\nTop after the last match:")
+    for (side, method), normalizer in normalizers.items():
+        if method == "z":
+            for column in normalizer.columns[:2]:
+                print(f"  {side}.{column:<16} {', '.join(normalizer.top(column, RANK_TOP))}")
+
+    stage(f"STAGE 3: {SYNTHETIC_PLAYERS:,} PLAYERS, {SYNTHETIC_CHANGED} CHANGED PER MATCH")
+
+    rng = np.random.default_rng(SYNTHETIC_SEED)
+    frame = pd.DataFrame(rng.normal(size=(SYNTHETIC_PLAYERS, 5)), columns=[f"m{i}" for i in range(5)])
+    frame.iloc[rng.integers(0, SYNTHETIC_PLAYERS, 500), 0] = np.nan
+    for method in INCREMENTAL_METHODS:
+        normalizer = IncrementalNormalizer(frame, method)
+        incremental = batch = 0.0
+        for _ in range(SYNTHETIC_MATCHES):
+            rows = rng.choice(SYNTHETIC_PLAYERS, SYNTHETIC_CHANGED, replace=False)
+            frame.iloc[rows] += rng.normal(scale=0.1, size=(SYNTHETIC_CHANGED, 5))
+            start = time.perf_counter()
+            normalizer.update(frame.iloc[rows])
+            for column in frame.columns:
+                normalizer.rank(column, frame.index[rows])
+            incremental += time.perf_counter() - start
+            start = time.perf_counter()
+            normalize(frame, method)
+            batch_ranks(frame)
+            batch += time.perf_counter() - start
+        value_diff, rank_diff = check(normalizer, frame, method)
+        print(f"  {method:<7} incremental: {incremental / SYNTHETIC_MATCHES * 1e3:.3f} ms/match  "
+              f"batch: {batch / SYNTHETIC_MATCHES * 1e3:.1f} ms/match  "
+              f"max diff: {value_diff:.1e}  max rank diff: {rank_diff:.0f}")
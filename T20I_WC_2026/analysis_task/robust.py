@@ -0,0 +1,280 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+
+from aggregates import stage, load_deliveries, batting_table, bowling_table
+from features import batting_features, bowling_features
+from registry import REGISTRY, XI_SIZE, model_pools, slot_problem, lineup_limits, lineup
+from optimizer import solve
+from bootstrap import resample_seeds, match_weights
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+ROBUST_DRAWS = 200     # match-level resamples of every rating
+ROBUST_SEED = 2026
+ROBUST_QUANTILE = 0.10 # objective of the quantile mode
+RESTARTS = 8           # kicked restarts of the local search per start
+KICK_MOVES = 3         # random moves per kick
+EPS = 1e-9
+
+# =====================================================
+# SLOT VALUES PER DRAW
+# =====================================================
+
+_STATE = {}
+
+def _init_draws(bat_tab, bowl_tab, problems):
+    matches = np.union1d(bat_tab.matches, bowl_tab.matches)
+    _STATE.update(
+        bat_tab=bat_tab,
+        bowl_tab=bowl_tab,
+        matches=matches,
+        bat_idx=np.searchsorted(matches, bat_tab.matches),
+        bowl_idx=np.searchsorted(matches, bowl_tab.matches),
+        problems=problems,
+    )
+
+def _draw_chunk(seeds):
+    # one (rows, players) value matrix per model and draw, aligned to the
+    # point-estimate problem's players
+    s = _STATE
+    out = {name: [] for name in s["problems"]}
+    for seed_seq in seeds:
+        w = match_weights(len(s["matches"]), seed_seq)
+        bat_all = batting_features(s["bat_tab"].frame(s["bat_tab"].totals(w[s["bat_idx"]])))
+        bowl_all = bowling_features(s["bowl_tab"].frame(s["bowl_tab"].totals(w[s["bowl_idx"]])))
+        for name, problem in s["problems"].items():
+            pools, _ = model_pools(REGISTRY[name], bat_all, bowl_all)
+            players, values, _, _ = slot_problem(REGISTRY[name], pools)
+            aligned = np.full(problem["values"].shape, -np.inf)
+            idx = players.get_indexer(problem["players"])
+            aligned[:, idx >= 0] = values[:, idx[idx >= 0]]
+            out[name].append(aligned)
+    return out
+
+def relax_limits(problem):
+    # constraints unreachable in this pool: keep the role slots only, as
+    # registry.exact_select does, and flag the problem as relaxed. The
+    # draws share the point values' allowed cells, so one check covers
+    # every start and move of the search.
+    feasible = solve(problem["values"], problem["counts"], problem["attrs"], problem["minimum"],
+                     problem["maximum"], problem["total"]) is not None
+    if feasible:
+        return {**problem, "relaxed": False}
+    k = problem["attrs"].shape[1]
+    return {**problem, "minimum": np.zeros(k, dtype=int), "maximum": np.full(k, problem["total"]),
+            "relaxed": True}
+
+def point_problem(spec, bat_all, bowl_all):
+    pools, options = model_pools(spec, bat_all, bowl_all)
+    players, values, counts, roles = slot_problem(spec, pools)
+    attrs, minimum, maximum = lineup_limits(spec, players, options, counts)
+    return relax_limits({
+        "players": players, "values": values, "counts": counts, "roles": roles,
+        "attrs": attrs.astype(int), "minimum": np.asarray(minimum), "maximum": np.asarray(maximum),
+        "total": min(XI_SIZE, int(counts.sum())),
+    })
+
+def rating_draws(df, problems, n=ROBUST_DRAWS, seed=ROBUST_SEED, workers=None, chunk_size=25):
+    # (draws, rows, players) per model. A player who drops out of a pool in
+    # a draw (too few balls in the resample) takes the worst value of that
+    # slot group in the draw; slots the player could never fill stay -inf.
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+    seeds = resample_seeds(n, seed)
+    jobs = [seeds[i:i + chunk_size] for i in range(0, n, chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs)), _init_draws, (bat_tab, bowl_tab, problems)) as pool:
+            parts = pool.map(_draw_chunk, jobs)
+    else:
+        _init_draws(bat_tab, bowl_tab, problems)
+        parts = [_draw_chunk(job) for job in jobs]
+
+    draws = {}
+    for name, problem in problems.items():
+        V = np.stack([v for part in parts for v in part[name]])
+        allowed = np.isfinite(problem["values"])
+        floor = np.where(np.isfinite(V), V, np.inf).min(axis=2, keepdims=True)
+        floor = np.where(np.isfinite(floor), floor, np.nanmin(np.where(allowed, problem["values"], np.nan)))
+        V = np.where(np.isfinite(V), V, floor)
+        draws[name] = np.where(allowed, V, -np.inf)
+    return draws
+
+# =====================================================
+# OBJECTIVE AND PARALLEL LOCAL SEARCH
+# =====================================================
+
+def objective(totals, quantile=None):
+    # totals: (draws, candidates) lineup values; expected value, or the
+    # quantile across draws
+    if quantile is None:
+        return totals.mean(axis=0)
+    return np.quantile(totals, quantile, axis=0)
+
+def _moves(assignment, problem):
+    # every feasible move from an assignment as (new assignment's removed
+    # pairs, added pairs): one player replaced (by an unpicked player, or
+    # the same player in another slot group), or two players' slots swapped
+    allowed = np.isfinite(problem["values"])
+    counts, attrs = problem["counts"], problem["attrs"]
+    rows = np.array([r for r, _ in assignment])
+    cols = np.array([p for _, p in assignment])
+    used = np.bincount(rows, minlength=len(counts))
+    have = attrs[cols].sum(axis=0)
+    picked = np.zeros(allowed.shape[1], dtype=bool)
+    picked[cols] = True
+
+    removed, added = [], []
+    for i, (r, p) in enumerate(assignment):
+        free = used - (np.arange(len(counts)) == r) < counts
+        ok = allowed & free[:, None] & (~picked | (np.arange(len(picked)) == p))[None]
+        ok[r, p] = False
+        after = have - attrs[p] + attrs
+        ok &= ((after >= problem["minimum"]) & (after <= problem["maximum"])).all(axis=1)[None]
+        for r2, p2 in zip(*np.nonzero(ok)):
+            removed.append(((r, p),))
+            added.append(((int(r2), int(p2)),))
+    for i in range(len(assignment)):
+        for j in range(i + 1, len(assignment)):
+            (r1, p1), (r2, p2) = assignment[i], assignment[j]
+            if r1 != r2 and allowed[r1, p2] and allowed[r2, p1]:
+                removed.append(((r1, p1), (r2, p2)))
+                added.append(((r1, p2), (r2, p1)))
+    return removed, added
+
+def _delta(pairs):
+    # (draws, moves) value of a list of pair tuples
+    V = _STATE["V"]
+    out = np.zeros((V.shape[0], len(pairs)))
+    for k in range(max(map(len, pairs), default=0)):
+        idx = [c for c, ps in enumerate(pairs) if len(ps) > k]
+        r = np.array([pairs[c][k][0] for c in idx])
+        p = np.array([pairs[c][k][1] for c in idx])
+        out[:, idx] += V[:, r, p]
+    return out
+
+def _apply(assignment, removed, added):
+    return sorted(set(assignment) - set(removed) | set(added))
+
+def _init_search(V, problem, quantile):
+    _STATE.update(V=V, problem=problem, quantile=quantile)
+
+def _local_search(job):
+    # best-improvement local search from a start, after `kicks` random
+    # moves; returns (objective, assignment)
+    start, seed, kicks = job
+    problem, quantile, V = _STATE["problem"], _STATE["quantile"], _STATE["V"]
+    rng = np.random.default_rng(seed)
+    assignment = sorted(start)
+    for _ in range(kicks):
+        removed, added = _moves(assignment, problem)
+        if removed:
+            k = rng.integers(len(removed))
+            assignment = _apply(assignment, removed[k], added[k])
+
+    totals = assignment_totals(V, assignment)
+    current = objective(totals[:, None], quantile)[0]
+    while True:
+        removed, added = _moves(assignment, problem)
+        if not removed:
+            break
+        candidates = totals[:, None] - _delta(removed) + _delta(added)
+        scores = objective(candidates, quantile)
+        k = int(np.argmax(scores))
+        if scores[k] <= current + EPS:
+            break
+        assignment = _apply(assignment, removed[k], added[k])
+        totals, current = candidates[:, k], scores[k]
+    return current, assignment
+
+def point_assignment(problem, values=None):
+    # the exact selector's assignment on the point values (or `values`),
+    # within the problem's limits (see relax_limits)
+    values = problem["values"] if values is None else values
+    return solve(values, problem["counts"], problem["attrs"], problem["minimum"], problem["maximum"],
+                 problem["total"])
+
+def assignment_totals(V, assignment):
+    # (draws,) lineup value of an assignment in every draw
+    rows = np.array([r for r, _ in assignment])
+    cols = np.array([p for _, p in assignment])
+    return V[:, rows, cols].sum(axis=1)
+
+def robust_select(problem, V, quantile=None, restarts=RESTARTS, seed=ROBUST_SEED, workers=None):
+    # The XI that maximises the expected lineup value across the draws, or
+    # its `quantile`. Starts are the point-estimate XI and the exact
+    # optimum of the mean values (optimal outright for the expected
+    # objective), each also restarted after random kicks; the searches run
+    # in parallel and the best is kept.
+    starts = [s[1] for s in (point_assignment(problem), point_assignment(problem, V.mean(axis=0))) if s]
+    seeds = np.random.SeedSequence(seed).spawn(len(starts) * (restarts + 1))
+    jobs = [(start, seeds[i * (restarts + 1) + k], KICK_MOVES if k else 0)
+            for i, start in enumerate(starts) for k in range(restarts + 1)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with Pool(min(workers, len(jobs)), _init_search, (V, problem, quantile)) as pool:
+            found = pool.map(_local_search, jobs)
+    else:
+        _init_search(V, problem, quantile)
+        found = [_local_search(job) for job in jobs]
+
+    best, assignment = max(found, key=lambda f: f[0])
+    xi, roles = lineup(assignment, problem["players"], V.mean(axis=0), problem["roles"])
+    return {"xi": xi, "roles": roles, "objective": best, "totals": assignment_totals(V, assignment),
+            "relaxed": problem["relaxed"]}
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all = batting_features(batting_table(df).frame(batting_table(df).totals()))
+    bowl_all = bowling_features(bowling_table(df).frame(bowling_table(df).totals()))
+    problems = {name: point_problem(spec, bat_all, bowl_all) for name, spec in REGISTRY.items()}
+    print("Matches:", df["match"].nunique())
+
+    stage(f"STAGE 2: {ROBUST_DRAWS} RATING DRAWS")
+
+    start = time.perf_counter()
+    draws = rating_draws(df, problems)
+    print(f"Draws: {ROBUST_DRAWS}  models: {len(draws)}  workers: {os.cpu_count()}  "
+          f"time: {time.perf_counter() - start:.1f}s")
+
+    stage(f"STAGE 3: POINT, EXPECTED AND Q{ROBUST_QUANTILE:.2f} XIs")
+
+    records = []
+    changes = []
+    for name, problem in problems.items():
+        start = time.perf_counter()
+        V = draws[name]
+        expected = robust_select(problem, V)
+        tail = robust_select(problem, V, ROBUST_QUANTILE)
+        seconds = time.perf_counter() - start
+        assignment = point_assignment(problem)[1]
+        point = assignment_totals(V, assignment)
+        point_xi = lineup(assignment, problem["players"], problem["values"], problem["roles"])[0]
+        for mode, totals, xi in (("point", point, point_xi),
+                                 ("expected", expected["totals"], expected["xi"]),
+                                 (f"q{ROBUST_QUANTILE:.2f}", tail["totals"], tail["xi"])):
+            records.append({"model": name, "mode": mode, "mean": totals.mean(),
+                            f"q{ROBUST_QUANTILE:.2f}": np.quantile(totals, ROBUST_QUANTILE),
+                            "changes": len(set(xi) - set(point_xi)), "relaxed": problem["relaxed"],
+                            "seconds": seconds})
+            changes.append({"model": name, "mode": mode, "out": ", ".join(p for p in point_xi if p not in xi),
+                            "in": ", ".join(p for p in xi if p not in point_xi)})
+    table = pd.DataFrame(records)
+    print(table.round(3).to_string(index=False))
+
+    stage("STAGE 4: PLAYERS IN AND OUT AGAINST THE POINT-ESTIMATE XI")
+
+    changes = pd.DataFrame(changes)
+    print(changes[changes["mode"] != "point"].to_string(index=False))
+
+    table.merge(changes, on=["model", "mode"]).to_csv("robust_xis.csv", index=False)
@@ -0,0 +1,85 @@
+import time
+import pandas as pd
+
+from aggregates import stage, load_deliveries, batting_table, bowling_table
+from features import batting_features, bowling_features
+from registry import REGISTRY, MODELS, GREEDY_MODELS, XI_SIZE
+
+# =====================================================
+# RUN EVERY REGISTERED MODEL ON ONE PARSE
+# =====================================================
+
+def load_features(df):
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+    bat_all = batting_features(bat_tab.frame(bat_tab.totals()))
+    bowl_all = bowling_features(bowl_tab.frame(bowl_tab.totals()))
+    return bat_all, bowl_all
+
+def run_all(bat_all, bowl_all, models=MODELS):
+    return {name: fn(bat_all, bowl_all) for name, fn in models.items()}
+
+def side_by_side(results):
+    # one row per XI slot, one column per model: "player (role)"
+    table = pd.DataFrame(index=pd.RangeIndex(1, XI_SIZE + 1, name="slot"))
+    for name, result in results.items():
+        cells = [f"{p} ({result['roles'][p]})" for p in result["xi"]]
+        table[name] = pd.Series(cells, index=range(1, len(cells) + 1))
+    return table.fillna("")
+
+def selector_diff(results, greedy):
+    # what the exact selector changes relative to the scripts' pick() order
+    records = []
+    for name, result in results.items():
+        base = greedy[name]
+        records.append({
+            "model": name,
+            "selector": result["selector"],
+            "objective": result["objective"],
+            "greedy_objective": base["objective"],
+            "out": ", ".join(p for p in base["xi"] if p not in result["xi"]),
+            "in": ", ".join(p for p in result["xi"] if p not in base["xi"]),
+        })
+    return pd.DataFrame(records)
+
+def selection_counts(results):
+    counts = pd.Series(
+        [p for result in results.values() for p in result["xi"]]
+    ).value_counts()
+    return counts.rename_axis("player").reset_index(name="models")
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    start = time.perf_counter()
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    print(f"Deliveries: {len(df)}  batters: {len(bat_all)}  bowlers: {len(bowl_all)}  "
+          f"time: {time.perf_counter() - start:.3f}s")
+
+    stage("STAGE 2: RUNNING MODELS")
+
+    start = time.perf_counter()
+    results = run_all(bat_all, bowl_all)
+    print(f"Models: {len(results)}  time: {time.perf_counter() - start:.3f}s")
+    for name, result in results.items():
+        print(f"  {name:<15} {REGISTRY[name]['source']:<26} XI size: {len(result['xi'])}")
+
+    stage("STAGE 3: XI SIDE BY SIDE")
+
+    table = side_by_side(results)
+    with pd.option_context("display.width", 250, "display.max_columns", None,
+                           "display.max_colwidth", 40):
+        print(table)
+
+    stage("STAGE 4: CONSENSUS")
+
+    print(selection_counts(results).head(20).to_string(index=False))
+
+    stage("STAGE 5: EXACT VS GREEDY SELECTION")
+
+    greedy = run_all(bat_all, bowl_all, GREEDY_MODELS)
+    print(selector_diff(results, greedy).round(3).to_string(index=False))
+
+    table.to_csv("all_models_xi.csv")
@@ -0,0 +1,148 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import stage, phase, load_deliveries
+from registry import REGISTRY, run_model, substitute_scores, uses_columns
+from run_all import load_features
+from winprob import BALLS, WICKETS, RUNS, WICKET, EXTRA, state_rates
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+ER_PRIOR_INNINGS = 5   # innings of the chain's expectation added to every state
+INNINGS = [1, 2]
+
+# the scripts' impact formulas and the run-value columns that replace them
+IMPACT_SUBSTITUTES = {
+    "phase_impact": "rva",
+    "econ_impact": "rva",
+}
+
+# =====================================================
+# EXPECTED RUNS REMAINING
+# =====================================================
+
+def chain_expectancy(rates):
+    # [b, w]: expected runs still to come from the per-ball rates; a wide /
+    # no-ball is one run on the same ball
+    table = np.zeros((BALLS + 1, WICKETS + 1))
+    runs = np.array(RUNS, dtype=float)
+    for b in range(1, BALLS + 1):
+        p = rates[b, 1:]
+        legal = p[:, :len(RUNS)] @ runs + p[:, :len(RUNS)].sum(axis=1) * table[b - 1, 1:]
+        legal += p[:, WICKET] * table[b - 1, :-1]
+        table[b, 1:] = (legal + p[:, EXTRA]) / (1 - p[:, EXTRA])
+    return table
+
+def _states(df):
+    # (balls left, wickets in hand) before and after every delivery
+    after_balls = df["legal_ball"].to_numpy()
+    after_wkts = np.minimum(df["wickets_at_ball"].to_numpy(), WICKETS)
+    before_balls = after_balls - df["legal"].to_numpy()
+    before_wkts = after_wkts - df["is_wicket"].to_numpy()
+    clip = lambda b: np.clip(BALLS - b, 0, BALLS)
+    return (clip(before_balls), WICKETS - before_wkts), (clip(after_balls), WICKETS - after_wkts)
+
+def innings_expectancy(innings):
+    # [b, w]: mean runs the innings still scored from each state, shrunk to
+    # the chain's expectation where few innings passed through
+    model = chain_expectancy(state_rates(innings))
+
+    (b, w), _ = _states(innings)
+    final = innings.groupby("match")["innings_runs"].transform("max").to_numpy()
+    remaining = final - (innings["innings_runs"] - innings["total_runs"]).to_numpy()
+
+    # one observation per innings and state (extras repeat a state)
+    seen = ~pd.DataFrame({"m": innings["match"].to_numpy(), "b": b, "w": w}).duplicated().to_numpy()
+    cell = b[seen] * (WICKETS + 1) + w[seen]
+    size = (BALLS + 1) * (WICKETS + 1)
+    sums = np.bincount(cell, weights=remaining[seen], minlength=size).reshape(BALLS + 1, WICKETS + 1)
+    counts = np.bincount(cell, minlength=size).reshape(BALLS + 1, WICKETS + 1)
+
+    table = (sums + ER_PRIOR_INNINGS * model) / (counts + ER_PRIOR_INNINGS)
+    table[0] = 0.0
+    table[:, 0] = 0.0
+    # more balls or wickets in hand never mean fewer runs to come
+    return np.maximum.accumulate(np.maximum.accumulate(table, axis=1), axis=0)
+
+_CACHE = {}
+
+def run_expectancy(df):
+    # [innings - 1, b, w]: one table per innings, since a chase stops at
+    # its target and a first-innings table would read every chase as
+    # falling short. One set per phase scheme and set of matches.
+    key = (tuple(phase(over) for over in range(BALLS // 6)), tuple(sorted(df["match"].unique())))
+    if key in _CACHE:
+        return _CACHE[key]
+
+    _CACHE[key] = np.stack([innings_expectancy(df[df["innings"] == i]) for i in INNINGS])
+    return _CACHE[key]
+
+# =====================================================
+# RUN VALUE ADDED PER DELIVERY
+# =====================================================
+
+def add_run_value(df, table):
+    # runs scored plus the change in expected runs to come: the batter's
+    # credit and the bowler's debit
+    (b0, w0), (b1, w1) = _states(df)
+    i = df["innings"].to_numpy() - 1
+    df = df.copy()
+    df["er_before"] = table[i, b0, w0]
+    # nothing is to come once a chase reaches its target
+    chased = (df["innings"] == 2).to_numpy() & (df["innings_runs"] >= df["target"]).to_numpy()
+    df["er_after"] = np.where(chased, 0.0, table[i, b1, w1])
+    df["rva"] = df["total_runs"] + df["er_after"] - df["er_before"]
+    return df
+
+def run_value_spec(spec):
+    # the spec with run value added in place of the impact formulas
+    return substitute_scores(spec, IMPACT_SUBSTITUTES)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: EXPECTED RUNS TABLE")
+
+    df = load_deliveries()
+    start = time.perf_counter()
+    table = run_expectancy(df)
+    print(f"Table: {table.shape}  time: {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    run_expectancy(df)
+    print(f"Cached lookup: {time.perf_counter() - start:.4f}s")
+
+    balls = [120, 96, 72, 60, 48, 36, 24, 12, 6]
+    for i, name in zip(INNINGS, ["first innings", "chases"]):
+        print(f"\nExpected runs remaining by balls left (rows) and wickets in hand: {name}")
+        print(pd.DataFrame(table[i - 1][balls][:, [10, 8, 6, 4, 2]], index=balls,
+                           columns=[10, 8, 6, 4, 2]).round(1).to_string())
+
+    stage("STAGE 2: RUN VALUE ADDED")
+
+    start = time.perf_counter()
+    df = add_run_value(df, table)
+    print(f"RVA for {len(df)} deliveries: {time.perf_counter() - start:.4f}s")
+    print(f"Mean RVA per ball: first innings {df.loc[df['innings'] == 1, 'rva'].mean():.3f}  "
+          f"chases {df.loc[df['innings'] == 2, 'rva'].mean():.3f}")
+
+    bat_all, bowl_all = load_features(df)
+    bat = REGISTRY["Phase_Impact"]["bat_derive"](bat_all.copy())
+    bowl = REGISTRY["Structural"]["bowl_derive"](bowl_all.copy())
+    print(f"\nrva vs phase_impact  corr: {bat['rva'].corr(bat['phase_impact']):.3f}")
+    print(bat[["matches", "runs", "SR", "rva", "rva_per_match", "phase_impact"]]
+          .sort_values("rva", ascending=False).head(15).round(2).to_string())
+    print(f"\nrva vs econ_impact  corr: {bowl['rva'].corr(bowl['econ_impact']):.3f}")
+    print(bowl[["matches", "wickets", "economy", "rva", "rva_per_match", "econ_impact"]]
+          .sort_values("rva", ascending=False).head(15).round(2).to_string())
+
+    stage("STAGE 3: MODELS WITH RUN VALUE IN PLACE OF THE IMPACT FORMULAS")
+
+    for name, spec in REGISTRY.items():
+        if not uses_columns(spec, IMPACT_SUBSTITUTES):
+            continue
+        base = run_model(spec, bat_all, bowl_all)["xi"]
+        valued = run_model(run_value_spec(spec), bat_all, bowl_all)["xi"]
+        print(f"  {name:<15} out: {', '.join(p for p in base if p not in valued) or '-'}")
+        print(f"  {'':<15} in:  {', '.join(p for p in valued if p not in base) or '-'}")
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, load_deliveries, batting_table, bowling_table
+from features import ratio, batting_features, bowling_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+MAX_PRIOR_STRENGTH = 1e6   # prior in balls when players look identical
+
+# output column: (count column, balls column, squares column or None, scale)
+# proportions (no squares column) get a beta prior, run rates a gamma prior
+
+def _bat_specs():
+    specs = {
+        "SR": ("runs", "balls", "runs_sq", 100),
+        "dot_pct": ("dots", "balls", None, 1),
+        "boundary_pct": ("boundaries", "balls", None, 1),
+    }
+    for p in PHASES:
+        specs[f"SR_{p}"] = (f"runs_{p}", f"balls_{p}", f"runs_sq_{p}", 100)
+        specs[f"dot_pct_{p}"] = (f"dots_{p}", f"balls_{p}", None, 1)
+        specs[f"boundary_pct_{p}"] = (f"boundaries_{p}", f"balls_{p}", None, 1)
+    return specs
+
+def _bowl_specs():
+    specs = {
+        "economy": ("runs", "balls", "runs_sq", 6),
+        "wkt_rate": ("wickets", "balls", None, 6),
+        "dot_pct": ("dots", "balls", None, 1),
+        "legal_dot_pct": ("legal_dots", "balls", None, 1),
+        "wicket_rate": ("legal_wickets", "balls", None, 1),
+    }
+    for p in PHASES + ["Middle"]:
+        specs[f"econ_{p}"] = (f"legal_runs_{p}", f"balls_{p}", f"legal_runs_sq_{p}", 6)
+        specs[f"wkt_rate_{p}"] = (f"legal_wickets_{p}", f"balls_{p}", None, 6)
+        specs[f"dot_pct_{p}"] = (f"legal_dots_{p}", f"balls_{p}", None, 1)
+    return specs
+
+# =====================================================
+# EMPIRICAL-BAYES PRIORS
+# =====================================================
+
+def _with_middle(tot):
+    tot = tot.copy()
+    for c in ["balls", "legal_runs", "legal_runs_sq", "legal_wickets", "legal_dots"]:
+        if f"{c}_Early_Middle" in tot.columns:
+            tot[f"{c}_Middle"] = tot[f"{c}_Early_Middle"] + tot[f"{c}_Late_Middle"]
+    return tot
+
+def estimate_priors(x, n, sq=None):
+    # Buhlmann-Straub moments per column of (players x metrics) totals.
+    # Returns prior mean per ball and prior strength in balls.
+    N = n.sum(axis=0)
+    K = (n > 0).sum(axis=0)
+    m = ratio(x.sum(axis=0), N)
+
+    r = ratio(x, n)
+    between = np.sum(n * (r - m)**2, axis=0)
+    spread = N - ratio(np.sum(n**2, axis=0), N)
+
+    if sq is None:
+        within = m * (1 - m)
+    else:
+        within = ratio(np.sum(sq - ratio(x**2, n), axis=0), N - K)
+
+    tau2 = ratio(between - (K - 1) * within, spread)
+    strength = np.where(tau2 > 0, ratio(within, tau2), MAX_PRIOR_STRENGTH)
+    if sq is None:
+        # beta(a, b) with a + b = m(1 - m) / tau2 - 1
+        strength = np.where(tau2 > 0, strength - 1, strength)
+
+    return m, np.clip(strength, 0, MAX_PRIOR_STRENGTH)
+
+def shrink(tot, specs):
+    names = list(specs)
+    x = np.column_stack([tot[specs[c][0]] for c in names]).astype(float)
+    n = np.column_stack([tot[specs[c][1]] for c in names]).astype(float)
+    scale = np.array([specs[c][3] for c in names], dtype=float)
+
+    shrunk = np.empty_like(x)
+    means = np.empty(len(names))
+    strengths = np.empty(len(names))
+
+    beta = np.array([specs[c][2] is None for c in names])
+    for is_beta in (True, False):
+        cols = np.flatnonzero(beta == is_beta)
+        if not len(cols):
+            continue
+        sq = None if is_beta else np.column_stack(
+            [tot[specs[names[i]][2]] for i in cols]
+        ).astype(float)
+        m, k = estimate_priors(x[:, cols], n[:, cols], sq)
+        shrunk[:, cols] = (x[:, cols] + k*m) / (n[:, cols] + k)
+        means[cols] = m
+        strengths[cols] = k
+
+    priors = pd.DataFrame({
+        "metric": names,
+        "prior": np.where(beta, "beta", "gamma"),
+        "prior_mean": means * scale,
+        "prior_balls": strengths,
+        "alpha_or_shape": strengths * means,
+        "beta_or_rate": np.where(beta, strengths * (1 - means), strengths),
+    })
+
+    return pd.DataFrame(shrunk * scale, index=tot.index, columns=names), priors
+
+def shrink_batting(tot):
+    return shrink(tot, _bat_specs())
+
+def shrink_bowling(tot):
+    return shrink(_with_middle(tot), _bowl_specs())
+
+# =====================================================
+# SHRUNK FEATURE FRAMES (drop-in for the raw ones)
+# =====================================================
+
+def shrunk_batting_features(tot):
+    bat = batting_features(tot)
+    shrunk, _ = shrink_batting(tot)
+    bat[shrunk.columns] = shrunk
+    return bat
+
+def shrunk_bowling_features(tot):
+    bowl = bowling_features(tot)
+    shrunk, _ = shrink_bowling(tot)
+    bowl[shrunk.columns] = shrunk
+    bowl["inv_economy"] = ratio(1, bowl["economy"])
+    # wickets per match from the shrunk per-over rate
+    bowl["wpm"] = ratio(bowl["wkt_rate"] * bowl["overs"], tot["played"])
+    return bowl
+
+if __name__ == "__main__":
+
+    from registry import MODELS
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+    bat_tot = bat_tab.frame(bat_tab.totals())
+    bowl_tot = bowl_tab.frame(bowl_tab.totals())
+
+    stage("STAGE 2: PHASE PRIORS")
+
+    bat_shrunk, bat_priors = shrink_batting(bat_tot)
+    bowl_shrunk, bowl_priors = shrink_bowling(bowl_tot)
+    print(bat_priors.to_string(index=False))
+    print(bowl_priors.to_string(index=False))
+
+    stage("STAGE 3: LARGEST SHRINKAGE NEAR THE FLOORS")
+
+    bat_raw = batting_features(bat_tot)
+    near = bat_raw[(bat_raw["balls"] >= 40) & (bat_raw["balls"] < 100)]
+    moved = pd.DataFrame({
+        "balls": near["balls"],
+        "SR": near["SR"],
+        "SR_shrunk": bat_shrunk.loc[near.index, "SR"],
+    })
+    moved["delta"] = moved["SR_shrunk"] - moved["SR"]
+    print(moved.reindex(moved["delta"].abs().sort_values(ascending=False).index).head(10))
+
+    bowl_raw = bowling_features(bowl_tot)
+    near = bowl_raw[(bowl_raw["overs"] >= 8) & (bowl_raw["overs"] < 14)]
+    moved = pd.DataFrame({
+        "overs": near["overs"],
+        "economy": near["economy"],
+        "economy_shrunk": bowl_shrunk.loc[near.index, "economy"],
+        "wkt_rate": near["wkt_rate"],
+        "wkt_rate_shrunk": bowl_shrunk.loc[near.index, "wkt_rate"],
+    })
+    print(moved.sort_values("overs").head(10))
+
+    stage("STAGE 4: RAW VS SHRUNK XI")
+
+    bat_eb = shrunk_batting_features(bat_tot)
+    bowl_eb = shrunk_bowling_features(bowl_tot)
+
+    for name, model in MODELS.items():
+        raw_xi = model(bat_raw, bowl_raw)["xi"]
+        eb_xi = model(bat_eb, bowl_eb)["xi"]
+        print(f"\n{name}")
+        print("  out:", [p for p in raw_xi if p not in eb_xi])
+        print("  in: ", [p for p in eb_xi if p not in raw_xi])
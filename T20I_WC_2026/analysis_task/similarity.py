@@ -0,0 +1,233 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, load_deliveries
+from normalize import normalize
+from registry import REGISTRY, mask
+from run_all import load_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+SIMILARITY_MODEL = "Advanced_Elite"   # role labels for like-for-like queries
+
+# per-phase metrics exported to batting_metrics.csv / bowling_metrics.csv
+PROFILE_METRICS = {
+    "bat": ["SR", "dot_pct", "boundary_pct", "rotation_pct"],
+    "bowl": ["econ", "wkt_rate", "dot_pct", "share"],
+}
+# measured in every phase, unlike the rates, which need balls there
+VOLUME_METRICS = {"share"}
+PROFILE_FILTERS = {
+    "bat": [("balls", ">=", 30)],
+    "bowl": [("balls", ">=", 36)],
+}
+
+NEIGHBOURS = 10
+LEAF_SIZE = 64
+
+def profile_columns(side):
+    return [f"{metric}_{p}" for metric in PROFILE_METRICS[side] for p in PHASES]
+
+def phase_profiles(frame, side):
+    # features.ratio() gives 0 for a phase with no balls; the rates there
+    # are NaN instead, so they sit at the mean rather than at a perfect
+    # economy or dot rate
+    profile = frame[profile_columns(side)].copy()
+    for p in PHASES:
+        unplayed = (frame[f"balls_{p}"] == 0).to_numpy()
+        for metric in PROFILE_METRICS[side]:
+            if metric not in VOLUME_METRICS:
+                profile.loc[unplayed, f"{metric}_{p}"] = np.nan
+    return profile
+
+# =====================================================
+# KD-TREE
+# =====================================================
+
+class KDTree:
+    # Median split on the widest dimension until a node holds at most
+    # leaf_size rows. Rows are stored in leaf order so every leaf is one
+    # contiguous block with a tight bounding box. A query is two numpy
+    # passes instead of a Python walk down the tree: the nearest few leaf
+    # boxes give a radius holding k rows, then every leaf whose box comes
+    # inside that radius is scanned at once.
+
+    def __init__(self, X, leaf_size=LEAF_SIZE):
+        X = np.asarray(X, dtype=float)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(X))
+        self.leaves = []   # (start, end) into the reordered rows
+        if len(X):
+            self._build(X, 0, len(X))
+        self.points = X[self.order]
+        self.points32 = self.points.astype(np.float32)
+        self.norms = (self.points**2).sum(axis=1)
+
+        starts = np.array([s for s, _ in self.leaves], dtype=int)
+        self.sizes = np.array([e - s for s, e in self.leaves], dtype=int)
+        self.leaf_of = np.repeat(np.arange(len(self.leaves)), self.sizes)
+        self.lo = np.minimum.reduceat(self.points, starts) if len(X) else np.empty((0, X.shape[1]))
+        self.hi = np.maximum.reduceat(self.points, starts) if len(X) else np.empty((0, X.shape[1]))
+
+    def _build(self, X, start, end):
+        rows = self.order[start:end]
+        spread = np.ptp(X[rows], axis=0)
+        dim = int(np.argmax(spread))
+        if end - start <= self.leaf_size or spread[dim] == 0:
+            self.leaves.append((start, end))
+            return
+
+        mid = (end - start) // 2
+        self.order[start:end] = rows[np.argpartition(X[rows, dim], mid)]
+        self._build(X, start, start + mid)
+        self._build(X, start + mid, end)
+
+    def _scan(self, x, rows, k):
+        # the k nearest rows plus any tied with the k-th, so the caller can
+        # break ties by row
+        d2 = ((self.points[rows] - x)**2).sum(axis=1)
+        if len(rows) > k:
+            keep = d2 <= np.partition(d2, k - 1)[k - 1]
+            rows, d2 = rows[keep], d2[keep]
+        return rows, d2
+
+    def _screen(self, x, rows, k):
+        # |p|^2 - 2 p.x in float32 to shortlist rows, then exact distances
+        # on the shortlist; the slack covers the float32 rounding
+        if len(rows) <= 4 * k:
+            return self._scan(x, rows, k)
+        approx = self.norms[rows] - 2 * (self.points32[rows] @ x.astype(np.float32))
+        cut = np.partition(approx, k - 1)[k - 1]
+        slack = 1e-5 * (x @ x + self.norms[rows].max() + 1)
+        return self._scan(x, rows[approx <= cut + slack], k)
+
+    def query(self, x, k=NEIGHBOURS):
+        # (distances, rows) of the k nearest rows to x, nearest first
+        x = np.asarray(x, dtype=float)
+        k = min(k, len(self.points))
+        if not k:
+            return np.empty(0), np.empty(0, dtype=int)
+
+        gap = np.maximum(self.lo - x, 0) + np.maximum(x - self.hi, 0)
+        bound = (gap * gap).sum(axis=1)
+
+        # enough of the nearest leaves to hold k rows
+        near = np.argsort(bound)
+        near = near[:np.searchsorted(np.cumsum(self.sizes[near]), k) + 1]
+        rows = np.concatenate([np.arange(*self.leaves[leaf]) for leaf in near])
+        _, d2 = self._scan(x, rows, k)
+        radius = d2.max()
+
+        rows = np.flatnonzero((bound <= radius)[self.leaf_of])
+        rows, d2 = self._screen(x, rows, k)
+        nearest = np.lexsort((self.order[rows], d2))[:k]
+        return np.sqrt(d2[nearest]), self.order[rows[nearest]]
+
+# =====================================================
+# SIMILARITY INDEX
+# =====================================================
+
+class SimilarityIndex:
+    # One tree over every player's z-scored phase profile, plus one per
+    # role for like-for-like replacements. NaN metrics sit at the mean
+    # (normalize's NaN policy).
+
+    def __init__(self, frame, columns, roles=None, leaf_size=LEAF_SIZE):
+        self.players = frame.index
+        self.position = {player: i for i, player in enumerate(frame.index)}
+        self.Z = normalize(frame[columns], "z").to_numpy()
+        self.roles = roles.reindex(frame.index) if roles is not None else None
+        labels = self.roles.to_numpy() if roles is not None else None
+
+        self.trees = {None: (np.arange(len(frame)), KDTree(self.Z, leaf_size))}
+        if labels is not None:
+            for role in self.roles.dropna().unique():
+                rows = np.flatnonzero(labels == role)
+                self.trees[role] = (rows, KDTree(self.Z[rows], leaf_size))
+
+    def neighbours(self, player, k=NEIGHBOURS, same_role=False):
+        # (rows, distances) of the k players nearest to `player`
+        i = self.position[player]
+        role = self.roles.iat[i] if same_role and self.roles is not None else None
+        rows, tree = self.trees[role]
+
+        # one extra neighbour for the player themselves
+        dist, found = tree.query(self.Z[i], k + 1)
+        found = rows[found]
+        keep = found != i
+        return found[keep][:k], dist[keep][:k]
+
+    def most_like(self, player, k=NEIGHBOURS, same_role=False):
+        found, dist = self.neighbours(player, k, same_role)
+        result = pd.DataFrame({"distance": dist}, index=self.players[found])
+        if self.roles is not None:
+            result["role"] = self.roles.to_numpy()[found]
+        return result
+
+    def replacement(self, player, k=NEIGHBOURS):
+        return self.most_like(player, k, same_role=True)
+
+def similarity_indexes(bat_all, bowl_all, model=SIMILARITY_MODEL):
+    spec = REGISTRY[model]
+    indexes = {}
+    for side, full in (("bat", bat_all), ("bowl", bowl_all)):
+        frame = full.copy()
+        if spec.get(f"{side}_roles"):
+            frame = spec[f"{side}_roles"](frame)
+        frame = frame[mask(frame, PROFILE_FILTERS[side])]
+        roles = frame["role"] if "role" in frame else None
+        profile = phase_profiles(frame, side)
+        indexes[side] = SimilarityIndex(profile, profile.columns, roles)
+    return indexes
+
+def time_queries(index, k=NEIGHBOURS, same_role=False):
+    # mean seconds per query over every player in the index
+    start = time.perf_counter()
+    for player in index.players:
+        index.neighbours(player, k, same_role)
+    return (time.perf_counter() - start) / max(len(index.players), 1)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+
+    start = time.perf_counter()
+    indexes = similarity_indexes(bat_all, bowl_all)
+    print(f"Indexes built: {time.perf_counter() - start:.3f}s")
+
+    for side, index in indexes.items():
+        full = bat_all if side == "bat" else bowl_all
+        volume = "runs" if side == "bat" else "wickets"
+
+        stage(f"STAGE 2: MOST SIMILAR ({side}, {len(index.players)} players, "
+              f"{index.Z.shape[1]} phase metrics)")
+
+        for player in full.loc[index.players, volume].nlargest(3).index:
+            print(f"\n{player} ({index.roles[player]}): {NEIGHBOURS} most like")
+            print(index.most_like(player).round(3).to_string())
+            print(f"\n{player}: like-for-like replacements")
+            print(index.replacement(player, 5).round(3).to_string())
+
+        print(f"\nMean query: {time_queries(index) * 1e3:.3f} ms  "
+              f"same role: {time_queries(index, same_role=True) * 1e3:.3f} ms")
+
+    stage("STAGE 3: SCALE CHECK")
+
+    # archive-sized pool: real batting profiles resampled with jitter
+    rng = np.random.default_rng(0)
+    Z = indexes["bat"].Z
+    X = Z[rng.integers(0, len(Z), 50_000)] + rng.normal(scale=0.25, size=(50_000, Z.shape[1]))
+    start = time.perf_counter()
+    tree = KDTree(X)
+    print(f"  50,000 x {X.shape[1]}: built in {time.perf_counter() - start:.3f}s")
+    queries = X[rng.integers(0, len(X), 500)]
+    start = time.perf_counter()
+    for x in queries:
+        tree.query(x, NEIGHBOURS + 1)
+    print(f"  mean query: {(time.perf_counter() - start) / len(queries) * 1e3:.3f} ms")
@@ -0,0 +1,195 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, phase, load_deliveries
+from registry import SPINNER_LIST
+from run_all import load_features, run_all
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+SIM_MODEL = "Advanced_Elite"   # the selected final XI
+SIM_INNINGS = 100_000
+SIM_SEED = 0
+
+OVERS = 20
+XI_WICKETS = 10
+
+# ball outcomes: runs off a legal ball, a wicket, or a wide / no-ball
+OUTCOMES = ["0", "1", "2", "3", "4", "6", "W", "X"]
+WICKET = OUTCOMES.index("W")
+EXTRA = OUTCOMES.index("X")
+BOWLER_TYPES = ["Pace", "Spinner"]
+
+PRIOR_BALLS = 30   # balls of the league (bowler type, phase) mix added to every batter
+
+PHASE_OF_OVER = np.array([PHASES.index(phase(over)) for over in range(OVERS)])
+
+# =====================================================
+# OUTCOME DISTRIBUTIONS
+# =====================================================
+
+def outcome_codes(df):
+    # 5s fold into 4s; a wicket off a wide or no-ball counts as the extra.
+    # The runs completed on a wicket ball are not in the code; the
+    # simulation adds outcome_tables' mean runs per wicket ball instead.
+    runs = df["total_runs"].clip(upper=6).replace(5, 4)
+    codes = runs.map({0: 0, 1: 1, 2: 2, 3: 3, 4: 4, 6: 5}).to_numpy()
+    codes = np.where(df["is_wicket"], WICKET, codes)
+    return np.where(df["legal"], codes, EXTRA)
+
+def outcome_tables(df):
+    # per (batter, bowler type, phase) outcome probabilities, shrunk to the
+    # league mix for that bowler type and phase; the last row is the league
+    # itself, for batters with no balls faced. Also the mean runs of a wide /
+    # no-ball and of a wicket ball, and the share of wickets that are the
+    # non-striker's (run outs backing up).
+    batters = pd.Index(sorted(df["batter"].unique()))
+    b = batters.get_indexer(df["batter"])
+    t = df["bowler"].isin(SPINNER_LIST).to_numpy().astype(int)
+    p = pd.Index(PHASES).get_indexer(df["phase"])
+    k = len(OUTCOMES)
+
+    cell = ((b * len(BOWLER_TYPES) + t) * len(PHASES) + p) * k + outcome_codes(df)
+    counts = np.bincount(cell, minlength=len(batters) * len(BOWLER_TYPES) * len(PHASES) * k)
+    counts = counts.reshape(len(batters), len(BOWLER_TYPES), len(PHASES), k).astype(float)
+
+    league = counts.sum(axis=0)
+    league /= league.sum(axis=2, keepdims=True)
+    probs = (counts + PRIOR_BALLS * league) / (counts.sum(axis=3, keepdims=True) + PRIOR_BALLS)
+
+    extra_runs = df.loc[~df["legal"], "total_runs"].mean()
+    wickets = df[df["is_wicket"]]
+    wicket_runs = wickets.loc[wickets["legal"], "total_runs"].mean()
+    non_striker_out = (wickets["player_out"] == wickets["non_striker"]).mean()
+    return batters, np.concatenate([probs, league[None]]), extra_runs, wicket_runs, non_striker_out
+
+def spin_share(df):
+    # share of legal balls bowled by spinners in each over of the innings
+    legal = df[df["legal"]]
+    spin = legal["bowler"].isin(SPINNER_LIST).groupby(legal["over"]).mean()
+    return spin.reindex(range(OVERS), fill_value=0).to_numpy()
+
+def batting_order(xi, bat_all):
+    # the XI by average batting position; players with no counted innings
+    # (position 0) go last
+    position = bat_all["batting_position"].reindex(xi).replace(0, np.nan)
+    return list(position.sort_values(na_position="last", kind="stable").index)
+
+# =====================================================
+# VECTORIZED INNINGS
+# =====================================================
+
+def simulate_innings(order, tables, spin, n=SIM_INNINGS, seed=SIM_SEED, target=None):
+    # n first innings (or chases of `target`) of one batting order at once.
+    # State is one array entry per innings; each step bowls one delivery
+    # in every innings still live. Orders shorter than eleven are padded
+    # with league-average batters.
+    batters, probs, extra_runs, wicket_runs, non_striker_out = tables
+    rows = batters.get_indexer(order)
+    rows = np.where(rows < 0, len(batters), rows)
+    rows = np.r_[rows, np.full(max(0, XI_WICKETS + 1 - len(rows)), len(batters))]
+    cum = np.cumsum(probs[rows], axis=3)   # (order, type, phase, outcome)
+    cum[..., -1] = 1.0
+
+    runs_of = np.array([0, 1, 2, 3, 4, 6, wicket_runs, extra_runs])
+    rng = np.random.default_rng(seed)
+    spin_over = (rng.random((n, OVERS)) < spin).astype(int)
+
+    score = np.zeros(n)
+    wickets = np.zeros(n, dtype=int)
+    balls = np.zeros(n, dtype=int)
+    striker = np.zeros(n, dtype=int)
+    non_striker = np.ones(n, dtype=int)
+    live = np.arange(n)
+
+    while len(live):
+        over = balls[live] // 6
+        c = cum[striker[live], spin_over[live, over], PHASE_OF_OVER[over]]
+        code = (rng.random(len(live))[:, None] > c).sum(axis=1)
+
+        score[live] += runs_of[code]
+        legal = code != EXTRA
+        balls[live] += legal
+
+        # the next batter replaces whoever is out, usually the striker
+        out = live[code == WICKET]
+        wickets[out] += 1
+        backing_up = rng.random(len(out)) < non_striker_out
+        striker[out[~backing_up]] = wickets[out[~backing_up]] + 1
+        non_striker[out[backing_up]] = wickets[out[backing_up]] + 1
+
+        # odd runs, then the end of an over, change ends
+        swap = (code == 1) | (code == 3)
+        swap ^= legal & (balls[live] % 6 == 0)
+        s = live[swap]
+        striker[s], non_striker[s] = non_striker[s], striker[s]
+
+        done = (balls[live] >= OVERS * 6) | (wickets[live] >= XI_WICKETS)
+        if target is not None:
+            done |= score[live] >= target
+        live = live[~done]
+
+    return score, wickets, balls
+
+def innings_summary(score, wickets, balls, target=None):
+    summary = {
+        "expected_total": score.mean(),
+        "sd": score.std(),
+        "p10": np.percentile(score, 10),
+        "p90": np.percentile(score, 90),
+        "wickets": wickets.mean(),
+        "all_out": (wickets >= XI_WICKETS).mean(),
+    }
+    if target is not None:
+        summary["chase_won"] = (score >= target).mean()
+    return summary
+
+def compare_xis(results, bat_all, tables, spin, n=SIM_INNINGS, seed=SIM_SEED, target=None):
+    # same seed for every XI, so differences are not sampling noise
+    records = {}
+    for name, result in results.items():
+        order = batting_order(result["xi"], bat_all)
+        records[name] = innings_summary(*simulate_innings(order, tables, spin, n, seed, target), target)
+    return pd.DataFrame(records).T.sort_values("expected_total", ascending=False)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    tables = outcome_tables(df)
+    spin = spin_share(df)
+    print(f"Batters: {len(tables[0])}  outcome cells: {tables[1][:-1].size}  "
+          f"runs per wide/no-ball: {tables[2]:.2f}  per wicket ball: {tables[3]:.3f}  "
+          f"non-striker out: {tables[4]:.3f}")
+
+    results = run_all(bat_all, bowl_all)
+    order = batting_order(results[SIM_MODEL]["xi"], bat_all)
+
+    stage(f"STAGE 2: {SIM_INNINGS:,} INNINGS OF THE {SIM_MODEL} XI")
+
+    print("Batting order: " + ", ".join(order))
+    start = time.perf_counter()
+    score, wickets, balls = simulate_innings(order, tables, spin)
+    print(f"Time: {time.perf_counter() - start:.3f}s")
+    print(pd.Series(innings_summary(score, wickets, balls)).round(3).to_string())
+
+    stage("STAGE 3: SELECTED XI AGAINST THE OTHER MODELS' XIs")
+
+    start = time.perf_counter()
+    table = compare_xis(results, bat_all, tables, spin)
+    print(f"XIs: {len(table)}  time: {time.perf_counter() - start:.3f}s")
+    print(table.round(3).to_string())
+
+    stage("STAGE 4: CHASING THE MEDIAN FIRST-INNINGS TOTAL")
+
+    target = int(df[df["innings"] == 1].groupby("match")["total_runs"].sum().median()) + 1
+    print(f"Target: {target}")
+    table = compare_xis(results, bat_all, tables, spin, target=target)
+    print(table.round(3).to_string())
+
+    table.to_csv("simulated_xis.csv")
@@ -0,0 +1,230 @@
+import os
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool
+
+from aggregates import (
+    PHASES, stage, match_files, read_match, deliveries_frame,
+    batting_table, bowling_table,
+)
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+SKETCH_K = 200
+MIN_PHASE_BALLS = 12  # player phase totals below this are too noisy
+
+BAT_METRICS = {
+    "SR": ("runs", "balls", 100),
+    "dot_pct": ("dots", "balls", 1),
+    "boundary_pct": ("boundaries", "balls", 1),
+    "rotation_pct": ("rotation", "balls", 1),
+}
+
+BOWL_METRICS = {
+    "economy": ("legal_runs", "balls", 6),
+    "wkt_rate": ("legal_wickets", "balls", 6),
+    "dot_pct": ("legal_dots", "balls", 1),
+}
+
+# =====================================================
+# KLL QUANTILE SKETCH
+# =====================================================
+
+class KLLSketch:
+    # Karnin-Lang-Liberty sketch: level h holds items of weight 2**h and
+    # overflowing levels are compacted by keeping every other sorted item.
+    # Space is O(k) regardless of how many values are streamed in.
+
+    def __init__(self, k=SKETCH_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+        self._cdf = None
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * (2/3)**depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(self.levels[h])
+                even = len(items) - len(items) % 2
+                offset = self.rng.integers(2)
+
+                self.levels[h + 1] = np.concatenate(
+                    [self.levels[h + 1], items[offset:even:2]]
+                )
+                self.levels[h] = items[even:]
+            h += 1
+        self._cdf = None
+
+    def update(self, value):
+        self.update_many([value])
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        if self._cdf is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([
+                np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)
+            ])
+            order = np.argsort(items, kind="stable")
+            self._cdf = (items[order], np.cumsum(weights[order]))
+        return self._cdf
+
+    def rank(self, values):
+        # mid-rank percentile in [0, 1], ties split evenly
+        items, cum = self._weighted()
+        values = np.asarray(values, dtype=float)
+        if not len(items):
+            return np.full(values.shape, np.nan)
+
+        total = cum[-1]
+        cum0 = np.concatenate([[0.0], cum])
+        below = cum0[np.searchsorted(items, values, side="left")]
+        at_or_below = cum0[np.searchsorted(items, values, side="right")]
+        return (below + at_or_below) / 2 / total
+
+    def quantile(self, qs):
+        items, cum = self._weighted()
+        qs = np.asarray(qs, dtype=float)
+        if not len(items):
+            return np.full(qs.shape, np.nan)
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        return items[np.clip(idx, 0, len(items) - 1)]
+
+    def size(self):
+        return sum(len(level) for level in self.levels)
+
+# =====================================================
+# (PHASE, ROLE, METRIC) SKETCHES
+# =====================================================
+
+def new_sketches(k=SKETCH_K, seed=0):
+    keys = [(p, "bat", m) for p in PHASES for m in BAT_METRICS] + \
+           [(p, "bowl", m) for p in PHASES for m in BOWL_METRICS]
+    return {key: KLLSketch(k, seed=seed + i) for i, key in enumerate(keys)}
+
+def _player_samples(totals, metrics):
+    # phase rates of players with enough balls in the phase, from a frame
+    # of per-player totals
+    for p in PHASES:
+        keep = totals[f"balls_{p}"] >= MIN_PHASE_BALLS
+        for metric, (num, den, scale) in metrics.items():
+            values = totals.loc[keep, f"{num}_{p}"] / totals.loc[keep, f"{den}_{p}"] * scale
+            yield p, metric, values.to_numpy()
+
+def update_sketches(sketches, bat_totals, bowl_totals):
+    # one sample per (player, phase) with enough balls in the phase
+    for p, metric, values in _player_samples(bat_totals, BAT_METRICS):
+        sketches[(p, "bat", metric)].update_many(values)
+    for p, metric, values in _player_samples(bowl_totals, BOWL_METRICS):
+        sketches[(p, "bowl", metric)].update_many(values)
+    return sketches
+
+def merge_sketches(into, other):
+    for key, sketch in other.items():
+        if key in into:
+            into[key].merge(sketch)
+        else:
+            into[key] = sketch
+    return into
+
+def percentile_rank(sketches, phase_name, role, metric, values):
+    # where players' phase rates sit among all players' (with enough balls)
+    return sketches[(phase_name, role, metric)].rank(values)
+
+# =====================================================
+# PARALLEL AGGREGATION
+# =====================================================
+
+def _aggregate_chunk(files):
+    rows = []
+    for file_path in files:
+        rows.extend(read_match(file_path))
+    df = deliveries_frame(rows)
+
+    bat_tab = batting_table(df)
+    bowl_tab = bowling_table(df)
+    return bat_tab.frame(bat_tab.totals()), bowl_tab.frame(bowl_tab.totals())
+
+def _sketch_shard(args):
+    bat_totals, bowl_totals, k, seed = args
+    return update_sketches(new_sketches(k, seed), bat_totals, bowl_totals)
+
+def _shards(totals, n):
+    return [totals.iloc[rows] for rows in np.array_split(np.arange(len(totals)), n)]
+
+def aggregate(files=None, workers=None, chunk_size=8, k=SKETCH_K):
+    # One pass over the match files: workers total their chunk of matches
+    # per player, the partial totals are summed, and each worker then
+    # sketches a shard of the players; the shards' sketches are merged.
+    files = match_files() if files is None else list(files)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    pool = Pool(min(workers, len(chunks))) if workers > 1 and len(chunks) > 1 else None
+    run = pool.map if pool else lambda fn, jobs: [fn(job) for job in jobs]
+    try:
+        parts = run(_aggregate_chunk, chunks)
+        bat_totals = pd.concat([b for b, _ in parts]).groupby(level=0).sum()
+        bowl_totals = pd.concat([b for _, b in parts]).groupby(level=0).sum()
+
+        jobs = [(bat, bowl, k, 1000 * i) for i, (bat, bowl) in
+                enumerate(zip(_shards(bat_totals, len(chunks)), _shards(bowl_totals, len(chunks))))]
+        sketch_parts = run(_sketch_shard, jobs)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    sketches = sketch_parts[0]
+    for part in sketch_parts[1:]:
+        merge_sketches(sketches, part)
+    return bat_totals, bowl_totals, sketches
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: AGGREGATING WITH SKETCHES")
+
+    bat_totals, bowl_totals, sketches = aggregate()
+    print("Batters:", len(bat_totals), " bowlers:", len(bowl_totals))
+    for key, sketch in list(sketches.items())[:8]:
+        print(key, "n =", sketch.n, "stored =", sketch.size())
+
+    stage("STAGE 2: SKETCH VS EXACT PERCENTILES")
+
+    for p, metric, values in _player_samples(bat_totals, BAT_METRICS):
+        if metric != "SR":
+            continue
+        probe = np.quantile(values, [0.1, 0.25, 0.5, 0.75, 0.9])
+        exact_at = [(np.sum(values < v) + np.sum(values <= v)) / 2 / len(values) for v in probe]
+        approx = percentile_rank(sketches, p, "bat", "SR", probe)
+        print(f"{p:<13} SR probes {np.round(probe,1)}")
+        print(f"{'':<13} exact  {np.round(exact_at,3)}")
+        print(f"{'':<13} sketch {np.round(approx,3)}")
@@ -0,0 +1,182 @@
+import time
+import bisect
+import numpy as np
+
+from aggregates import stage, load_deliveries
+from registry import REGISTRY, prepare
+from run_all import load_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+SKYLINE_MODEL = "Advanced_Elite"    # role labels and eligibility
+
+# {side: {metric: +1 higher is better / -1 lower is better}}
+SKYLINE_METRICS = {
+    "bat": {"SR": 1, "dot_pct": -1, "consistency": 1},
+    "bowl": {"economy": -1, "wkt_rate": 1, "dot_pct": 1},
+}
+
+BLOCK_SIZE = 1024    # rows compared at once in the block-nested loop
+
+# =====================================================
+# SKYLINE (larger is better in every column)
+# =====================================================
+#
+# a dominates b: a >= b everywhere and a > b somewhere. Equal rows do not
+# dominate each other, so duplicates on the front are all kept.
+
+def _skyline_1d(X):
+    return X[:, 0] == X[:, 0].max()
+
+def _skyline_2d(X):
+    # sort by x then y, both descending; a point survives if it has the
+    # top y of its x group and beats every y seen at a larger x
+    x, y = X[:, 0], X[:, 1]
+    order = np.lexsort((-y, -x))
+    xs, ys = x[order], y[order]
+
+    starts = np.flatnonzero(np.r_[True, xs[1:] != xs[:-1]])
+    group = np.cumsum(np.r_[True, xs[1:] != xs[:-1]]) - 1
+    group_top = ys[starts]
+    before = np.r_[-np.inf, np.maximum.accumulate(group_top)[:-1]]
+
+    keep = np.zeros(len(X), dtype=bool)
+    keep[order] = (ys == group_top[group]) & (group_top[group] > before[group])
+    return keep
+
+def _skyline_3d(X):
+    # sweep x descending, one group of equal x at a time, against a
+    # staircase of the (y, z) front of all larger x: y ascending, z
+    # descending, so the first step at or right of y has the largest z
+    order = np.lexsort((-X[:, 2], -X[:, 1], -X[:, 0]))
+    xs, ys, zs = (X[order, c].tolist() for c in range(3))
+
+    stair_y, stair_z = [], []
+    keep = np.zeros(len(X), dtype=bool)
+    a = 0
+    while a < len(xs):
+        b = a
+        while b < len(xs) and xs[b] == xs[a]:
+            b += 1
+
+        # 2-D front within the group: rows come y then z descending, so a
+        # row survives if it ties the top z of its y and beats every
+        # larger y
+        local = []
+        best = -np.inf
+        top_y, top_z = None, None
+        for i in range(a, b):
+            if ys[i] != top_y:
+                top_y, top_z = ys[i], zs[i]
+                best, prior = max(best, zs[i]), best
+            if zs[i] == top_z and top_z > prior:
+                local.append(i)
+
+        survivors = []
+        for i in local:
+            j = bisect.bisect_left(stair_y, ys[i])
+            if j == len(stair_y) or stair_z[j] < zs[i]:
+                survivors.append(i)
+        keep[order[survivors]] = True
+
+        for i in survivors:
+            y, z = ys[i], zs[i]
+            j = bisect.bisect_left(stair_y, y)
+            if j < len(stair_y) and stair_y[j] == y and stair_z[j] >= z:
+                continue
+            # drop the steps the new point covers: y' <= y and z' <= z
+            lo = j
+            while lo > 0 and stair_z[lo - 1] <= z:
+                lo -= 1
+            hi = j + 1 if j < len(stair_y) and stair_y[j] == y else j
+            stair_y[lo:hi] = [y]
+            stair_z[lo:hi] = [z]
+        a = b
+    return keep
+
+def _skyline_bnl(X, block_size=BLOCK_SIZE):
+    # block-nested loop over rows presorted by their sum, so no row is
+    # dominated by a later one and the window of survivors only grows
+    order = np.argsort(-X.sum(axis=1), kind="stable")
+    window = np.empty((0, X.shape[1]))
+    keep = np.zeros(len(X), dtype=bool)
+    for start in range(0, len(X), block_size):
+        rows = order[start:start + block_size]
+        B = X[rows]
+        alive = ~dominated_by(B, window)
+        # dominance is transitive, so checking the block against itself
+        # is enough to leave only its own front
+        alive[alive] = ~dominated_by(B[alive], B[alive])
+        keep[rows[alive]] = True
+        window = np.vstack([window, B[alive]])
+    return keep
+
+def dominated_by(B, W):
+    # rows of B dominated by any row of W, one column at a time
+    ge = np.ones((len(B), len(W)), dtype=bool)
+    eq = np.ones((len(B), len(W)), dtype=bool)
+    for c in range(B.shape[1]):
+        ge &= W[None, :, c] >= B[:, c, None]
+        eq &= W[None, :, c] == B[:, c, None]
+    return (ge & ~eq).any(axis=1)
+
+def skyline(X):
+    # boolean mask of the non-dominated rows; rows with NaN are left out
+    X = np.asarray(X, dtype=float)
+    keep = np.zeros(len(X), dtype=bool)
+    valid = ~np.isnan(X).any(axis=1)
+    if not valid.any():
+        return keep
+    V = X[valid]
+    d = V.shape[1]
+    if d == 1:
+        keep[valid] = _skyline_1d(V)
+    elif d == 2:
+        keep[valid] = _skyline_2d(V)
+    elif d == 3:
+        keep[valid] = _skyline_3d(V)
+    else:
+        keep[valid] = _skyline_bnl(V)
+    return keep
+
+def skyline_frame(frame, metrics, by=None):
+    # metrics: {column: +1 / -1}; by: skyline within each group
+    X = frame[list(metrics)].to_numpy(dtype=float) * np.array(list(metrics.values()))
+    keep = np.zeros(len(frame), dtype=bool)
+    groups = [np.arange(len(frame))] if by is None else \
+        [np.flatnonzero(frame[by].to_numpy() == g) for g in frame[by].dropna().unique()]
+    for rows in groups:
+        keep[rows] = skyline(X[rows])
+    return frame[keep]
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    spec = REGISTRY[SKYLINE_MODEL]
+
+    for side, full in (("bat", bat_all), ("bowl", bowl_all)):
+        metrics = SKYLINE_METRICS[side]
+        frame = prepare(full, spec, side)
+
+        stage(f"SKYLINE PER ROLE: {side} ({', '.join(metrics)})")
+
+        front = skyline_frame(frame, metrics, by="role")
+        for role, group in front.groupby("role"):
+            print(f"\n{role}: {len(group)} of {(frame['role']==role).sum()} non-dominated")
+            print(group[list(metrics)].sort_values(list(metrics)[0], ascending=False).round(3).to_string())
+
+        front[["role"] + list(metrics)].to_csv(f"skyline_{side}.csv")
+
+    stage("STAGE 2: SCALE CHECK")
+
+    rng = np.random.default_rng(0)
+    for d in (2, 3, 5):
+        X = rng.normal(size=(50_000, d))
+        start = time.perf_counter()
+        keep = skyline(X)
+        print(f"  50,000 x {d}: {keep.sum()} on the front  {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from normalize import normalize, IncrementalNormalizer, INCREMENTAL_METHODS, SortedBlocks
+
+def random_frame(rng, n, ties):
+    # ties: a small integer grid, so equal values are common
+    X = rng.integers(0, 5, size=(n, 3)).astype(float) if ties else rng.normal(size=(n, 3))
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return pd.DataFrame(X, index=[f"p{i}" for i in range(n)], columns=["a", "b", "c"])
+
+@pytest.mark.parametrize("method", INCREMENTAL_METHODS)
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("seed", range(15))
+def test_updates_match_batch(method, ties, seed):
+    rng = np.random.default_rng(seed)
+    frame = random_frame(rng, int(rng.integers(0, 40)), ties)
+    normalizer = IncrementalNormalizer(frame, method)
+    for step in range(15):
+        # changed players, some new, some going missing
+        new = random_frame(rng, int(rng.integers(1, 6)), ties)
+        new.index = rng.choice([f"p{i}" for i in range(len(frame) + 5)], len(new), replace=False)
+        normalizer.update(new)
+        frame = new.combine_first(frame)
+        frame.loc[new.index] = new
+
+        out = normalizer.transform().reindex(frame.index)
+        np.testing.assert_allclose(out.to_numpy(), normalize(frame, method).to_numpy(), atol=1e-9)
+        for column in frame.columns:
+            expected = frame[column].rank(ascending=False, method="min")
+            pd.testing.assert_series_equal(normalizer.rank(column).reindex(frame.index), expected,
+                                           check_names=False)
+            k = int(rng.integers(0, len(frame) + 3))
+            top = normalizer.top(column, k)
+            values = frame.loc[top, column].to_numpy()
+            assert len(top) == min(k, frame[column].notna().sum())
+            assert (np.diff(values) <= 0).all()
+            assert (values >= frame[column].nlargest(len(top)).to_numpy()).all()
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sorted_blocks_match_a_sorted_list(seed):
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, 30, 50).tolist()
+    blocks = SortedBlocks(items, block=3)
+    for _ in range(200):
+        if items and rng.random() < 0.5:
+            item = items.pop(int(rng.integers(len(items))))
+            blocks.remove(item)
+        else:
+            item = int(rng.integers(0, 30))
+            items.append(item)
+            blocks.add(item)
+        expected = sorted(items)
+        assert len(blocks) == len(expected)
+        assert [x for b in blocks.blocks for x in b] == expected
+        probe = int(rng.integers(-1, 31))
+        assert blocks.count_above(probe) == sum(x > probe for x in expected)
+        k = int(rng.integers(-2, len(expected) + 3))
+        assert blocks.top(k) == expected[::-1][:max(k, 0)]
+
+def test_top_of_nothing():
+    assert SortedBlocks([3, 1, 2]).top(0) == []
+    assert SortedBlocks([3, 1, 2]).top(-1) == []
+    assert SortedBlocks([]).top(3) == []
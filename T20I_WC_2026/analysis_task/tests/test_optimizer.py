@@ -0,0 +1,113 @@
+import itertools
+import numpy as np
+import pytest
+
+from optimizer import solve, top_k
+
+# =====================================================
+# BRUTE FORCE
+# =====================================================
+
+def brute_force(values, counts, attrs, minimum, maximum, total):
+    # every (objective, players, assignment) that meets the limits; with
+    # total < sum(counts) the counts are upper limits, as in solve()
+    n_roles, n_players = values.shape
+    exact = total is None or total >= counts.sum()
+    out = []
+    for choice in itertools.product(range(-1, n_roles), repeat=n_players):
+        choice = np.array(choice)
+        used = np.bincount(choice[choice >= 0], minlength=n_roles)
+        if exact and not (used == counts).all():
+            continue
+        if not exact and ((used > counts).any() or used.sum() != total):
+            continue
+        picked = np.flatnonzero(choice >= 0)
+        objective = values[choice[picked], picked].sum()
+        if not np.isfinite(objective):
+            continue
+        have = attrs[picked].sum(axis=0)
+        if (have < minimum).any() or (have > maximum).any():
+            continue
+        out.append((objective, frozenset(picked.tolist()), [(int(choice[p]), int(p)) for p in picked]))
+    return out
+
+def random_instance(rng):
+    n_roles = int(rng.integers(1, 4))
+    n_players = int(rng.integers(n_roles, 8))
+    values = rng.normal(size=(n_roles, n_players)).round(2)
+    values[rng.random(values.shape) < 0.2] = -np.inf
+    counts = rng.integers(1, 3, size=n_roles)
+    attrs = rng.random((n_players, 2)) < 0.5
+    minimum = rng.integers(0, 2, size=2)
+    maximum = minimum + rng.integers(0, 3, size=2)
+    total = None
+    if rng.random() < 0.3:
+        total = int(rng.integers(1, counts.sum() + 1))
+    return values, counts, attrs, minimum, maximum, total
+
+def check_assignment(values, counts, attrs, minimum, maximum, total, objective, assignment):
+    roles = np.array([r for r, _ in assignment])
+    players = np.array([p for _, p in assignment])
+    assert len(set(players.tolist())) == len(players)
+    used = np.bincount(roles, minlength=len(counts))
+    assert (used <= counts).all()
+    assert len(players) == (counts.sum() if total is None else min(total, counts.sum()))
+    have = attrs[players].sum(axis=0)
+    assert (have >= minimum).all() and (have <= maximum).all()
+    assert values[roles, players].sum() == pytest.approx(objective)
+
+# =====================================================
+# TESTS
+# =====================================================
+
+@pytest.mark.parametrize("seed", range(200))
+def test_solve_matches_brute_force(seed):
+    values, counts, attrs, minimum, maximum, total = random_instance(np.random.default_rng(seed))
+    expected = brute_force(values, counts, attrs, minimum, maximum, total)
+    found = solve(values, counts, attrs, minimum, maximum, total)
+
+    if not expected:
+        assert found is None
+        return
+    assert found is not None
+    objective, assignment = found
+    assert objective == pytest.approx(max(e[0] for e in expected))
+    check_assignment(values, counts, attrs, minimum, maximum, total, objective, assignment)
+
+@pytest.mark.parametrize("seed", range(100))
+def test_top_k_matches_brute_force(seed):
+    rng = np.random.default_rng(1000 + seed)
+    values, counts, attrs, minimum, maximum, total = random_instance(rng)
+    k = int(rng.integers(1, 6))
+    expected = brute_force(values, counts, attrs, minimum, maximum, total)
+    found = top_k(values, counts, attrs, minimum, maximum, total, k=k, workers=1)
+
+    # best objective per distinct player set
+    best = {}
+    for objective, players, _ in expected:
+        best[players] = max(best.get(players, -np.inf), objective)
+    want = sorted(best.values(), reverse=True)[:k]
+
+    assert [f[0] for f in found] == pytest.approx(want)
+    sets = [frozenset(p for _, p in assignment) for _, assignment in found]
+    assert len(set(sets)) == len(sets)
+    for objective, assignment in found:
+        check_assignment(values, counts, attrs, minimum, maximum, total, objective, assignment)
+        assert objective == pytest.approx(best[frozenset(p for _, p in assignment)])
+
+def test_infeasible_limits():
+    values = np.zeros((1, 4))
+    counts = np.array([2])
+    attrs = np.array([[True], [False], [False], [False]])
+    # two attribute players required, one available
+    assert solve(values, counts, attrs, [2], [2]) is None
+    assert top_k(values, counts, attrs, [2], [2], workers=1) == []
+    # at most zero attribute players: the other three are enough
+    objective, assignment = solve(values, counts, attrs, [0], [0])
+    assert 0 not in {p for _, p in assignment}
+
+def test_infeasible_roles():
+    # both slots need the same single eligible player
+    values = np.array([[1.0, -np.inf, -np.inf], [2.0, -np.inf, -np.inf]])
+    assert solve(values, np.array([1, 1])) is None
+    assert top_k(values, np.array([1, 1]), workers=1) == []
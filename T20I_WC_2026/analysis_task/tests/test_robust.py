@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from robust import relax_limits, robust_select, point_assignment, assignment_totals
+from test_optimizer import brute_force, random_instance
+
+def problem_of(values, counts, attrs, minimum, maximum, total):
+    n_roles, n_players = values.shape
+    total = min(total or counts.sum(), int(counts.sum()))
+    return relax_limits({
+        "players": pd.Index([f"p{i}" for i in range(n_players)]), "values": values, "counts": counts,
+        "roles": [[f"r{r}"] * n_players for r in range(n_roles)], "attrs": attrs.astype(int),
+        "minimum": np.asarray(minimum), "maximum": np.asarray(maximum), "total": total,
+    })
+
+def feasible_instance(rng):
+    # a random instance with a lineup inside its limits
+    while True:
+        instance = random_instance(rng)
+        problem = problem_of(*instance)
+        if not problem["relaxed"] and point_assignment(problem) is not None:
+            return instance, problem
+
+def draws_of(rng, values, n=20):
+    V = values[None] + rng.normal(scale=0.5, size=(n, *values.shape))
+    return np.where(np.isfinite(values), V, -np.inf)
+
+@pytest.mark.parametrize("seed", range(40))
+def test_expected_xi_is_the_mean_optimum(seed):
+    rng = np.random.default_rng(seed)
+    (values, counts, attrs, minimum, maximum, _), problem = feasible_instance(rng)
+    V = draws_of(rng, values)
+    found = robust_select(problem, V, restarts=1, workers=1)
+    assert not found["relaxed"]
+
+    mean = V.mean(axis=0)
+    best = max(brute_force(mean, counts, attrs, minimum, maximum, problem["total"]))
+    assert found["objective"] == pytest.approx(best[0])
+    xi = [problem["players"].get_loc(p) for p in found["xi"]]
+    have = attrs[xi].sum(axis=0)
+    assert (have >= minimum).all() and (have <= maximum).all()
+
+@pytest.mark.parametrize("seed", range(20))
+def test_quantile_search_stays_within_the_limits(seed):
+    rng = np.random.default_rng(100 + seed)
+    (values, _, attrs, _, _, _), problem = feasible_instance(rng)
+    start = point_assignment(problem)
+    V = draws_of(rng, values)
+    found = robust_select(problem, V, quantile=0.1, restarts=3, workers=1)
+    xi = [problem["players"].get_loc(p) for p in found["xi"]]
+    have = attrs[xi].sum(axis=0)
+    assert (have >= problem["minimum"]).all() and (have <= problem["maximum"]).all()
+    assert found["objective"] >= np.quantile(assignment_totals(V, start[1]), 0.1) - 1e-9
+
+def test_unreachable_limits_are_relaxed_and_reported():
+    # both bowlers can only fill the one slot of row 0, so two bowlers is
+    # out of reach; the search keeps the role slots only
+    values = np.array([[1.0, 2.0, -np.inf, -np.inf],
+                       [-np.inf, -np.inf, 3.0, 0.5]])
+    attrs = np.array([[1, 0], [1, 0], [0, 0], [0, 0]])
+    problem = problem_of(values, np.array([1, 1]), attrs, [2, 0], [4, 4], None)
+    assert problem["relaxed"]
+    found = robust_select(problem, draws_of(np.random.default_rng(0), values), restarts=2, workers=1)
+    assert found["relaxed"]
+    assert sorted(found["xi"]) == ["p1", "p2"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from similarity import KDTree, SimilarityIndex, phase_profiles
+from aggregates import PHASES
+
+def brute_force(X, x, k):
+    # (distances, rows) nearest first, ties to the lower row
+    d2 = ((X - x)**2).sum(axis=1)
+    rows = np.lexsort((np.arange(len(X)), d2))[:k]
+    return np.sqrt(d2[rows]), rows
+
+def random_points(rng, n, d, ties):
+    # ties: small integer grid, so duplicate points and equal distances are common
+    return rng.integers(0, 3, size=(n, d)).astype(float) if ties else rng.normal(size=(n, d))
+
+@pytest.mark.parametrize("leaf_size", [1, 4, 64])
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("seed", range(15))
+def test_query_matches_brute_force(leaf_size, ties, seed):
+    rng = np.random.default_rng(seed)
+    X = random_points(rng, int(rng.integers(1, 300)), int(rng.integers(1, 8)), ties)
+    tree = KDTree(X, leaf_size)
+    for _ in range(10):
+        x = X[rng.integers(len(X))] if rng.random() < 0.5 else random_points(rng, 1, X.shape[1], ties)[0]
+        k = int(rng.integers(1, 20))
+        dist, rows = tree.query(x, k)
+        expected_dist, expected_rows = brute_force(X, x, k)
+        np.testing.assert_allclose(dist, expected_dist)
+        np.testing.assert_array_equal(rows, expected_rows)
+
+def test_query_k_beyond_size_and_empty():
+    X = np.random.default_rng(0).normal(size=(5, 3))
+    dist, rows = KDTree(X, 2).query(X[0], 50)
+    assert sorted(rows) == list(range(5))
+    assert dist[0] == 0
+    dist, rows = KDTree(np.empty((0, 3))).query(np.zeros(3), 3)
+    assert len(dist) == len(rows) == 0
+
+def test_screen_shortlist_on_large_pool():
+    # enough rows per query for the float32 shortlist to kick in
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(5_000, 16))
+    tree = KDTree(X, 16)
+    for x in X[rng.integers(0, len(X), 20)] + rng.normal(scale=0.5, size=(20, 16)):
+        dist, rows = tree.query(x, 25)
+        expected_dist, expected_rows = brute_force(X, x, 25)
+        np.testing.assert_allclose(dist, expected_dist)
+        np.testing.assert_array_equal(rows, expected_rows)
+
+def test_neighbours_exclude_the_player():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame(rng.normal(size=(40, 4)), index=[f"p{i}" for i in range(40)])
+    roles = pd.Series(rng.choice(["A", "B"], 40), index=frame.index)
+    index = SimilarityIndex(frame, frame.columns, roles)
+    for player in frame.index[:10]:
+        for same_role in (False, True):
+            found, _ = index.neighbours(player, 5, same_role)
+            i = index.position[player]
+            assert i not in found
+            if same_role:
+                assert (roles.iloc[found] == roles.iloc[i]).all()
+
+def test_unplayed_phase_rates_are_missing():
+    frame = pd.DataFrame({
+        **{f"balls_{p}": [60, 0] for p in PHASES},
+        **{f"{m}_{p}": [7.5, 0.0] for m in ["econ", "wkt_rate", "dot_pct"] for p in PHASES},
+        **{f"share_{p}": [0.3, 0.0] for p in PHASES},
+    }, index=["bowled", "never"])
+    profile = phase_profiles(frame, "bowl")
+    rates = [c for c in profile.columns if not c.startswith("share_")]
+    assert profile.loc["never", rates].isna().all()
+    assert (profile.loc["never", [f"share_{p}" for p in PHASES]] == 0).all()
+    assert profile.loc["bowled"].notna().all()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from skyline import skyline, skyline_frame, _skyline_bnl
+
+def brute_force(X):
+    # a row is kept unless another row is >= everywhere and > somewhere;
+    # rows with NaN are never kept and never dominate
+    X = np.asarray(X, dtype=float)
+    valid = ~np.isnan(X).any(axis=1)
+    keep = np.zeros(len(X), dtype=bool)
+    for i in np.flatnonzero(valid):
+        others = X[valid]
+        dominated = ((others >= X[i]).all(axis=1) & (others > X[i]).any(axis=1)).any()
+        keep[i] = not dominated
+    return keep
+
+def random_rows(rng, n, d, ties):
+    # ties: small integer grid, so equal values and duplicate rows are common
+    X = rng.integers(0, 4, size=(n, d)).astype(float) if ties else rng.normal(size=(n, d))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+@pytest.mark.parametrize("d", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("seed", range(20))
+def test_skyline_matches_brute_force(d, ties, seed):
+    rng = np.random.default_rng(seed)
+    X = random_rows(rng, int(rng.integers(1, 80)), d, ties)
+    np.testing.assert_array_equal(skyline(X), brute_force(X))
+
+@pytest.mark.parametrize("d", [2, 3, 4])
+@pytest.mark.parametrize("seed", range(10))
+def test_block_nested_loop_small_blocks(d, seed):
+    # several blocks, so the window carries survivors between them
+    rng = np.random.default_rng(100 + seed)
+    X = random_rows(rng, 60, d, ties=seed % 2 == 0)
+    X = X[~np.isnan(X).any(axis=1)]
+    np.testing.assert_array_equal(_skyline_bnl(X, block_size=7), brute_force(X))
+
+def test_all_nan_and_empty():
+    assert not skyline(np.full((3, 2), np.nan)).any()
+    assert skyline(np.empty((0, 3))).shape == (0,)
+
+def test_skyline_frame_signs_and_groups():
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        "SR": rng.integers(100, 105, 40).astype(float),
+        "dot_pct": rng.integers(0, 4, 40) / 10,
+        "role": rng.choice(["Opener", "Finisher"], 40),
+    })
+    metrics = {"SR": 1, "dot_pct": -1}
+    front = skyline_frame(frame, metrics, by="role")
+
+    expected = []
+    for _, group in frame.groupby("role"):
+        X = group[["SR", "dot_pct"]].to_numpy() * np.array([1, -1])
+        expected.extend(group.index[brute_force(X)])
+    assert sorted(front.index) == sorted(expected)
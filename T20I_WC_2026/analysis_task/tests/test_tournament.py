@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tournament import group_fixtures, super_eight_slots, _standings
+
+def deliveries(matches):
+    # one row per innings is enough for the fixtures: (match, batting
+    # team, bowling team, runs, winner)
+    return pd.DataFrame([
+        {"match": m, "group": "A", "batting_team": bat, "bowling_team": bowl,
+         "total_runs": runs, "match_winner": winner}
+        for m, bat, bowl, runs, winner in matches
+    ])
+
+def test_results_and_no_results():
+    df = deliveries([
+        ("m1", "X", "Y", 150, "Y"), ("m1", "Y", "X", 151, "Y"),
+        ("m2", "Z", "X", 40, None),                       # washed out mid-innings
+        ("m3", "Y", "Z", 160, "Z"), ("m3", "Z", "Y", 160, "Z"),  # tie, super over to Z
+    ])
+    groups, fixtures = group_fixtures(df)
+    assert groups == {"A": ["X", "Y", "Z"]}
+    assert fixtures["A"] == [("X", "Y", 0, -1), ("X", "Z", 1, 0.0), ("Y", "Z", 0, 0)]
+
+def test_standings_share_no_result_points():
+    rng = np.random.default_rng(0)
+    teams = np.array([[0, 1, 2]])
+    # 0 beats 1, 0 and 2 no result, 1 beats 2
+    results = [(0, 1, np.array([2]), np.array([10.0])),
+               (0, 2, np.array([1]), np.array([0.0])),
+               (1, 2, np.array([2]), np.array([5.0]))]
+    assert _standings(teams, results, rng, 1).tolist() == [[0, 1, 2]]
+    # 2 beats 1 instead: 0 and 2 level on 3 points, 0 ahead on margin
+    results[2] = (1, 2, np.array([0]), np.array([-5.0]))
+    assert _standings(teams, results, rng, 1).tolist() == [[0, 2, 1]]
+
+def test_super_eight_slots_follow_the_group_names():
+    slots = super_eight_slots({"1": [], "2": [], "3": [], "4": []})
+    assert slots == [[("1", 1), ("2", 2), ("3", 1), ("4", 2)],
+                     [("2", 1), ("1", 2), ("4", 1), ("3", 2)]]
+    with pytest.raises(ValueError, match="four groups"):
+        super_eight_slots({"A": [], "B": [], "C": []})
@@ -0,0 +1,281 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from itertools import combinations
+from multiprocessing import Pool
+
+from aggregates import stage, load_deliveries
+from run_all import load_features
+from nations import nation_xis
+from simulator import OVERS, PRIOR_BALLS, outcome_tables, spin_share, batting_order, simulate_innings
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+TOURNAMENTS = 100_000
+CHUNK = 5_000          # tournaments per task; seeds follow chunks, not workers
+TOURNAMENT_SEED = 0
+
+POOL_INNINGS = 10_000  # simulated totals per nation XI
+BOWLER_BALLS = 24      # a bowler's four overs
+
+# top two of each group and of each Super 8 group go through; Super 8
+# group 1 winner plays group 2 runner-up in the semis
+ADVANCE = 2
+
+STAGES = ["super_eight", "semi_final", "final", "title"]
+
+# =====================================================
+# FIXTURES AND TEAM STRENGTH
+# =====================================================
+
+def group_fixtures(df):
+    # every pairing within each event.group, with the result where it was
+    # played: (team a, team b, points to a, a runs - b runs). A win is 2
+    # points, a no-result (no winner recorded) 1 each; a match abandoned
+    # before a ball has no deliveries and is simulated like an unplayed one.
+    matches = df.groupby("match").agg(
+        team=("batting_team","first"),
+        opponent=("bowling_team","first"),
+        winner=("match_winner","first")
+    )
+    runs = df.groupby(["match", "batting_team"])["total_runs"].sum()
+    played = {}
+    for match, row in matches.iterrows():
+        a, b = sorted([row["team"], row["opponent"]])
+        if pd.isna(row["winner"]):
+            played[(a, b)] = (1, 0.0)
+        else:
+            margin = runs.get((match, a), 0) - runs.get((match, b), 0)
+            played[(a, b)] = (2 if row["winner"] == a else 0, margin)
+
+    groups = {
+        group: sorted(set(frame["batting_team"]) | set(frame["bowling_team"].dropna()))
+        for group, frame in df.groupby("group")
+    }
+    fixtures = {
+        group: [(a, b, *played.get((a, b), (None, None))) for a, b in combinations(teams, 2)]
+        for group, teams in groups.items()
+    }
+    return groups, fixtures
+
+def super_eight_slots(groups):
+    # (group, finishing place) in each Super 8 group, from the group names
+    # in sorted order: with groups w, x, y, z, the winners of w and y meet
+    # the runners-up of x and z, and the other way round
+    names = sorted(groups)
+    if len(names) != 4:
+        raise ValueError(f"The Super 8 needs four groups, the fixtures have {len(names)}: {names}")
+    w, x, y, z = names
+    return [
+        [(w, 1), (x, 2), (y, 1), (z, 2)],
+        [(x, 1), (w, 2), (z, 1), (y, 2)],
+    ]
+
+def attack_factors(df, xis):
+    # runs conceded per legal ball by each XI's bowlers relative to the
+    # league: every bowler's rate shrunk to the league over PRIOR_BALLS (as
+    # simulator.outcome_tables), weighted by the balls per match they bowl,
+    # at most BOWLER_BALLS; overs the XI's bowlers don't cover go at the
+    # league rate
+    legal = df[df["legal"]]
+    bowlers = legal.groupby("bowler").agg(
+        runs=("total_runs","sum"),
+        balls=("legal","sum"),
+        matches=("match","nunique")
+    )
+    league = legal["total_runs"].sum() / legal["legal"].sum()
+    rate = (bowlers["runs"] + PRIOR_BALLS * league) / (bowlers["balls"] + PRIOR_BALLS)
+    share = (bowlers["balls"] / bowlers["matches"]).clip(upper=BOWLER_BALLS)
+
+    factors = []
+    for xi in xis:
+        attack = bowlers.index.intersection(xi)
+        overs = share[attack].sum()
+        total = max(overs, OVERS * 6)
+        conceded = (share[attack] * rate[attack]).sum() + (total - overs) * league
+        factors.append(conceded / total / league)
+    return np.array(factors)
+
+def nation_orders(df, bat_all, bowl_all, workers=None):
+    xis, _ = nation_xis(df, bat_all, bowl_all, workers=workers)
+    return {
+        team: batting_order([cell.rsplit(" (", 1)[0] for cell in xis[team] if cell], bat_all)
+        for team in xis.columns
+    }
+
+def innings_pools(orders, tables, spin, n=POOL_INNINGS, seed=TOURNAMENT_SEED):
+    # (teams, n) simulated first-innings totals, one row per nation XI
+    return np.vstack([
+        simulate_innings(orders[team], tables, spin, n, seed)[0] for team in orders
+    ])
+
+# =====================================================
+# VECTORIZED TOURNAMENTS
+# =====================================================
+
+_STATE = {}
+
+def _init_worker(pools, factors, groups, fixtures, fixed):
+    _STATE.update(pools=pools, factors=factors, groups=groups, fixtures=fixtures, fixed=fixed,
+                  slots=super_eight_slots(groups))
+
+def _play(a, b, rng, n):
+    # a, b: team rows (scalars or one per tournament); each side's total
+    # is drawn from its pool and scaled by the other side's attack
+    pools, factors = _STATE["pools"], _STATE["factors"]
+    ta = pools[a, rng.integers(0, pools.shape[1], n)] * factors[b]
+    tb = pools[b, rng.integers(0, pools.shape[1], n)] * factors[a]
+    a_won = (ta > tb) | ((ta == tb) & (rng.random(n) < 0.5))
+    return a_won, ta - tb
+
+def _standings(teams, results, rng, n):
+    # teams: (n, k) rows; results: [(i, j, points to i, margin)] by column,
+    # out of 2 per match; places by points, then run margin, then at random
+    k = teams.shape[1]
+    points = np.zeros((n, k))
+    margin = np.zeros((n, k))
+    for i, j, won, diff in results:
+        points[:, i] += won
+        points[:, j] += 2 - won
+        margin[:, i] += diff
+        margin[:, j] -= diff
+    key = points * 1e6 + margin + rng.random((n, k))
+    return np.take_along_axis(teams, np.argsort(-key, axis=1), axis=1)
+
+def _simulate_chunk(args):
+    n, seed = args
+    s = _STATE
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((len(STAGES), len(s["pools"])), dtype=int)
+
+    places = {}
+    for group, teams in s["groups"].items():
+        column = {team: c for c, team in enumerate(teams)}
+        results = []
+        for a, b, a_points, diff in s["fixtures"][group]:
+            if s["fixed"] and a_points is not None:
+                won, margin = np.full(n, a_points), np.full(n, float(diff))
+            else:
+                won, margin = _play(teams[a], teams[b], rng, n)
+                won = 2 * won
+            results.append((column[a], column[b], won, margin))
+        rows = np.broadcast_to(np.array(list(teams.values())), (n, len(teams)))
+        places[group] = _standings(rows, results, rng, n)
+
+    semis = []
+    for slots in s["slots"]:
+        rows = np.column_stack([places[group][:, place - 1] for group, place in slots])
+        np.add.at(counts[0], rows.ravel(), 1)
+        results = []
+        for i, j in combinations(range(len(slots)), 2):
+            won, margin = _play(rows[:, i], rows[:, j], rng, n)
+            results.append((i, j, 2 * won, margin))
+        semis.append(_standings(rows, results, rng, n)[:, :ADVANCE])
+
+    finalists = []
+    for home, away in ((semis[0][:, 0], semis[1][:, 1]), (semis[1][:, 0], semis[0][:, 1])):
+        np.add.at(counts[1], np.r_[home, away], 1)
+        won, _ = _play(home, away, rng, n)
+        finalists.append(np.where(won, home, away))
+
+    np.add.at(counts[2], np.r_[finalists[0], finalists[1]], 1)
+    won, _ = _play(finalists[0], finalists[1], rng, n)
+    np.add.at(counts[3], np.where(won, finalists[0], finalists[1]), 1)
+    return counts
+
+def simulate_tournaments(pools, factors, teams, groups, fixtures, fixed=False,
+                         n=TOURNAMENTS, seed=TOURNAMENT_SEED, workers=None):
+    # probability of reaching each stage per team. The n tournaments are
+    # split into CHUNK-sized tasks with their own spawned seeds, so results
+    # depend on the seed only, never on the worker count.
+    super_eight_slots(groups)   # fail here rather than in every worker
+    rows = {team: i for i, team in enumerate(teams)}
+    groups = {group: {team: rows[team] for team in members} for group, members in groups.items()}
+    sizes = [CHUNK] * (n // CHUNK) + ([n % CHUNK] if n % CHUNK else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(sizes, seeds))
+    args = (pools, factors, groups, fixtures, fixed)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with Pool(min(workers, len(tasks)), _init_worker, args) as pool:
+            counts = pool.map(_simulate_chunk, tasks)
+    else:
+        _init_worker(*args)
+        counts = [_simulate_chunk(task) for task in tasks]
+
+    table = pd.DataFrame(sum(counts).T / n, index=teams, columns=STAGES)
+    table.insert(0, "group", pd.Series({t: g for g, m in groups.items() for t in m}))
+    return table.sort_values(STAGES[::-1], ascending=False)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+    groups, fixtures = group_fixtures(df)
+    for group, members in groups.items():
+        played = sum(a_points is not None for *_, a_points, _ in fixtures[group])
+        print(f"  Group {group}: {len(members)} teams  {played}/{len(fixtures[group])} fixtures played")
+
+    stage("STAGE 2: NATION XI INNINGS POOLS")
+
+    start = time.perf_counter()
+    tables = outcome_tables(df)
+    spin = spin_share(df)
+    orders = nation_orders(df, bat_all, bowl_all)
+    teams = [team for members in groups.values() for team in members]
+    pools = innings_pools({team: orders[team] for team in teams}, tables, spin)
+    factors = attack_factors(df, [orders[team] for team in teams])
+    print(f"Teams: {len(teams)}  innings per team: {POOL_INNINGS:,}  "
+          f"time: {time.perf_counter() - start:.3f}s")
+    print(pd.DataFrame({"mean_total": pools.mean(axis=1), "attack_factor": factors},
+                       index=teams).round(3).to_string())
+
+    stage(f"STAGE 3: {TOURNAMENTS:,} TOURNAMENTS FROM THE FIXTURES")
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        table = simulate_tournaments(pools, factors, teams, groups, fixtures, workers=workers)
+        print(f"Workers: {workers}  time: {time.perf_counter() - start:.3f}s")
+    print(table.round(4).to_string())
+
+    stage("STAGE 4: CONDITIONED ON THE GROUP RESULTS PLAYED")
+
+    fixed = simulate_tournaments(pools, factors, teams, groups, fixtures, fixed=True)
+    print(fixed.round(4).to_string())
+
+    stage("STAGE 5: SHIFT WHEN A BATTER IS DROPPED")
+
+    # the title favourite without its heaviest run scorer; the gap is
+    # filled by a league-average batter
+    favourite = table.index[0]
+    star = bat_all.loc[bat_all.index.intersection(orders[favourite]), "runs"].idxmax()
+    changed = {**orders, favourite: [p for p in orders[favourite] if p != star]}
+    pools_changed = innings_pools({team: changed[team] for team in teams}, tables, spin)
+    factors_changed = attack_factors(df, [changed[team] for team in teams])
+    shifted = simulate_tournaments(pools_changed, factors_changed, teams, groups, fixtures)
+    print(f"{favourite} without {star}")
+    shift = (shifted[STAGES] - table[STAGES]).loc[table.index]
+    print(shift[shift.abs().max(axis=1) >= 0.001].round(4).to_string())
+
+    stage("STAGE 6: SHIFT WHEN A BOWLER IS DROPPED")
+
+    # the favourite without its leading wicket taker: the attack factor
+    # moves as well as the batting pool
+    bowler = bowl_all.loc[bowl_all.index.intersection(orders[favourite]), "wickets"].idxmax()
+    changed = {**orders, favourite: [p for p in orders[favourite] if p != bowler]}
+    pools_changed = innings_pools({team: changed[team] for team in teams}, tables, spin)
+    factors_changed = attack_factors(df, [changed[team] for team in teams])
+    shifted = simulate_tournaments(pools_changed, factors_changed, teams, groups, fixtures)
+    row = teams.index(favourite)
+    print(f"{favourite} without {bowler}  attack factor: "
+          f"{factors[row]:.3f} -> {factors_changed[row]:.3f}")
+    shift = (shifted[STAGES] - table[STAGES]).loc[table.index]
+    print(shift[shift.abs().max(axis=1) >= 0.001].round(4).to_string())
+
+    table.to_csv("tournament_probabilities.csv")
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import pickle
+import inspect
+import hashlib
+import numpy as np
+import pandas as pd
+
+from aggregates import BASE_DIR, PHASES, stage, load_deliveries, match_files
+from normalize import normalize
+from registry import REGISTRY, SELECTOR, SPINNER_LIST
+from run_all import load_features
+from weight_sweep import RuleSelection
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+
+VENUE_MODEL = "Venue_Base"
+VENUE_SCORE = "composite"    # the score each side's venue adjustment adds to
+
+# profile signal -> {side: {feature: extra weight at full signal}}
+# (final_task/3.py: Ahmedabad is high scoring / boundary / death heavy,
+# Colombo low scoring and spin friendly)
+VENUE_EFFECTS = {
+    "high_scoring": {"bat": {"pressure_runs": 0.15}, "bowl": {"wpm": 0.40}},
+    "boundary": {"bat": {"boundary_pct": 0.25}},
+    "death": {"bat": {"clutch_runs": 0.10}},
+    "low_scoring": {
+        "bat": {"dot_pct": -0.25, "runs_per_match": 0.15},
+        "bowl": {"inv_economy": 0.30, "legal_dot_pct": 0.15},
+    },
+    "spin": {"bowl": {"spinner": 0.15}},
+}
+
+# =====================================================
+# VENUE PROFILES
+# =====================================================
+
+def venue_profiles(df):
+    legal = df[df["legal"]].assign(
+        spin=lambda d: d["bowler"].isin(SPINNER_LIST),
+        spin_runs=lambda d: d["total_runs"].where(d["spin"], 0),
+        pace_runs=lambda d: d["total_runs"].where(~d["spin"], 0),
+    )
+
+    # final_task/3.py: mean over matches of the legal-ball run rate
+    per_match = legal.groupby(["venue", "match"]).agg(
+        runs=("total_runs","sum"),
+        balls=("legal","sum")
+    )
+    per_match["run_rate"] = per_match["runs"] / (per_match["balls"] / 6)
+
+    profile = legal.groupby("venue").agg(
+        matches=("match","nunique"),
+        balls=("legal","sum"),
+        runs=("total_runs","sum"),
+        boundaries=("is_boundary","sum"),
+        spin_balls=("spin","sum"),
+        spin_runs=("spin_runs","sum"),
+        pace_runs=("pace_runs","sum"),
+    )
+    profile["run_rate"] = per_match.groupby("venue")["run_rate"].mean()
+    profile["boundary_pct"] = profile["boundaries"] / profile["balls"]
+    profile["spin_econ"] = profile["spin_runs"] / (profile["spin_balls"] / 6)
+    profile["pace_econ"] = profile["pace_runs"] / ((profile["balls"] - profile["spin_balls"]) / 6)
+
+    by_phase = legal.groupby(["venue", "phase"]).agg(
+        runs=("total_runs","sum"),
+        balls=("legal","sum")
+    )
+    rr = (by_phase["runs"] / (by_phase["balls"] / 6)).unstack("phase").reindex(columns=PHASES)
+    profile[[f"rr_{p}" for p in PHASES]] = rr.to_numpy()
+
+    return profile.drop(columns=["runs", "boundaries", "spin_runs", "pace_runs"])
+
+def venue_signals(profile):
+    # each signal in [0, 1]: how far (in sds across venues) a venue sits
+    # above or below the others, capped at one sd
+    z = normalize(pd.DataFrame({
+        "scoring": profile["run_rate"],
+        "boundary": profile["boundary_pct"],
+        "death": profile["rr_Death"],
+        "spin": profile["pace_econ"] - profile["spin_econ"],
+    }), "z")
+    return pd.DataFrame({
+        "high_scoring": z["scoring"].clip(0, 1),
+        "boundary": z["boundary"].clip(0, 1),
+        "death": z["death"].clip(0, 1),
+        "low_scoring": (-z["scoring"]).clip(0, 1),
+        "spin": z["spin"].clip(0, 1),
+    }, index=profile.index)
+
+def venue_coefficients(signals, side):
+    # venues x features extra weights
+    effects = pd.DataFrame(
+        {signal: VENUE_EFFECTS[signal].get(side, {}) for signal in signals.columns}
+    ).fillna(0).T
+    return signals @ effects.reindex(signals.columns).fillna(0)
+
+# =====================================================
+# PLAYER x VENUE SELECTION
+# =====================================================
+
+def venue_scores(frame, coefficients, norm, score=VENUE_SCORE):
+    # base score plus every venue's adjustment: (players, venues)
+    features = list(coefficients.columns)
+    signs = np.where(coefficients.min() < 0, -1, 1)
+    values = frame.reindex(columns=features).astype(float)
+    if "spinner" in features:
+        values["spinner"] = (frame["bowling_type"] == "Spinner").astype(float)
+    N = normalize(values * signs, norm).to_numpy()
+    return frame[score].to_numpy(dtype=float)[:, None] + N @ (coefficients.to_numpy() * signs).T
+
+def venue_xis(bat_all, bowl_all, profile, model=VENUE_MODEL):
+    spec = REGISTRY[model]
+    selection = RuleSelection(spec, bat_all, bowl_all)
+    signals = venue_signals(profile)
+
+    columns = {
+        (side, VENUE_SCORE): venue_scores(
+            selection.frames[side], venue_coefficients(signals, side), spec["norm"]
+        )
+        for side in ("bat", "bowl")
+    }
+    if SELECTOR == "exact":
+        rule = selection.exact_columns(columns, len(profile))
+    else:
+        rule = selection.assign_columns(columns, len(profile))
+    return signals, selection.lineups(rule, columns, profile.index), rule
+
+# =====================================================
+# CACHE PER DATASET VERSION
+# =====================================================
+
+_VERSIONS = {}
+
+def dataset_version(base_dir=BASE_DIR):
+    # hashed once per process; a new or edited match file needs a restart
+    if base_dir not in _VERSIONS:
+        digest = hashlib.sha1()
+        for file_path in match_files(base_dir):
+            digest.update(os.path.basename(file_path).encode())
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+        _VERSIONS[base_dir] = digest.hexdigest()[:12]
+    return _VERSIONS[base_dir]
+
+def _describe(value):
+    # hooks by their source, so editing one changes the digest
+    try:
+        return inspect.getsource(value)
+    except (TypeError, OSError):
+        return repr(value)
+
+def config_digest(model=VENUE_MODEL):
+    # everything besides the data that the cached XIs depend on
+    config = [REGISTRY[model], VENUE_EFFECTS, VENUE_SCORE, SELECTOR, SPINNER_LIST]
+    text = json.dumps(config, sort_keys=True, default=_describe)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+_CACHE = {}
+
+def venue_engine(model=VENUE_MODEL, base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    # profiles, signals and XIs for every venue, computed once per set of
+    # match files and model configuration (in memory, and on disk when
+    # cache_dir is set)
+    key = (model, dataset_version(base_dir), config_digest(model))
+    if key in _CACHE:
+        return _CACHE[key]
+
+    path = cache_dir and os.path.join(cache_dir, "venues_{}_{}_{}.pkl".format(*key))
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            _CACHE[key] = pickle.load(f)
+        return _CACHE[key]
+
+    df = load_deliveries(base_dir)
+    bat_all, bowl_all = load_features(df)
+    profile = venue_profiles(df)
+    signals, xis, _ = venue_xis(bat_all, bowl_all, profile, model)
+    result = {"version": key[1], "profile": profile, "signals": signals, "xis": xis}
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(result, f)
+    _CACHE[key] = result
+    return result
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: VENUE ENGINE")
+
+    start = time.perf_counter()
+    result = venue_engine()
+    print(f"Dataset version: {result['version']}  "
+          f"venues: {len(result['profile'])}  time: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    venue_engine()
+    print(f"Cached lookup: {time.perf_counter() - start:.3f}s")
+
+    stage("STAGE 2: VENUE PROFILES")
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(result["profile"].round(2))
+
+    stage("STAGE 3: VENUE ADJUSTMENT SIGNALS")
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(result["signals"].round(2))
+
+    stage("STAGE 4: XI PER VENUE")
+
+    with pd.option_context("display.width", 250, "display.max_columns", None,
+                           "display.max_colwidth", 36):
+        print(result["xis"])
+
+    result["xis"].to_csv("venue_xis.csv")
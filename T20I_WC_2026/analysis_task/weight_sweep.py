@@ -0,0 +1,352 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import stage, load_deliveries
+from normalize import normalize
+from registry import REGISTRY, XI_SIZE, SELECTOR, prepare, mask, lineup_limits
+from optimizer import solve
+from run_all import load_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+N_VECTORS = 100_000
+EXACT_VECTORS = 5_000   # the exact selector solves one XI per vector; it sweeps the first ones
+CHUNK_SIZE = 5_000
+SEED = 42
+
+# (model, side, score) whose feature weights are swept
+SWEEPS = [
+    ("Phase_Impact", "bat", "final_score"),
+    ("Structural", "bat", "final_score"),
+    ("Advanced_Elite", "bat", "composite"),
+    ("Advanced_Elite", "bowl", "composite"),
+]
+
+# =====================================================
+# WEIGHT SAMPLING
+# =====================================================
+
+def base_weights(spec, side, score):
+    weights = spec[f"{side}_scores"][score]
+    if "weights" in weights:
+        raise ValueError(f"{side}.{score} is normalized over a sub-pool and cannot be swept")
+    features = list(weights)
+    return features, np.abs([weights[f] for f in features]), np.sign([weights[f] for f in features])
+
+def sample_weights(base, k, seed=SEED, concentration=None):
+    # Dirichlet over the simplex, rescaled to the hand-picked total. Row 0
+    # is the hand-picked vector itself. concentration=None is uniform;
+    # otherwise samples cluster around the base with that strength.
+    rng = np.random.default_rng(seed)
+    alpha = np.ones(len(base)) if concentration is None else concentration * base / base.sum()
+    W = rng.dirichlet(alpha, size=k - 1) * base.sum()
+    return np.vstack([base, W])
+
+# =====================================================
+# VECTORIZED SELECTION (players x weight vectors)
+# =====================================================
+
+class RuleSelection:
+    # The registry's selection rules evaluated for K score columns at
+    # once. Every score is a (players, K) column, or (players, 1) when it
+    # is the same for all K. The greedy selector takes each rule as a
+    # masked top-n in rule order; the exact one solves registry.exact_select's
+    # slot problem per column.
+
+    def __init__(self, spec, bat_all, bowl_all):
+        self.spec = spec
+        self.frames = {"bat": prepare(bat_all, spec, "bat"), "bowl": prepare(bowl_all, spec, "bowl")}
+        self.players = self.frames["bat"].index.union(self.frames["bowl"].index)
+        self.member = {
+            s: self.players.isin(f.index)[:, None] for s, f in self.frames.items()
+        }
+        self.where = {}
+
+    def _scatter(self, values, index):
+        out = np.zeros((len(self.players),) + values.shape[1:])
+        out[self.players.get_indexer(index)] = values
+        return out
+
+    def column(self, side, name, columns):
+        # columns: {(side, score): (side's players, K)} replacing the frame's
+        if (side, name) in columns:
+            return self._scatter(columns[side, name], self.frames[side].index)
+        return self._scatter(self.frames[side][name].to_numpy(dtype=float), self.frames[side].index)[:, None]
+
+    def ar_columns(self, columns, bowl_member):
+        # AR scores are linear in their "bat." / "bowl." references, so a
+        # replaced reference carries through; bare features are normalized
+        # over the unshortlisted bat x bowl pool
+        bat = self.frames["bat"]
+        pool = bat.index.intersection(self.frames["bowl"].index)
+        member = self.member["bat"] & bowl_member
+        scores = {}
+        for name, weights in self.spec.get("ar_scores", {}).items():
+            total = 0.0
+            for ref, weight in weights.items():
+                side, _, col = ref.partition(".")
+                if col and side in self.frames:
+                    total = total + weight * self.column(side, col, columns)
+                else:
+                    bare = normalize(bat.loc[pool, ref], self.spec["norm"]).to_numpy()
+                    total = total + weight * self._scatter(bare, pool)[:, None]
+            scores[name] = total
+        return scores, member
+
+    def rule_mask(self, pool, where):
+        key = (pool, str(where))
+        if key not in self.where:
+            frame = self.frames["bat" if pool == "ar" else pool]
+            keep = mask(frame, where).reindex(self.players, fill_value=False)
+            self.where[key] = keep.to_numpy()[:, None]
+        return self.where[key]
+
+    def select_columns(self, columns, K, selector=SELECTOR):
+        # -> (players, K) boolean XI membership
+        if selector == "exact":
+            return self.exact_columns(columns, K) >= 0
+        return self.assign_columns(columns, K) >= 0
+
+    def pool_columns(self, columns, K):
+        # pool membership (the bowling shortlist applied per column) and
+        # the AR scores
+        member = dict(self.member)
+        shortlist = self.spec.get("bowl_shortlist")
+        if shortlist:
+            score, n = shortlist
+            values = np.broadcast_to(self.column("bowl", score, columns), (len(self.players), K))
+            member["bowl"] = self.member["bowl"] & (top_n_rank(values, self.member["bowl"]) < n)
+
+        ar, member["ar"] = self.ar_columns(columns, member["bowl"])
+        return member, ar
+
+    def exact_columns(self, columns, K, exclude=None):
+        # -> (players, K) index of the rule whose slot each player takes in
+        # registry.exact_select's solution for that column, -1 if none; the
+        # greedy rule order where the slot problem has no solution
+        member, ar = self.pool_columns(columns, K)
+        weights = self.spec.get("role_weights", {})
+        rows, counts, rules, fill, fill_rules = [], [], [], [], []
+        for i, (pool, score, n, role, where) in enumerate(self.spec["selection"]):
+            values = ar[score] if pool == "ar" else self.column(pool, score, columns)
+            row = np.where(member[pool] & self.rule_mask(pool, where),
+                           weights.get(role, 1.0) * np.broadcast_to(values, (len(self.players), K)), -np.inf)
+            row[np.isnan(row)] = -np.inf
+            if exclude is not None:
+                row[exclude] = -np.inf
+            if n is None:
+                fill.append(row)
+                fill_rules.append(i)
+            else:
+                rows.append(row)
+                counts.append(n)
+                rules.append(i)
+        if fill:
+            # the n=None rules share one slot group, as in slot_problem
+            fill = np.stack(fill)
+            rows.append(fill.max(axis=0))
+            counts.append(max(XI_SIZE - sum(counts), 0))
+            fill_rule = np.array(fill_rules)[fill.argmax(axis=0)]
+
+        V = np.stack(rows)
+        counts = np.array(counts)
+        attrs, minimum, maximum = lineup_limits(self.spec, self.players, self.frames["bowl"].index, counts)
+        total = min(XI_SIZE, int(counts.sum()))
+
+        rule = np.full((len(self.players), K), -1)
+        greedy = None
+        for k in range(K):
+            solution = (solve(V[:, :, k], counts, attrs, minimum, maximum, total)
+                        or solve(V[:, :, k], counts, total=total))
+            if solution is None:
+                if greedy is None:
+                    greedy = self.assign_columns(columns, K, exclude)
+                rule[:, k] = greedy[:, k]
+                continue
+            for r, p in solution[1]:
+                rule[p, k] = rules[r] if r < len(rules) else fill_rule[p, k]
+        return rule
+
+    def assign_columns(self, columns, K, exclude=None):
+        # -> (players, K) index of the rule that picked each player in the
+        # greedy order, -1 if none; exclude: (players, K) players
+        # unavailable for that column
+        member, ar = self.pool_columns(columns, K)
+
+        selected = np.zeros((len(self.players), K), dtype=bool)
+        rule = np.full((len(self.players), K), -1)
+        count = np.zeros(K, dtype=int)
+        for i, (pool, score, n, role, where) in enumerate(self.spec["selection"]):
+            values = ar[score] if pool == "ar" else self.column(pool, score, columns)
+            values = np.broadcast_to(values, (len(self.players), K))
+            eligible = member[pool] & self.rule_mask(pool, where) & ~selected
+            if exclude is not None:
+                eligible = eligible & ~exclude
+
+            need = XI_SIZE - count if n is None else np.minimum(n, XI_SIZE - count)
+            take = eligible & (top_n_rank(values, eligible) < need)
+            selected |= take
+            rule[take] = i
+            count += take.sum(axis=0)
+
+        return rule
+
+    def lineups(self, rule, columns, labels):
+        # slot x column table of "player (role)", in rule order and by the
+        # rule's score within a rule
+        rules = self.spec["selection"]
+        ar, _ = self.ar_columns(columns, self.member["bowl"])
+        value = [
+            np.broadcast_to(ar[score] if pool == "ar" else self.column(pool, score, columns), rule.shape)
+            for pool, score, _, _, _ in rules
+        ]
+        table = {}
+        for k, label in enumerate(labels):
+            picked = np.flatnonzero(rule[:, k] >= 0)
+            picked = sorted(picked, key=lambda p: (rule[p, k], -value[rule[p, k]][p, k]))
+            table[label] = pd.Series(
+                [f"{self.players[p]} ({rules[rule[p, k]][3]})" for p in picked],
+                index=range(1, len(picked) + 1)
+            )
+        return pd.DataFrame(table).rename_axis("slot").fillna("")
+
+class Sweep(RuleSelection):
+    # One score's feature weights swept over K weight vectors.
+
+    def __init__(self, spec, bat_all, bowl_all, side, score):
+        super().__init__(spec, bat_all, bowl_all)
+        self.side = side
+        self.score = score
+        self.features, self.base, signs = base_weights(spec, side, score)
+
+        frame = self.frames[side]
+        self.N = normalize(frame[self.features] * signs, spec["norm"]).to_numpy()
+        self.multiplier = np.ones(len(frame))
+        if score in spec.get(f"{side}_multiplier", {}):
+            self.multiplier = spec[f"{side}_multiplier"][score](frame).to_numpy()
+
+    def select(self, W, selector=SELECTOR):
+        # W: (K, features) -> (players, K) boolean XI membership
+        swept = (self.N @ W.T) * self.multiplier[:, None]
+        return self.select_columns({(self.side, self.score): swept}, W.shape[0], selector)
+
+def top_n_rank(values, eligible):
+    # descending rank of each eligible player within its column
+    values = np.where(eligible, values, -np.inf)
+    order = np.argsort(-values, axis=0, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(len(values))[:, None], axis=0)
+    return rank
+
+# =====================================================
+# SENSITIVITY REPORT
+# =====================================================
+
+def run_sweep(sweep, W, selector=SELECTOR, chunk_size=CHUNK_SIZE):
+    P, K = len(sweep.players), W.shape[0]
+    in_xi = np.zeros(P)
+    weight_in_xi = np.zeros((P, W.shape[1]))
+    keys = []
+
+    for start in range(0, K, chunk_size):
+        Wc = W[start:start + chunk_size]
+        selected = sweep.select(Wc, selector)
+        in_xi += selected.sum(axis=1)
+        weight_in_xi += selected @ Wc
+        keys.append(np.packbits(selected, axis=0).T)
+
+    keys = np.ascontiguousarray(np.vstack(keys))
+    keys = keys.view(np.dtype((np.void, keys.shape[1]))).ravel()
+    return in_xi, weight_in_xi, keys
+
+def xi_frequency(sweep, W, in_xi, weight_in_xi, base_xi):
+    # mean weights when a player is in the XI vs. when out: the direction
+    # in weight space that pulls each player in
+    K = W.shape[0]
+    rate = in_xi / K
+    mean_in = weight_in_xi / np.maximum(in_xi, 1)[:, None]
+    mean_out = (W.sum(axis=0) - weight_in_xi) / np.maximum(K - in_xi, 1)[:, None]
+
+    freq = pd.DataFrame({"player": sweep.players, "xi_rate": rate, "in_base_xi": base_xi})
+    for j, f in enumerate(sweep.features):
+        freq[f"delta_{f}"] = np.where((rate > 0) & (rate < 1), mean_in[:, j] - mean_out[:, j], 0.0)
+    freq = freq[(freq["xi_rate"] > 0) | freq["in_base_xi"]]
+    return freq.sort_values("xi_rate", ascending=False).reset_index(drop=True)
+
+def distinct_xis(sweep, keys, W):
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    base_id = inverse[0]
+
+    def players(u):
+        bits = np.unpackbits(np.frombuffer(unique[u].tobytes(), dtype=np.uint8))[:len(sweep.players)]
+        return set(sweep.players[bits.astype(bool)])
+
+    base = players(base_id)
+    records = []
+    for u in np.argsort(-counts)[:10]:
+        xi = players(u)
+        region = W[inverse == u]
+        records.append({
+            "share": counts[u] / len(keys),
+            "is_base": u == base_id,
+            "out": ", ".join(sorted(base - xi)),
+            "in": ", ".join(sorted(xi - base)),
+            **{f"w_{f}": region[:, j].mean() for j, f in enumerate(sweep.features)},
+        })
+    return pd.DataFrame(records), inverse != base_id
+
+def nearest_flip(sweep, W, flipped):
+    # smallest L1 move away from the hand-picked weights that changes the XI
+    if not flipped.any():
+        return None
+    dist = np.abs(W - W[0]).sum(axis=1)
+    dist[~flipped] = np.inf
+    i = int(np.argmin(dist))
+    return {"l1_distance": round(float(dist[i]), 3), **dict(zip(sweep.features, W[i].round(3).tolist()))}
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: LOADING DATA")
+
+    df = load_deliveries()
+    bat_all, bowl_all = load_features(df)
+
+    for model, side, score in SWEEPS:
+        spec = REGISTRY[model]
+        stage(f"SWEEP: {model} {side}.{score} ({spec['source']})")
+
+        sweep = Sweep(spec, bat_all, bowl_all, side, score)
+        W = sample_weights(sweep.base, N_VECTORS)
+        print("Features:", dict(zip(sweep.features, sweep.base.tolist())))
+
+        # the exact selector (the published XIs) on the first vectors, the
+        # greedy rule order on all of them
+        start = time.perf_counter()
+        in_xi, weight_in_xi, keys = run_sweep(sweep, W[:EXACT_VECTORS])
+        print(f"exact:  {EXACT_VECTORS} weight vectors x {len(sweep.players)} players: "
+              f"{time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        greedy_in_xi, _, greedy_keys = run_sweep(sweep, W, "greedy")
+        print(f"greedy: {len(W)} weight vectors x {len(sweep.players)} players: "
+              f"{time.perf_counter() - start:.2f}s")
+
+        base_xi = sweep.select(W[:1])[:, 0]
+
+        freq = xi_frequency(sweep, W[:EXACT_VECTORS], in_xi, weight_in_xi, base_xi)
+        freq["greedy_xi_rate"] = (greedy_in_xi / len(W))[sweep.players.get_indexer(freq["player"])]
+        xis, flipped = distinct_xis(sweep, keys, W[:EXACT_VECTORS])
+        greedy_flipped = greedy_keys != greedy_keys[0]
+
+        print(f"\nDistinct XIs: {len(np.unique(keys))} exact, {len(np.unique(greedy_keys))} greedy  "
+              f"same XI as hand-picked weights: {1 - flipped.mean():.1%} exact, "
+              f"{1 - greedy_flipped.mean():.1%} greedy")
+        print("\nXI frequency (delta_* = mean weight in XI minus out of XI, exact selector):")
+        print(freq.head(20).round(3).to_string(index=False))
+        print("\nMost common XIs relative to the hand-picked XI (w_* = mean weights of that region):")
+        print(xis.round(3).to_string(index=False))
+        print("\nNearest selection flip:", nearest_flip(sweep, W[:EXACT_VECTORS], flipped))
+
+        freq.to_csv(f"weight_sweep_{model}_{side}_{score}.csv", index=False)
@@ -0,0 +1,208 @@
+import time
+import numpy as np
+import pandas as pd
+
+from aggregates import PHASES, stage, phase, load_deliveries
+from registry import REGISTRY, run_model, substitute_scores, uses_columns
+from run_all import load_features
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+BALLS = 120
+WICKETS = 10
+MAX_RUNS = 300        # score / runs-needed axis; larger values are clipped
+
+# legal-ball outcomes and their runs, then a wicket and a wide / no-ball
+# (one run, no ball used up)
+RUNS = [0, 1, 2, 3, 4, 6]
+WICKET = len(RUNS)
+EXTRA = len(RUNS) + 1
+
+WP_PRIOR_BALLS = 60   # balls of the phase mix added to every (phase, wickets down) cell
+
+# the scripts' proxies and the win-probability columns that replace them
+CLUTCH_SUBSTITUTES = {
+    "win_ratio": "wpa_per_match",
+    "pressure_SR": "wpa_per_match",
+    "pressure_runs": "wpa",
+}
+
+# =====================================================
+# OUTCOME RATES BY STATE
+# =====================================================
+
+def outcome_codes(df):
+    # the runs completed on a wicket ball are dropped (the tables' runs
+    # axis moves in whole outcomes), as is which batter was out: a few
+    # hundredths of a run per wicket in this data
+    runs = df["total_runs"].clip(upper=6).replace(5, 4)
+    codes = runs.map({r: i for i, r in enumerate(RUNS)}).to_numpy()
+    codes = np.where(df["is_wicket"], WICKET, codes)
+    return np.where(df["legal"], codes, EXTRA)
+
+def state_rates(df):
+    # (balls left, wickets in hand, outcome): the phase of the ball and the
+    # wickets already down pick the rates, shrunk to the phase mix
+    k = EXTRA + 1
+    p = pd.Index(PHASES).get_indexer(df["phase"])
+    down = (df["wickets_at_ball"] - df["is_wicket"]).clip(upper=WICKETS - 1).to_numpy()
+
+    cell = (p * WICKETS + down) * k + outcome_codes(df)
+    counts = np.bincount(cell, minlength=len(PHASES) * WICKETS * k)
+    counts = counts.reshape(len(PHASES), WICKETS, k).astype(float)
+
+    mix = counts.sum(axis=1, keepdims=True)
+    mix /= mix.sum(axis=2, keepdims=True)
+    rates = (counts + WP_PRIOR_BALLS * mix) / (counts.sum(axis=2, keepdims=True) + WP_PRIOR_BALLS)
+
+    ball_phase = np.array([PHASES.index(phase((BALLS - b) // 6)) if b else 0 for b in range(BALLS + 1)])
+    out = np.zeros((BALLS + 1, WICKETS + 1, k))
+    out[:, 1:] = rates[ball_phase][:, ::-1]   # wickets in hand w = WICKETS - down
+    return out
+
+# =====================================================
+# WIN-PROBABILITY TABLES
+# =====================================================
+#
+# Backward induction over (balls left, wickets in hand, runs): a legal ball
+# moves to one ball fewer, a wide / no-ball stays on the same ball one run
+# on, which is solved along the runs axis. A tie goes to a coin flip.
+
+def chase_table(rates):
+    # [b, w, r]: P(the chasing side wins) needing r with b balls, w wickets
+    R = MAX_RUNS
+    r_idx = np.arange(R + 1)
+    table = np.zeros((BALLS + 1, WICKETS + 1, R + 1))
+    table[:, :, 0] = 1.0
+    table[0, :, 1] = 0.5
+    table[:, 0, 1] = 0.5
+
+    for b in range(1, BALLS + 1):
+        prev = table[b - 1]
+        p = rates[b, 1:]
+        legal = sum(p[:, i, None] * prev[1:, np.maximum(r_idx - runs, 0)] for i, runs in enumerate(RUNS))
+        legal += p[:, WICKET, None] * prev[:-1]
+
+        row = table[b, 1:]
+        for r in range(1, R + 1):
+            row[:, r] = legal[:, r] + p[:, EXTRA] * row[:, r - 1]
+    return table
+
+def first_innings_table(rates, chase):
+    # [b, w, s]: P(the side batting first wins) on s with b balls, w wickets
+    R = MAX_RUNS
+    s_idx = np.arange(R + 1)
+    defend = 1.0 - chase[BALLS, WICKETS, np.minimum(s_idx + 1, R)]
+    table = np.empty((BALLS + 1, WICKETS + 1, R + 1))
+    table[0] = defend
+    table[:, 0] = defend
+
+    for b in range(1, BALLS + 1):
+        prev = table[b - 1]
+        p = rates[b, 1:]
+        legal = sum(p[:, i, None] * prev[1:, np.minimum(s_idx + runs, R)] for i, runs in enumerate(RUNS))
+        legal += p[:, WICKET, None] * prev[:-1]
+
+        row = table[b, 1:]
+        row[:, R] = legal[:, R] / (1 - p[:, EXTRA])
+        for s in range(R - 1, -1, -1):
+            row[:, s] = legal[:, s] + p[:, EXTRA] * row[:, s + 1]
+    return table
+
+def win_tables(df):
+    rates = state_rates(df)
+    chase = chase_table(rates)
+    return {"first": first_innings_table(rates, chase), "chase": chase}
+
+def win_probability(tables, innings, balls_left, wickets_in_hand, score, target):
+    # batting side's win probability, one gather per delivery
+    b = np.clip(np.asarray(balls_left, dtype=int), 0, BALLS)
+    w = np.clip(np.asarray(wickets_in_hand, dtype=int), 0, WICKETS)
+    score = np.asarray(score, dtype=float)
+    need = np.nan_to_num(np.asarray(target, dtype=float) - score)
+
+    first = tables["first"][b, w, np.clip(score, 0, MAX_RUNS).astype(int)]
+    chase = tables["chase"][b, w, np.clip(need, 0, MAX_RUNS).astype(int)]
+    return np.where(np.asarray(innings) == 1, first, chase)
+
+# =====================================================
+# WIN PROBABILITY ADDED PER DELIVERY
+# =====================================================
+
+def add_win_probability(df, tables):
+    # wp before and after every delivery for the batting side; wpa is the
+    # batter's credit and the bowler's debit
+    after_balls = df["legal_ball"].to_numpy()
+    after_wkts = df["wickets_at_ball"].to_numpy()
+    after_runs = df["innings_runs"].to_numpy()
+    before_balls = after_balls - df["legal"].to_numpy()
+    before_wkts = after_wkts - df["is_wicket"].to_numpy()
+    before_runs = after_runs - df["total_runs"].to_numpy()
+
+    args = (df["innings"].to_numpy(), df["target"].to_numpy(dtype=float))
+    df = df.copy()
+    df["wp_before"] = win_probability(tables, args[0], BALLS - before_balls, WICKETS - before_wkts,
+                                      before_runs, args[1])
+    df["wp_after"] = win_probability(tables, args[0], BALLS - after_balls, WICKETS - after_wkts,
+                                     after_runs, args[1])
+    df["wpa"] = df["wp_after"] - df["wp_before"]
+    return df
+
+def clutch_spec(spec):
+    # the spec with the win-probability columns in place of the proxies
+    return substitute_scores(spec, CLUTCH_SUBSTITUTES)
+
+if __name__ == "__main__":
+
+    stage("STAGE 1: WIN-PROBABILITY TABLES")
+
+    df = load_deliveries()
+    start = time.perf_counter()
+    tables = win_tables(df)
+    print(f"Tables: {tables['first'].shape} x 2  time: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    df = add_win_probability(df, tables)
+    print(f"WPA for {len(df)} deliveries: {time.perf_counter() - start:.4f}s")
+
+    print("\nChasing side's win probability by balls left (rows) and runs needed, 6 wickets in hand")
+    chase = pd.DataFrame(
+        tables["chase"][[6, 12, 18, 24, 36, 48, 60], 6][:, [10, 20, 30, 40, 50, 60, 80]],
+        index=[6, 12, 18, 24, 36, 48, 60], columns=[10, 20, 30, 40, 50, 60, 80]
+    )
+    print(chase.round(3).to_string())
+
+    print("\nSide batting first: win probability of its final total")
+    print(pd.Series(tables["first"][0, 0, 140:221:10], index=range(140, 221, 10)).round(3).to_string())
+
+    stage("STAGE 2: CALIBRATION")
+
+    # start-of-chase probability against the result
+    start_chase = df[(df["innings"] == 2)].groupby("match").first()
+    won = start_chase["batting_team"] == start_chase["match_winner"]
+    wp = start_chase["wp_before"]
+    print(f"Chases: {len(wp)}  mean wp: {wp.mean():.3f}  won: {won.mean():.3f}  "
+          f"brier: {((wp - won)**2).mean():.3f}  (0.25 for a coin flip)")
+    every = df.assign(won=df["batting_team"] == df["match_winner"])
+    print(f"All deliveries  brier: {((every['wp_before'] - every['won'])**2).mean():.3f}")
+
+    stage("STAGE 3: WIN PROBABILITY ADDED")
+
+    bat_all, bowl_all = load_features(df)
+    print(bat_all[["matches", "runs", "SR", "wpa", "wpa_per_match", "win_ratio", "pressure_SR"]]
+          .sort_values("wpa", ascending=False).head(15).round(3).to_string())
+    print()
+    print(bowl_all[["matches", "wickets", "economy", "wpa", "wpa_per_match"]]
+          .sort_values("wpa", ascending=False).head(15).round(3).to_string())
+
+    stage("STAGE 4: MODELS WITH WPA IN PLACE OF THE PRESSURE PROXIES")
+
+    for name, spec in REGISTRY.items():
+        if not uses_columns(spec, CLUTCH_SUBSTITUTES):
+            continue
+        base = run_model(spec, bat_all, bowl_all)["xi"]
+        clutch = run_model(clutch_spec(spec), bat_all, bowl_all)["xi"]
+        print(f"  {name:<15} out: {', '.join(p for p in base if p not in clutch) or '-'}")
+        print(f"  {'':<15} in:  {', '.join(p for p in clutch if p not in base) or '-'}")